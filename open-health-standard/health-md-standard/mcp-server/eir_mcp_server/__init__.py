@@ -0,0 +1,22 @@
+"""
+EIR MCP Server
+
+Model Context Protocol server that answers tool calls about Health.md
+files from a warm cache of parsed records, so agents pay the parse cost
+once per file change instead of once per question.
+"""
+
+__version__ = "0.1.0"
+
+from .records import RecordStore
+from .server import McpServer, main
+from .tools import TOOLS, Tool, ToolError
+
+__all__ = [
+    'McpServer',
+    'RecordStore',
+    'TOOLS',
+    'Tool',
+    'ToolError',
+    'main',
+]
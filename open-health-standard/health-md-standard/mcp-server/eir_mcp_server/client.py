@@ -0,0 +1,215 @@
+"""
+EIR MCP Client - Minimal stdio client and load test for the MCP server
+
+Spawns the server as a subprocess and fires tool calls at it with a fixed
+number in flight, then reports throughput and latency percentiles. With
+--cli-baseline it also times the one-shot parse_health.py script, which
+pays interpreter startup and a full parse on every call.
+
+Usage:
+    python -m eir_mcp_server.client patient.health.md
+    python -m eir_mcp_server.client records/*.health.md --calls 2000 --concurrency 32
+    python -m eir_mcp_server.client patient.health.md --tool generate_summary --cli-baseline 20
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+CLI = Path(__file__).resolve().parents[2] / 'openclaw-skill' / 'scripts' / 'parse_health.py'
+
+# Tools exercised by default, with the arguments each call gets besides file_path
+DEFAULT_MIX = {
+    'query_medications': {},
+    'query_lab_results': {'include_trends': True},
+    'query_conditions': {},
+    'analyze_timeline': {'days_back': 365},
+    'generate_summary': {'summary_type': 'brief'},
+}
+
+
+class McpError(Exception):
+    """JSON-RPC error response from the server."""
+
+
+class McpClient:
+    """
+    JSON-RPC client for a server process speaking MCP over stdio.
+
+    Requests may be issued concurrently; responses are matched to their
+    callers by id.
+    """
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self._ids = itertools.count(1)
+        self._waiting: Dict[int, 'asyncio.Future[Any]'] = {}
+        self._reader = asyncio.ensure_future(self._read())
+
+    @classmethod
+    async def spawn(cls, *server_args: str, command: Optional[Sequence[str]] = None) -> 'McpClient':
+        """Start a server (``python -m eir_mcp_server`` by default) and initialize the session."""
+        command = list(command or [sys.executable, '-m', 'eir_mcp_server'])
+        process = await asyncio.create_subprocess_exec(
+            *command, *server_args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=16 * 1024 * 1024,
+        )
+        client = cls(process)
+        await client.request('initialize', {
+            'protocolVersion': '2024-11-05',
+            'capabilities': {},
+            'clientInfo': {'name': 'eir-mcp-client', 'version': '0.1.0'},
+        })
+        await client.notify('notifications/initialized')
+        return client
+
+    async def _read(self):
+        async for line in self.process.stdout:
+            message = json.loads(line)
+            future = self._waiting.pop(message.get('id'), None)
+            if future is None or future.done():
+                continue
+            if 'error' in message:
+                future.set_exception(McpError(message['error'].get('message')))
+            else:
+                future.set_result(message.get('result'))
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(McpError('server exited'))
+
+    async def _send(self, message: Dict[str, Any]):
+        self.process.stdin.write(json.dumps(message).encode('utf-8') + b'\n')
+        await self.process.stdin.drain()
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        await self._send({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}})
+        return await future
+
+    async def notify(self, method: str, params: Optional[Dict[str, Any]] = None):
+        await self._send({'jsonrpc': '2.0', 'method': method, 'params': params or {}})
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        return (await self.request('tools/list'))['tools']
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> str:
+        """Text content of a tool result; raises McpError when the tool reports an error."""
+        result = await self.request('tools/call', {'name': name, 'arguments': arguments or {}})
+        text = ''.join(item.get('text', '') for item in result.get('content', ()))
+        if result.get('isError'):
+            raise McpError(text)
+        return text
+
+    async def close(self):
+        self.process.stdin.close()
+        await self.process.wait()
+        await self._reader
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _report(label: str, latencies: List[float], elapsed: float, errors: int):
+    latencies = sorted(latencies)
+    print(f"{label}: {len(latencies)} calls in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s), {errors} errors")
+    if latencies:
+        print(f"  latency p50 {_percentile(latencies, 0.5) * 1000:.2f} ms, "
+              f"p95 {_percentile(latencies, 0.95) * 1000:.2f} ms, "
+              f"p99 {_percentile(latencies, 0.99) * 1000:.2f} ms, "
+              f"max {latencies[-1] * 1000:.2f} ms")
+
+
+async def load_test(files: List[str], calls: int, concurrency: int, tools: Dict[str, Dict[str, Any]],
+                    server_args: Sequence[str]) -> int:
+    client = await McpClient.spawn(*server_args)
+    try:
+        mix = list(tools.items())
+
+        # First touch of every file: parses through the server's worker pool
+        start = time.perf_counter()
+        await asyncio.gather(*(client.call_tool('load_eir_file', {'file_path': path, 'privacy_check': False})
+                               for path in files))
+        print(f"Loaded {len(files)} file(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        latencies: List[float] = []
+        errors = 0
+        next_call = itertools.count()
+
+        async def worker():
+            nonlocal errors
+            while True:
+                index = next(next_call)
+                if index >= calls:
+                    return
+                path = files[index % len(files)]
+                name, arguments = mix[index % len(mix)]
+                began = time.perf_counter()
+                try:
+                    await client.call_tool(name, {**arguments, 'file_path': path})
+                except McpError as e:
+                    errors += 1
+                    if errors == 1:
+                        print(f"  first error ({name}): {e}", file=sys.stderr)
+                latencies.append(time.perf_counter() - began)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        _report(f"MCP server, {concurrency} in flight", latencies, time.perf_counter() - start, errors)
+        return 1 if errors else 0
+    finally:
+        await client.close()
+
+
+def cli_baseline(files: List[str], calls: int) -> None:
+    """Time parse_health.py per call, as an agent without the server would run it."""
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for path in itertools.islice(itertools.cycle(files), calls):
+        began = time.perf_counter()
+        result = subprocess.run([sys.executable, str(CLI), path, '--summary'], capture_output=True)
+        errors += result.returncode != 0
+        latencies.append(time.perf_counter() - began)
+    _report('parse_health.py per call', latencies, time.perf_counter() - start, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the EIR MCP server over stdio')
+    parser.add_argument('files', nargs='+', help='Health.md files to query')
+    parser.add_argument('--calls', type=int, default=1000, help='Tool calls to make (default: 1000)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Calls in flight (default: 16)')
+    parser.add_argument('--tool', action='append', choices=sorted(DEFAULT_MIX),
+                        help='Tool to call; repeat for a mix (default: all query tools)')
+    parser.add_argument('--workers', type=int, help='Passed to the server')
+    parser.add_argument('--cache-size', type=int, help='Passed to the server')
+    parser.add_argument('--cli-baseline', type=int, default=0, metavar='N',
+                        help='Also time N runs of parse_health.py --summary for comparison')
+    args = parser.parse_args()
+
+    files = [str(Path(path).resolve()) for path in args.files]
+    tools = {name: DEFAULT_MIX[name] for name in args.tool} if args.tool else DEFAULT_MIX
+    server_args = []
+    if args.workers is not None:
+        server_args += ['--workers', str(args.workers)]
+    if args.cache_size is not None:
+        server_args += ['--cache-size', str(args.cache_size)]
+
+    status = asyncio.run(load_test(files, args.calls, args.concurrency, tools, server_args))
+    if args.cli_baseline:
+        cli_baseline(files, args.cli_baseline)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
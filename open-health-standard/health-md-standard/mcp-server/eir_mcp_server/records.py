@@ -0,0 +1,92 @@
+"""
+EIR MCP Server Records - Bounded, change-aware cache of parsed HealthRecords
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Dict, Optional, Tuple
+
+from health_md import HealthRecord
+
+# (st_mtime_ns, st_size) of the file a record was parsed from
+Version = Tuple[int, int]
+
+
+def _parse(path: str) -> HealthRecord:
+    """Worker entry point: fully parse one file."""
+    record = HealthRecord.from_file(path)
+    record._parse_content()
+    return record
+
+
+class RecordStore:
+    """
+    Parsed HealthRecords by path, shared by every tool call.
+
+    Records live in an LRU of at most ``max_records`` entries and are
+    checked against the file's mtime and size on every access, so an
+    edited file is reparsed on the next call that touches it. Parsing runs
+    in ``executor`` (the event loop's default thread pool when None), so a
+    slow parse never blocks other calls, and concurrent calls for the same
+    file wait on a single parse.
+    """
+
+    def __init__(self, max_records: int = 64, executor: Optional[Executor] = None):
+        self.max_records = max_records
+        self.executor = executor
+        self._records: 'OrderedDict[str, Tuple[Version, HealthRecord]]' = OrderedDict()
+        self._pending: Dict[Tuple[str, Version], 'asyncio.Future[HealthRecord]'] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def get(self, path: str) -> HealthRecord:
+        """The record for ``path``, parsing it on a miss or after the file changed."""
+        path = os.path.abspath(os.path.expanduser(path))
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._records.get(path)
+        if cached is not None and cached[0] == version:
+            self._records.move_to_end(path)
+            self.hits += 1
+            return cached[1]
+
+        key = (path, version)
+        pending = self._pending.get(key)
+        if pending is None:
+            self.misses += 1
+            loop = asyncio.get_running_loop()
+            pending = asyncio.ensure_future(loop.run_in_executor(self.executor, _parse, path))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+
+        # Shielded so a cancelled call does not abort a parse others wait on
+        record = await asyncio.shield(pending)
+        current = self._records.get(path)
+        if current is None or current[0] != version:
+            self._records[path] = (version, record)
+            self._records.move_to_end(path)
+            while len(self._records) > self.max_records:
+                self._records.popitem(last=False)
+        return record
+
+    def invalidate(self, path: Optional[str] = None):
+        """Drop one cached record, or all of them."""
+        if path is None:
+            self._records.clear()
+        else:
+            self._records.pop(os.path.abspath(os.path.expanduser(path)), None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'records': len(self._records),
+            'max_records': self.max_records,
+            'hits': self.hits,
+            'misses': self.misses,
+            'parsing': len(self._pending),
+        }
@@ -0,0 +1,172 @@
+"""
+EIR MCP Server - Model Context Protocol server for Health.md files over stdio
+
+Speaks newline-delimited JSON-RPC 2.0 on stdin/stdout. Every request is
+handled in its own task, so a call waiting on a parse does not hold up
+calls answered from already parsed records.
+
+Usage:
+    eir-mcp-server
+    python -m eir_mcp_server --workers 4 --cache-size 128
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from . import __version__
+from .records import RecordStore
+from .tools import TOOLS, ToolError
+
+PROTOCOL_VERSION = '2024-11-05'
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class McpServer:
+    """
+    MCP session state and request dispatch.
+
+    ``current_path`` is the file loaded last with ``load_eir_file``; the
+    query tools default to it.
+    """
+
+    def __init__(self, store: RecordStore):
+        self.store = store
+        self.current_path: Optional[str] = None
+
+    async def handle(self, message: Any) -> Optional[Dict[str, Any]]:
+        """Response to one JSON-RPC message, or None for notifications."""
+        if not isinstance(message, dict) or message.get('jsonrpc') != '2.0' or 'method' not in message:
+            return _error(message.get('id') if isinstance(message, dict) else None,
+                          INVALID_REQUEST, 'Invalid request')
+        if 'id' not in message:
+            return None
+
+        request_id = message['id']
+        method = message['method']
+        params = message.get('params')
+        if params is None:
+            params = {}
+        if not isinstance(params, dict):
+            return _error(request_id, INVALID_PARAMS, 'params must be an object')
+        try:
+            if method == 'initialize':
+                result = {
+                    'protocolVersion': PROTOCOL_VERSION,
+                    'capabilities': {'tools': {'listChanged': False}},
+                    'serverInfo': {'name': 'eir-mcp-server', 'version': __version__},
+                }
+            elif method == 'ping':
+                result = {}
+            elif method == 'tools/list':
+                result = {'tools': [tool.describe() for tool in TOOLS.values()]}
+            elif method == 'tools/call':
+                name = params.get('name')
+                tool = TOOLS.get(name) if isinstance(name, str) else None
+                if tool is None:
+                    return _error(request_id, INVALID_PARAMS, f"Unknown tool: {name!r}")
+                arguments = params.get('arguments')
+                if arguments is None:
+                    arguments = {}
+                if not isinstance(arguments, dict):
+                    return _error(request_id, INVALID_PARAMS, 'arguments must be an object')
+                result = await self.call_tool(tool.name, arguments)
+            else:
+                return _error(request_id, METHOD_NOT_FOUND, f'Method not found: {method}')
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            return _error(request_id, INTERNAL_ERROR, f'{type(e).__name__}: {e}')
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a tool; failures the model can act on come back as ``isError`` results."""
+        try:
+            value = await TOOLS[name].handler(self, arguments)
+        except (ToolError, KeyError, ValueError, OSError) as e:
+            message = f"Missing argument: {e}" if isinstance(e, KeyError) else str(e)
+            return {'content': [{'type': 'text', 'text': message}], 'isError': True}
+
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+        return {'content': [{'type': 'text', 'text': text}], 'isError': False}
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer requests from ``reader`` until it reaches EOF."""
+        tasks = set()
+
+        async def respond(message: Any):
+            response = await self.handle(message)
+            if response is not None:
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                writer.write(json.dumps(_error(None, PARSE_ERROR, 'Parse error')).encode('utf-8') + b'\n')
+                continue
+            task = asyncio.ensure_future(respond(message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        await writer.drain()
+
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+async def _stdio() -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    loop = asyncio.get_running_loop()
+    # Large limit: a single request line may carry sizeable arguments
+    reader = asyncio.StreamReader(limit=16 * 1024 * 1024)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return reader, writer
+
+
+async def run(workers: int, cache_size: int):
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+    try:
+        server = McpServer(RecordStore(max_records=cache_size, executor=executor))
+        reader, writer = await _stdio()
+        await server.serve(reader, writer)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MCP server for Health.md files (JSON-RPC over stdio)')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Parser processes; 0 parses in a thread of the server process '
+                             '(default: min(4, CPUs))')
+    parser.add_argument('--cache-size', type=int, default=64,
+                        help='Parsed records kept in memory (default: 64)')
+    args = parser.parse_args()
+
+    asyncio.run(run(args.workers, args.cache_size))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+EIR MCP Server Tools - Tool definitions answered from cached HealthRecords
+"""
+
+import asyncio
+import dataclasses
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+import health_md
+from health_md import HealthRecord
+
+if TYPE_CHECKING:
+    from .server import McpServer
+
+
+class ToolError(Exception):
+    """A tool call failed in a way the model should see, e.g. a bad argument."""
+
+
+@dataclass
+class Tool:
+    name: str
+    description: str
+    input_schema: Dict[str, Any]
+    handler: Callable[['McpServer', Dict[str, Any]], Awaitable[Any]]
+
+    def describe(self) -> Dict[str, Any]:
+        """Entry for the ``tools/list`` response."""
+        return {'name': self.name, 'description': self.description, 'inputSchema': self.input_schema}
+
+
+TOOLS: Dict[str, Tool] = {}
+
+_FILE_PATH = {
+    'file_path': {
+        'type': 'string',
+        'description': 'Path to a Health.md file (default: the file loaded last)',
+    },
+}
+
+# Token budget per generate_summary type
+SUMMARY_BUDGETS = {'brief': 300, 'patient_friendly': 800, 'clinical': 1200, 'detailed': 2500}
+
+
+def tool(name: str, description: str, properties: Optional[Dict[str, Any]] = None,
+         required: List[str] = ()):
+    """Register an async handler as an MCP tool."""
+    def register(handler):
+        schema = {'type': 'object', 'properties': {**(properties or {}), **_FILE_PATH}}
+        if required:
+            schema['required'] = list(required)
+        TOOLS[name] = Tool(name, description, schema, handler)
+        return handler
+    return register
+
+
+async def _record(server: 'McpServer', args: Dict[str, Any]) -> HealthRecord:
+    path = args.get('file_path') or server.current_path
+    if not path:
+        raise ToolError("No file loaded: call load_eir_file first or pass file_path")
+    try:
+        return await server.store.get(path)
+    except FileNotFoundError:
+        raise ToolError(f"Health.md file not found: {path}")
+    except Exception as e:
+        raise ToolError(f"Could not parse {path}: {type(e).__name__}: {e}")
+
+
+def _positive_int(args: Dict[str, Any], name: str) -> Optional[int]:
+    value = args.get(name)
+    if value is None:
+        return None
+    if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+        raise ToolError(f"{name} must be a positive integer")
+    return value
+
+
+def _string_list(args: Dict[str, Any], name: str) -> List[str]:
+    value = args.get(name)
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ToolError(f"{name} must be a list of strings")
+    return value
+
+
+@tool('load_eir_file',
+      'Load a Health.md file and return its privacy level, entry counts and a short summary.',
+      {
+          'privacy_check': {
+              'type': 'boolean',
+              'description': "Refuse records with privacy level 'identified' (default: true)",
+          },
+      },
+      required=['file_path'])
+async def load_eir_file(server: 'McpServer', args: Dict[str, Any]) -> Dict[str, Any]:
+    record = await _record(server, args)
+    privacy_level = record.get_privacy_level()
+    if args.get('privacy_check', True) and privacy_level == 'identified':
+        raise ToolError(f"Refusing to load a record with privacy level {privacy_level!r}; "
+                        f"pass privacy_check=false to load it anyway")
+
+    server.current_path = args['file_path']
+    return {
+        'file': args['file_path'],
+        'health_md_version': record.frontmatter.get('health_md_version', 'unknown'),
+        'privacy_level': privacy_level,
+        'counts': {name: len(getattr(record, name)) for name in
+                   ('medications', 'lab_results', 'vital_signs', 'medical_history', 'clinical_timeline')},
+        'summary': record.to_llm_context(max_tokens=SUMMARY_BUDGETS['brief']),
+    }
+
+
+@tool('query_medications', 'Current medications with dosage, indication and ICD-10 codes.')
+async def query_medications(server: 'McpServer', args: Dict[str, Any]) -> Dict[str, Any]:
+    record = await _record(server, args)
+    medications = [health_md.entity_to_dict(med) for med in record.get_current_medications()]
+    return {'medication_count': len(medications), 'medications': medications}
+
+
+@tool('query_lab_results', 'Lab results, optionally for one test, a recent window and with trends.',
+      {
+          'test_name': {'type': 'string', 'description': 'Only tests whose name contains this text'},
+          'days_back': {'type': 'integer', 'description': 'Only results from the last N days (default: all)'},
+          'include_trends': {'type': 'boolean', 'description': 'Add the trend of each test (default: false)'},
+      })
+async def query_lab_results(server: 'McpServer', args: Dict[str, Any]) -> Dict[str, Any]:
+    record = await _record(server, args)
+    days_back = _positive_int(args, 'days_back')
+    labs = record.get_recent_labs(days_back) if days_back else record.lab_results
+
+    test_name = args.get('test_name') or ''
+    if not isinstance(test_name, str):
+        raise ToolError("test_name must be a string")
+    test_name = test_name.lower()
+    if test_name:
+        labs = [lab for lab in labs if test_name in lab.name.lower()]
+
+    result: Dict[str, Any] = {'lab_count': len(labs), 'labs': [health_md.entity_to_dict(lab) for lab in labs]}
+    if args.get('include_trends'):
+        trends = {}
+        for name in dict.fromkeys(lab.name for lab in labs):
+            series = record.lab_series[name].valid()
+            latest = series.latest()
+            trends[name] = {
+                'trend': series.trend(),
+                'slope_per_day': series.slope(),
+                'latest': latest[1] if latest else None,
+                'unit': series.unit,
+            }
+        result['trends'] = trends
+    return result
+
+
+@tool('query_conditions', 'Medical conditions and diagnoses.',
+      {
+          'status': {
+              'type': 'string',
+              'enum': ['active', 'resolved', 'chronic', 'all'],
+              'description': "Only conditions whose entry mentions this status (default: 'all')",
+          },
+          'include_icd_codes': {'type': 'boolean', 'description': 'Include ICD-10 codes (default: true)'},
+      })
+async def query_conditions(server: 'McpServer', args: Dict[str, Any]) -> Dict[str, Any]:
+    record = await _record(server, args)
+    status = args.get('status') or 'all'
+    if status not in ('active', 'resolved', 'chronic', 'all'):
+        raise ToolError(f"Unknown status {status!r}")
+
+    conditions = []
+    for condition in record.medical_history:
+        if status != 'all' and status not in (condition.content or '').lower():
+            continue
+        entry = health_md.entity_to_dict(condition)
+        entry.pop('content', None)
+        if not args.get('include_icd_codes', True):
+            entry.pop('icd_code', None)
+        conditions.append(entry)
+    return {'condition_count': len(conditions), 'conditions': conditions}
+
+
+@tool('analyze_timeline', 'Clinical timeline of a recent period, with visit counts by type and provider.',
+      {
+          'days_back': {'type': 'integer', 'description': 'Only events from the last N days (default: all)'},
+          'event_types': {
+              'type': 'array',
+              'items': {'type': 'string'},
+              'description': 'Only events whose visit type or title contains one of these',
+          },
+          'include_outcomes': {'type': 'boolean', 'description': 'Include assessments and plans (default: true)'},
+      })
+async def analyze_timeline(server: 'McpServer', args: Dict[str, Any]) -> Dict[str, Any]:
+    record = await _record(server, args)
+    events = record.get_clinical_timeline(_positive_int(args, 'days_back'))
+
+    event_types = [t.lower() for t in _string_list(args, 'event_types')]
+    if event_types:
+        events = [
+            event for event in events
+            if any(t in f"{event.visit_type or ''} {event.title}".lower() for t in event_types)
+        ]
+
+    entries = []
+    for event in events:
+        entry = health_md.entity_to_dict(event)
+        if not args.get('include_outcomes', True):
+            entry.pop('assessment', None)
+            entry.pop('plan', None)
+        entries.append(entry)
+
+    dated = [event.date for event in events if event.date]
+    return {
+        'event_count': len(events),
+        'first_event': min(dated).isoformat() if dated else None,
+        'last_event': max(dated).isoformat() if dated else None,
+        'visit_types': dict(Counter(event.visit_type or 'Unknown' for event in events)),
+        'provider_types': dict(Counter(event.provider_type or 'Unknown' for event in events)),
+        'events': entries,
+    }
+
+
+@tool('validate_eir_file', 'Validate the format and content of a Health.md file against the spec; '
+      'issues are reported with line and column.',
+      {
+          'strict_mode': {'type': 'boolean', 'description': 'Count warnings as failures (default: false)'},
+          'fail_fast': {'type': 'boolean', 'description': 'Stop at the first error (default: false)'},
+      })
+async def validate_eir_file(server: 'McpServer', args: Dict[str, Any]) -> Dict[str, Any]:
+    # Validation reuses the cached record's extraction, so it costs no reparse
+    path = args.get('file_path') or server.current_path
+    try:
+        record = await _record(server, args)
+    except ToolError:
+        if not path or not Path(path).is_file():
+            raise
+        # Not parseable as a whole (e.g. broken YAML): validate a fresh,
+        # unextracted record so the failure is reported with its position
+        record = await asyncio.get_running_loop().run_in_executor(None, HealthRecord.from_file, path)
+    report = record.validate(fail_fast=bool(args.get('fail_fast')), strict=bool(args.get('strict_mode')))
+    return {'file': path, **report.as_dict()}
+
+
+@tool('generate_summary', 'LLM-optimized health summary packed into a token budget.',
+      {
+          'summary_type': {
+              'type': 'string',
+              'enum': list(SUMMARY_BUDGETS),
+              'description': "Sets the token budget (default: 'clinical')",
+          },
+          'focus_areas': {
+              'type': 'array',
+              'items': {
+                  'type': 'string',
+                  'enum': [section.name for section in health_md.DEFAULT_CONTEXT_SECTIONS],
+              },
+              'description': 'Sections to pack before all others',
+          },
+      })
+async def generate_summary(server: 'McpServer', args: Dict[str, Any]) -> str:
+    record = await _record(server, args)
+    summary_type = args.get('summary_type') or 'clinical'
+    if not isinstance(summary_type, str) or summary_type not in SUMMARY_BUDGETS:
+        raise ToolError(f"Unknown summary_type {summary_type!r}")
+
+    focus = set(_string_list(args, 'focus_areas'))
+    top = max(section.priority for section in health_md.DEFAULT_CONTEXT_SECTIONS) + 1
+    sections = [
+        dataclasses.replace(section, priority=top) if section.name in focus else section
+        for section in health_md.DEFAULT_CONTEXT_SECTIONS
+    ]
+    return record.to_llm_context(max_length=SUMMARY_BUDGETS[summary_type] * 8,
+                                 max_tokens=SUMMARY_BUDGETS[summary_type], sections=sections)
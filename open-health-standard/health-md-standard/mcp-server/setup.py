@@ -0,0 +1,30 @@
+"""
+EIR MCP Server - Model Context Protocol server for Health.md files
+"""
+
+from setuptools import setup, find_packages
+
+setup(
+    name="eir-mcp-server",
+    version="0.1.0",
+    author="Birger Moëll",
+    author_email="birger.moell@uu.se",
+    description="MCP server answering questions about Health.md files from a warm record cache",
+    url="https://github.com/BirgerMoell/health-md-standard",
+    classifiers=[
+        "Intended Audience :: Healthcare Industry",
+        "Topic :: Scientific/Engineering :: Medical Science Apps.",
+        "License :: OSI Approved :: MIT License",
+        "Programming Language :: Python :: 3",
+    ],
+    packages=find_packages(),
+    python_requires=">=3.8",
+    install_requires=[
+        "health-md[analytics]>=1.0.0",
+    ],
+    entry_points={
+        "console_scripts": [
+            "eir-mcp-server=eir_mcp_server.server:main",
+        ],
+    },
+)
@@ -9,17 +9,32 @@ Usage:
     python parse_health.py patient.health.md
     python parse_health.py patient.health.md --summary --medications
     python parse_health.py patient.health.md --validate --anonymize
+    python parse_health.py records/ --frontmatter-only
+    python parse_health.py records/ --watch
+    python parse_health.py records/ --ndjson > entities.ndjson
+    python parse_health.py patient.health.md --profile
+    python parse_health.py records/ --screen --as-of 2024-03-01
+    python parse_health.py records/ --anonymize-dir export/ --privacy-level pseudonymized
+    python parse_health.py records/ --fhir-dir bulk/ --workers 8
+    python parse_health.py records/ --parquet-dir tables/
 """
 
 import argparse
 import json
+import os
 import sys
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional
 
-# Import the health_md parser (assumes it's installed or in path)
+# Import the health_md parser (assumes it's installed or in path). This
+# script runs once per tool call, so everything beyond the core parser
+# (validation, batch parsing, serialization) is reached through the
+# package and only imported by the options that use it.
 try:
-    from health_md import HealthRecord, validate_health_md, HealthMdValidationError
+    import health_md
+    from health_md import HealthRecord, read_frontmatter
 except ImportError:
     print("Error: health-md library not found. Install with: pip install health-md")
     sys.exit(1)
@@ -30,8 +45,14 @@ class HealthMdParser:
     OpenClaw skill for parsing and analyzing Health.md files.
     """
     
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, cache_dir: Optional[str] = None,
+                 as_of: Optional[datetime] = None, profile: bool = False,
+                 rules: Optional['health_md.RuleSet'] = None):
         self.filepath = Path(filepath)
+        self.cache_dir = cache_dir
+        self.as_of = as_of
+        self.profile = profile
+        self.rules = rules
         self.record: Optional[HealthRecord] = None
         
         if not self.filepath.exists():
@@ -40,57 +61,58 @@ class HealthMdParser:
     def parse(self) -> HealthRecord:
         """Parse the Health.md file and return a HealthRecord object."""
         try:
-            self.record = HealthRecord.from_file(self.filepath)
+            self.record = HealthRecord.from_file(self.filepath, cache=self.cache_dir,
+                                                 profile=self.profile)
+            if self.profile:
+                # Extract everything now so the breakdown covers every stage
+                self.record._parse_content()
             return self.record
-        except HealthMdValidationError as e:
+        except health_md.HealthMdValidationError as e:
             raise ValueError(f"Invalid Health.md format: {e}")
     
-    def validate(self) -> Dict[str, Any]:
-        """Validate the Health.md file format and return validation results."""
+    def validate(self, fail_fast: bool = False, strict: bool = False) -> Dict[str, Any]:
+        """
+        Validate the Health.md file and return validation results.
+
+        Validation runs on the record as it is parsed, so the outputs
+        requested afterwards reuse the same parse.
+        """
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            validation_result = validate_health_md(content)
-            return {
-                'valid': True,
-                'file': str(self.filepath),
-                'version': validation_result.get('version', 'unknown'),
-                'privacy_level': validation_result.get('privacy_level', 'unknown'),
-                'warnings': validation_result.get('warnings', []),
-                'sections_found': validation_result.get('sections', [])
-            }
+            if not self.record:
+                self.parse()
+            report = self.record.validate(fail_fast=fail_fast, strict=strict)
         except Exception as e:
             return {
                 'valid': False,
                 'file': str(self.filepath),
                 'error': str(e)
             }
+        result = {
+            'valid': report.valid,
+            'file': str(self.filepath),
+            'version': report.version,
+            'privacy_level': report.privacy_level,
+            'errors': [str(issue) for issue in report.errors],
+            'warnings': [str(issue) for issue in report.warnings],
+            'sections_found': report.sections
+        }
+        if not report.valid:
+            result['error'] = result['errors'][0]
+        return result
     
-    def get_summary(self) -> str:
+    def get_summary(self, max_tokens: Optional[int] = None) -> str:
         """Generate an LLM-optimized summary of the health record."""
         if not self.record:
             self.parse()
         
-        return self.record.to_llm_context()
+        return self.record.to_llm_context(now=self.as_of, max_tokens=max_tokens)
     
     def get_medications(self) -> Dict[str, Any]:
         """Extract current medications information."""
         if not self.record:
             self.parse()
         
-        medications = []
-        for med in self.record.get_current_medications():
-            medications.append({
-                'name': med.name,
-                'generic_name': med.generic_name,
-                'indication': med.indication,
-                'dosage': med.dosage,
-                'started': med.started.isoformat() if med.started else None,
-                'prescriber': med.prescriber,
-                'notes': med.notes,
-                'icd_codes': med.icd_codes
-            })
+        medications = [health_md.entity_to_dict(med) for med in self.record.get_current_medications()]
         
         return {
             'medication_count': len(medications),
@@ -102,18 +124,9 @@ class HealthMdParser:
         if not self.record:
             self.parse()
         
-        recent_labs = self.record.get_recent_labs(days)
+        recent_labs = self.record.get_recent_labs(days, self.as_of)
         
-        labs = []
-        for lab in recent_labs:
-            labs.append({
-                'name': lab.name,
-                'date': lab.date.isoformat() if lab.date else None,
-                'value': lab.value,
-                'reference_range': lab.reference_range,
-                'trend': lab.trend,
-                'clinical_significance': lab.clinical_significance
-            })
+        labs = [health_md.entity_to_dict(lab) for lab in recent_labs]
         
         return {
             'lab_count': len(labs),
@@ -128,11 +141,9 @@ class HealthMdParser:
         
         conditions = []
         for condition in self.record.medical_history:
-            conditions.append({
-                'condition': condition['condition'],
-                'onset': condition['onset'].isoformat() if condition['onset'] else None,
-                'icd_code': condition.get('icd_code', 'Unknown')
-            })
+            condition = health_md.entity_to_dict(condition)
+            condition.setdefault('icd_code', 'Unknown')
+            conditions.append(condition)
         
         return {
             'condition_count': len(conditions),
@@ -144,19 +155,9 @@ class HealthMdParser:
         if not self.record:
             self.parse()
         
-        timeline = self.record.get_clinical_timeline(days)
+        timeline = self.record.get_clinical_timeline(days, self.as_of)
         
-        events = []
-        for event in timeline:
-            events.append({
-                'date': event.date.isoformat() if event.date else None,
-                'title': event.title,
-                'provider_type': event.provider_type,
-                'visit_type': event.visit_type,
-                'chief_complaint': event.chief_complaint,
-                'assessment': event.assessment,
-                'plan': event.plan
-            })
+        events = [health_md.entity_to_dict(event) for event in timeline]
         
         return {
             'event_count': len(events),
@@ -164,66 +165,265 @@ class HealthMdParser:
             'events': events
         }
     
-    def anonymize_record(self) -> Dict[str, Any]:
-        """Generate an anonymized version of the record."""
+    def anonymize_record(self, anonymizer: Optional['health_md.Anonymizer'] = None) -> Dict[str, Any]:
+        """
+        De-identify the record down to the anonymizer's privacy level
+        (default: anonymous, keyed by $HEALTH_MD_PSEUDONYM_KEY).
+        """
         if not self.record:
             self.parse()
-        
-        # This would use the anonymization functions from health_md
-        # For now, return basic anonymization info
-        privacy_level = self.record.get_privacy_level()
-        
+        anonymizer = anonymizer or build_anonymizer()
         return {
-            'original_privacy_level': privacy_level,
-            'anonymization_available': privacy_level != 'anonymous',
-            'message': 'Anonymization feature coming soon in health-md v1.1'
+            'original_privacy_level': self.record.get_privacy_level(),
+            'privacy_level': anonymizer.level.value,
+            'content': anonymizer.anonymize_text(self.record.raw_content, patient_id=self.filepath.name)
         }
     
     def generate_insights(self) -> Dict[str, Any]:
-        """Generate clinical insights and observations."""
+        """Generate clinical insights by evaluating the insight rules against the record."""
         if not self.record:
             self.parse()
-        
-        insights = {
-            'medication_insights': [],
-            'lab_trends': [],
-            'care_gaps': [],
-            'risk_factors': []
-        }
-        
-        # Medication insights
-        medications = self.record.get_current_medications()
-        if medications:
-            diabetes_meds = [m for m in medications if 'diabetes' in (m.indication or '').lower()]
-            if diabetes_meds:
-                insights['medication_insights'].append(
-                    f"Patient is on {len(diabetes_meds)} diabetes medication(s)"
-                )
-        
-        # Lab trends
-        recent_labs = self.record.get_recent_labs(180)
-        a1c_labs = [l for l in recent_labs if 'a1c' in l.name.lower() or 'hemoglobin a1c' in l.name.lower()]
-        if len(a1c_labs) >= 2:
-            trends = [l.trend for l in a1c_labs if l.trend]
-            if '↓' in trends:
-                insights['lab_trends'].append("HbA1c trending downward - good glycemic control")
-        
-        # Care gaps (basic heuristics)
-        if medications and not recent_labs:
-            insights['care_gaps'].append("Patient on medications but no recent lab monitoring")
-        
-        # Risk factors from demographics and conditions
-        if self.record.demographics.get('age', '').startswith('5') or 'diabetes' in str(self.record.medical_history).lower():
-            insights['risk_factors'].append("Increased cardiovascular risk - consider lipid monitoring")
-        
-        return insights
+        if self.rules is None:
+            self.rules = load_rules(None)
+        return self.rules.evaluate(self.record, self.as_of)
     
     def to_json(self) -> str:
         """Convert the entire health record to JSON format."""
         if not self.record:
             self.parse()
         
-        return json.dumps(self.record.to_dict(), indent=2, default=str)
+        return self.record.to_json(indent=2)
+
+
+def iter_health_files(paths: List[str]) -> Iterator[Path]:
+    """Expand file and directory arguments into Health.md file paths."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(path.rglob('*.health.md'))
+        else:
+            yield path
+
+
+def scan_frontmatter(paths: List[str]) -> int:
+    """Print one JSON line with the frontmatter of each file."""
+    status = 0
+    for path in iter_health_files(paths):
+        try:
+            line = {'file': str(path), 'frontmatter': read_frontmatter(path)}
+        except Exception as e:
+            line = {'file': str(path), 'error': str(e)}
+            status = 1
+        print(json.dumps(line, default=str))
+    return status
+
+
+def change_to_json(item: Any) -> Any:
+    """JSON-ready form of an entity or ``(key, value)`` pair from a FieldChange."""
+    if isinstance(item, tuple):
+        return list(item)
+    return health_md.entity_to_dict(item)
+
+
+def export_ndjson(paths: List[str], cache_dir: Optional[str] = None) -> int:
+    """Write every entry of every file to stdout as NDJSON, one entry per line."""
+    files = [str(path) for path in iter_health_files(paths)]
+    if cache_dir is None and len(files) > 1:
+        results = HealthRecord.parse_many(files, ordered=True)
+    else:
+        results = (load_result(path, cache_dir) for path in files)
+
+    status = 0
+    for result in results:
+        if result.ok:
+            health_md.write_ndjson(result.record, sys.stdout, source=result.path)
+        else:
+            print(f"{result.path}: {result.error}", file=sys.stderr)
+            status = 1
+    sys.stdout.flush()
+    return status
+
+
+def load_rules(path: Optional[str], lab_flags: bool = False) -> 'health_md.RuleSet':
+    """
+    Insight rules from a JSON file holding a list of rule objects, or the
+    default rules; ``lab_flags`` adds the out-of-range lab rules to either.
+    """
+    if path is None:
+        rules = list(health_md.DEFAULT_RULES)
+    else:
+        with open(path, encoding='utf-8') as f:
+            rules = [health_md.Rule.from_dict(item) for item in json.load(f)]
+    if lab_flags:
+        rules.extend(health_md.LAB_RANGE_RULES)
+    return health_md.RuleSet(rules)
+
+
+def screen_files(paths: List[str], rules: 'health_md.RuleSet', as_of: Optional[datetime] = None) -> int:
+    """
+    Screen a cohort: print one JSON line per file with the insights that
+    fired for it, then a count per rule on stderr.
+    """
+    files = [str(path) for path in iter_health_files(paths)]
+    screening = rules.screen_paths(files, now=as_of)
+    for record_id, insights in zip(screening.record_ids, screening.insights):
+        if insights:
+            print(json.dumps({'file': record_id, 'insights': insights}, ensure_ascii=False))
+    for result in screening.errors:
+        print(f"{result.path}: {result.error}", file=sys.stderr)
+
+    print(f"Screened {len(screening.record_ids)} file(s):", file=sys.stderr)
+    for name, count in screening.counts().items():
+        print(f"  {name}: {count}", file=sys.stderr)
+    return 1 if screening.errors else 0
+
+
+def build_anonymizer(level: str = 'anonymous', key_file: Optional[str] = None,
+                     names_file: Optional[str] = None,
+                     locations_file: Optional[str] = None) -> 'health_md.Anonymizer':
+    """Anonymizer keyed by ``key_file`` (else $HEALTH_MD_PSEUDONYM_KEY), with optional word lists."""
+    from health_md.privacy import load_key
+
+    def read_list(path: Optional[str]) -> List[str]:
+        if path is None:
+            return []
+        with open(path, encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    key = load_key(Path(key_file).read_bytes().strip() if key_file else None)
+    return health_md.Anonymizer(key, level, names=read_list(names_file),
+                                locations=read_list(locations_file))
+
+
+def anonymize_corpus(paths: List[str], out_dir: str, anonymizer: 'health_md.Anonymizer',
+                     workers: Optional[int] = None) -> int:
+    """
+    De-identify every file into ``out_dir`` in parallel. Outputs are named
+    by pseudonymous record id; the mapping back to the sources is not
+    printed, since it would re-identify them.
+    """
+    start = time.perf_counter()
+    done = failed = 0
+    files = (str(path) for path in iter_health_files(paths))
+    for result in health_md.anonymize_paths(files, out_dir, anonymizer, workers=workers):
+        if result.ok:
+            done += 1
+        else:
+            failed += 1
+            print(f"{result.path}: {result.error}", file=sys.stderr)
+    print(f"Anonymized {done} file(s) to {anonymizer.level.value} in {out_dir} "
+          f"({time.perf_counter() - start:.1f}s, {failed} failed)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def export_fhir(paths: List[str], out_dir: str, workers: Optional[int] = None) -> int:
+    """
+    Export every file as FHIR Bulk Data NDJSON into ``out_dir``: one file per
+    resource type and a manifest.json. Files that fail to parse are listed
+    in the manifest's error output.
+    """
+    start = time.perf_counter()
+    files = (str(path) for path in iter_health_files(paths))
+    manifest = health_md.export_to_fhir(health_md.parse_many(files, workers=workers), out_dir)
+    for entry in manifest['output']:
+        print(f"  {entry['type']}: {entry['count']}", file=sys.stderr)
+    failed = sum(entry['count'] for entry in manifest['error'])
+    print(f"Exported FHIR resources to {out_dir} ({time.perf_counter() - start:.1f}s, "
+          f"{failed} file(s) failed)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def export_tables(paths: List[str], out_dir: str, file_format: str = 'parquet',
+                  workers: Optional[int] = None) -> int:
+    """
+    Flatten every file into typed columnar tables in ``out_dir``, one
+    Parquet or Arrow IPC file per table, and print the row counts.
+    """
+    start = time.perf_counter()
+    files = (str(path) for path in iter_health_files(paths))
+    export = health_md.export_to_arrow if file_format == 'arrow' else health_md.export_to_parquet
+    errors: List[health_md.ParseResult] = []
+    try:
+        rows = export(health_md.parse_many(files, workers=workers, ordered=True), out_dir, errors=errors)
+    except ImportError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    for result in errors:
+        print(f"{result.path}: {result.error}", file=sys.stderr)
+    for table, count in rows.items():
+        print(f"  {table}: {count} row(s)", file=sys.stderr)
+    print(f"Exported {rows['frontmatter']} record(s) to {out_dir} "
+          f"({time.perf_counter() - start:.1f}s, {len(errors)} failed)", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def load_result(path: str, cache_dir: Optional[str] = None) -> 'health_md.ParseResult':
+    """Parse one file (through the cache, if any) into a ParseResult."""
+    try:
+        record = HealthRecord.from_file(path, cache=cache_dir)
+        record._parse_content()
+        return health_md.ParseResult(path, record)
+    except Exception as e:
+        return health_md.ParseResult(path, error=f"{type(e).__name__}: {e}")
+
+
+def watch_files(paths: List[str], interval: float = 1.0) -> int:
+    """
+    Poll the files for changes and print one JSON line per changed field.
+
+    Each edit is applied with HealthRecord.update, so only the changed
+    blocks are re-extracted and only the entities added or removed are
+    printed. Runs until interrupted.
+    """
+    records: Dict[Path, HealthRecord] = {}
+    stamps: Dict[Path, tuple] = {}
+
+    def emit(line: Dict[str, Any]):
+        print(json.dumps(line, default=str), flush=True)
+
+    try:
+        while True:
+            seen = set()
+            for path in iter_health_files(paths):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                seen.add(path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                if stamps.get(path) == stamp:
+                    continue
+                stamps[path] = stamp
+
+                try:
+                    content = path.read_text(encoding='utf-8')
+                    if path not in records:
+                        # First sight: parse silently, only later edits are reported
+                        records[path] = HealthRecord(content)
+                        records[path]._parse_content()
+                        continue
+                    changes = records[path].update(content)
+                except Exception as e:
+                    emit({'file': str(path), 'error': str(e)})
+                    continue
+
+                for change in changes.values():
+                    emit({
+                        'file': str(path),
+                        'field': change.field,
+                        'added': [change_to_json(e) for e in change.added],
+                        'removed': [change_to_json(e) for e in change.removed],
+                    })
+
+            for path in set(records) - seen:
+                del records[path]
+                stamps.pop(path, None)
+                emit({'file': str(path), 'deleted': True})
+            for path in set(stamps) - seen:
+                del stamps[path]
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 0
 
 
 def main():
@@ -238,10 +438,20 @@ Examples:
   python parse_health.py patient.health.md --medications --labs
   python parse_health.py patient.health.md --validate --json
   python parse_health.py patient.health.md --insights --timeline
+  python parse_health.py records/ --frontmatter-only
+  python parse_health.py records/ --watch
+  python parse_health.py records/ --ndjson > entities.ndjson
+  python parse_health.py patient.health.md --profile
+  python parse_health.py records/ --screen --rules care_gaps.json
+  HEALTH_MD_PSEUDONYM_KEY=... python parse_health.py records/ --anonymize-dir export/ --workers 8
+  python parse_health.py records/ --fhir-dir bulk/
+  python parse_health.py records/ --parquet-dir tables/
         """
     )
     
-    parser.add_argument('file', help='Path to Health.md file')
+    parser.add_argument('files', nargs='+', metavar='file',
+                       help='Path to Health.md file (several files or directories '
+                            'with --frontmatter-only, --ndjson, --watch, --screen or --anonymize-dir)')
     
     # Output options
     parser.add_argument('--summary', action='store_true', 
@@ -259,21 +469,109 @@ Examples:
     parser.add_argument('--validate', action='store_true',
                        help='Validate file format')
     parser.add_argument('--anonymize', action='store_true',
-                       help='Generate anonymized version')
+                       help='Print a de-identified version of the file')
+    parser.add_argument('--anonymize-dir', metavar='DIR',
+                       help='De-identify every file into DIR in parallel')
+    parser.add_argument('--fhir-dir', metavar='DIR',
+                       help='Export every file as FHIR Bulk Data NDJSON into DIR')
+    parser.add_argument('--parquet-dir', metavar='DIR',
+                       help='Flatten every file into typed Parquet tables in DIR (needs pyarrow)')
+    parser.add_argument('--arrow-dir', metavar='DIR',
+                       help='Like --parquet-dir, but writes Arrow IPC files')
     parser.add_argument('--json', action='store_true',
                        help='Output full record as JSON')
+    parser.add_argument('--frontmatter-only', action='store_true',
+                       help='Print only the frontmatter of each file as JSON lines')
+    parser.add_argument('--ndjson', action='store_true',
+                       help='Write every entry of every file as NDJSON, one entity per line')
+    parser.add_argument('--watch', action='store_true',
+                       help='Watch the files and print changed entities as JSON lines')
+    parser.add_argument('--screen', action='store_true',
+                       help='Evaluate the insight rules over every file and print those with findings as JSON lines')
     
     # Options
     parser.add_argument('--lab-days', type=int, default=90,
                        help='Days back to include lab results (default: 90)')
     parser.add_argument('--timeline-days', type=int, default=365,
                        help='Days back to include timeline events (default: 365)')
+    parser.add_argument('--as-of', type=datetime.fromisoformat, metavar='DATE',
+                       help='Reference date for the recent-results windows, '
+                            'e.g. 2024-03-01 (default: now)')
+    parser.add_argument('--cache-dir', default=os.environ.get('HEALTH_MD_CACHE_DIR'),
+                       help='Reuse parsed records cached in this directory '
+                            '(default: $HEALTH_MD_CACHE_DIR)')
+    parser.add_argument('--max-tokens', type=int,
+                       help='Token budget for --summary; the most relevant facts are kept whole')
+    parser.add_argument('--interval', type=float, default=1.0,
+                       help='Seconds between checks in --watch mode (default: 1.0)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Print time spent in each parse stage')
+    parser.add_argument('--fail-fast', action='store_true',
+                       help='With --validate, stop at the first error')
+    parser.add_argument('--strict', action='store_true',
+                       help='With --validate, treat warnings as errors')
+    parser.add_argument('--privacy-level', choices=['anonymous', 'pseudonymized'], default='anonymous',
+                       help='Target level for --anonymize and --anonymize-dir (default: anonymous)')
+    parser.add_argument('--key-file', metavar='FILE',
+                       help='Secret key for pseudonyms and date shifts '
+                            '(default: $HEALTH_MD_PSEUDONYM_KEY)')
+    parser.add_argument('--names', metavar='FILE',
+                       help='Person names to scrub from free text, one per line')
+    parser.add_argument('--locations', metavar='FILE',
+                       help='Place names to scrub from anonymous output, one per line')
+    parser.add_argument('--workers', type=int,
+                       help='Processes for --anonymize-dir, --fhir-dir, --parquet-dir and --arrow-dir '
+                            '(default: CPU count)')
+    parser.add_argument('--rules', metavar='FILE',
+                       help='JSON file of insight rules for --insights and --screen '
+                            '(default: built-in rules)')
+    parser.add_argument('--lab-flags', action='store_true',
+                       help='Also report each latest lab value outside its reference range '
+                            'in --insights and --screen')
     
     args = parser.parse_args()
     
+    if args.frontmatter_only:
+        return scan_frontmatter(args.files)
+    
+    if args.ndjson:
+        return export_ndjson(args.files, args.cache_dir)
+    
+    if args.watch:
+        return watch_files(args.files, args.interval)
+    
+    if args.screen:
+        return screen_files(args.files, load_rules(args.rules, args.lab_flags), args.as_of)
+    
+    if args.fhir_dir:
+        return export_fhir(args.files, args.fhir_dir, args.workers)
+    
+    if args.parquet_dir:
+        return export_tables(args.files, args.parquet_dir, 'parquet', args.workers)
+    
+    if args.arrow_dir:
+        return export_tables(args.files, args.arrow_dir, 'arrow', args.workers)
+    
+    if args.anonymize or args.anonymize_dir:
+        try:
+            anonymizer = build_anonymizer(args.privacy_level, args.key_file, args.names, args.locations)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+    
+    if args.anonymize_dir:
+        return anonymize_corpus(args.files, args.anonymize_dir, anonymizer, args.workers)
+    
+    if len(args.files) > 1:
+        parser.error('multiple files are only supported with --frontmatter-only, --ndjson, --watch, '
+                     '--screen, --anonymize-dir, --fhir-dir, --parquet-dir or --arrow-dir')
+    
     try:
         # Create parser instance
-        health_parser = HealthMdParser(args.file)
+        health_parser = HealthMdParser(args.files[0], cache_dir=args.cache_dir, as_of=args.as_of,
+                                       profile=args.profile,
+                                       rules=load_rules(args.rules, args.lab_flags)
+                                       if args.rules or args.lab_flags else None)
         
         # If no specific output requested, show summary
         if not any([args.summary, args.medications, args.labs, args.conditions, 
@@ -284,11 +582,13 @@ Examples:
         
         # Validation
         if args.validate:
-            validation = health_parser.validate()
+            validation = health_parser.validate(fail_fast=args.fail_fast, strict=args.strict)
             output['validation'] = validation
             
             if not validation['valid']:
-                print("❌ Validation failed:", validation['error'])
+                print(f"❌ Validation failed: {health_parser.filepath}")
+                for error in validation.get('errors') or [validation['error']]:
+                    print(f"   {error}")
                 return 1
             else:
                 print("✅ Health.md file is valid")
@@ -296,13 +596,16 @@ Examples:
                 print(f"   Privacy Level: {validation['privacy_level']}")
                 if validation['warnings']:
                     print(f"   Warnings: {len(validation['warnings'])}")
+                    for warning in validation['warnings']:
+                        print(f"     {warning}")
         
-        # Parse the file (if not already done by validation)
-        health_parser.parse()
+        # Parse the file (already done if it was validated)
+        if not health_parser.record:
+            health_parser.parse()
         
         # Generate requested outputs
         if args.summary:
-            output['summary'] = health_parser.get_summary()
+            output['summary'] = health_parser.get_summary(args.max_tokens)
             print("📋 LLM-Optimized Summary:")
             print("=" * 50)
             print(output['summary'])
@@ -362,17 +665,21 @@ Examples:
                         print(f"    • {item}")
         
         if args.anonymize:
-            output['anonymization'] = health_parser.anonymize_record()
+            output['anonymization'] = health_parser.anonymize_record(anonymizer)
             anon = output['anonymization']
-            print(f"\n🔒 Anonymization Info:")
-            print(f"  Current Privacy Level: {anon['original_privacy_level']}")
-            print(f"  Can Anonymize: {anon['anonymization_available']}")
-            print(f"  Status: {anon['message']}")
+            print(f"\n🔒 De-identified ({anon['original_privacy_level']} → {anon['privacy_level']}):")
+            print(anon['content'], end='')
         
         if args.json:
             print(f"\n📄 Full JSON Export:")
             print(health_parser.to_json())
         
+        if args.profile:
+            stats = health_parser.record.parse_stats
+            print(f"\n⏱️  Parse Profile ({stats.path}):")
+            for line in stats.format().splitlines():
+                print(f"  {line}")
+        
         return 0
         
     except Exception as e:
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Anonymizer throughput, after checking that no identifier survives.
+
+The check runs every personnummer and SSN form through both privacy
+levels, in free text and in labelled fields, and fails if any of them is
+left in the output or if a plain number that is not a date is replaced.
+Street addresses and postal codes must not survive either.
+
+Usage:
+    python benchmarks/bench_anonymize.py
+    python benchmarks/bench_anonymize.py --records 500 --repeat 5
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_corpus import generate_record  # noqa: E402
+from health_md.privacy import Anonymizer, PrivacyLevel  # noqa: E402
+
+IDENTIFIERS = [
+    '198501011234', '8501011234', '19850101-1234', '850101-1234', '850101+1234',
+    '198501611234', '8501611234', '123-45-6789',
+]
+# Lab values, order numbers and the like that must come through untouched
+KEPT = ['1234567890', '2024011512', '5.4', '120/80', '12345678901', '12345 Units']
+ADDRESSES = ['Storgatan 12', '753 20', 'SE-75320', '12 Main Street']
+
+
+def check_identifiers():
+    for level in (PrivacyLevel.ANONYMOUS, PrivacyLevel.PSEUDONYMIZED):
+        anonymizer = Anonymizer('check', level)
+        for number in IDENTIFIERS:
+            lines = [
+                f"Patient (pnr {number}) seen today.\n",
+                f"- **Personnummer:** {number}\n",
+                f"- **Notes:** alt {number}, verified\n",
+            ]
+            for line in lines:
+                out = anonymizer.anonymize_text(line)
+                assert number not in out, (level.value, line, out)
+        for line in ("Lives at Storgatan 12, 753 20 Uppsala.\n", "Moved to 12 Main Street, SE-75320 Uppsala.\n"):
+            out = anonymizer.anonymize_text(line)
+            assert not any(address in out for address in ADDRESSES), (level.value, line, out)
+        for number in KEPT:
+            line = f"Result {number} recorded.\n"
+            out = anonymizer.anonymize_text(line)
+            assert out == line, (level.value, line, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--records', type=int, default=200, help='Generated records per run (default: 200)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per level, best is reported (default: 3)')
+    args = parser.parse_args()
+
+    check_identifiers()
+    texts = [generate_record(index) for index in range(args.records)]
+    size = sum(len(text.encode('utf-8')) for text in texts)
+
+    print(f"Anonymizing {args.records} records, {size / 1e6:.1f} MB (best of {args.repeat}):")
+    for level in (PrivacyLevel.PSEUDONYMIZED, PrivacyLevel.ANONYMOUS):
+        anonymizer = Anonymizer('bench', level)
+
+        def run():
+            for text in texts:
+                anonymizer.anonymize_text(text)
+
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"  {level.value:<14} {best * 1000:8.1f} ms  {best / args.records * 1000:6.2f} ms/record"
+              f"  {size / best / 1e6:6.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the health_md package.
+
+parse_health.py is spawned once per agent tool call, so interpreter
+startup plus ``import health_md`` is most of its latency. This runs
+``python -X importtime -c "import health_md"`` in fresh interpreters,
+reports the slowest modules, and exits non-zero when the import takes
+longer than the budget or pulls in a module that only optional code
+paths need (NumPy, PyYAML, multiprocessing, ...).
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --budget-ms 80 --repeat 10
+    python benchmarks/bench_import.py --statement "from health_md import HealthRecord, entity_to_dict"
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+
+# Loaded on first use only; importing any of these at startup is a regression
+LAZY_MODULES = (
+    'numpy',
+    'yaml',
+    'multiprocessing',
+    'concurrent.futures',
+    'markdown',
+    'bs4',
+    'health_md.batch',
+    'health_md.cache',
+    'health_md.index',
+    'health_md.validators',
+    'health_md.privacy',
+    'health_md.exporters',
+)
+
+
+def import_times(statement: str) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Self and cumulative microseconds per module imported by ``statement``."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(PARSER_DIR), os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    own: Dict[str, int] = {}
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        own[name] = int(self_us)
+        cumulative[name] = int(cumulative_us)
+    return own, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--statement', default='import health_md',
+                        help='Code to time (default: "import health_md")')
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                        help='Maximum import time, best of --repeat runs (default: 100)')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to run, best is kept (default: 5)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest modules to list (default: 10)')
+    args = parser.parse_args()
+
+    # Modules the interpreter imports at startup anyway (site, encodings, ...)
+    startup = set(import_times('pass')[0])
+    runs = []
+    for _ in range(args.repeat):
+        own, cumulative = import_times(args.statement)
+        own = {name: us for name, us in own.items() if name not in startup}
+        # Every module's self time, summed, is the whole import
+        runs.append((sum(own.values()), own, cumulative))
+    total_us, own, cumulative = min(runs, key=lambda run: run[0])
+
+    package_us = sum(us for name, us in own.items() if name.startswith('health_md'))
+    print(f"{args.statement!r}: {total_us / 1000:.1f} ms "
+          f"({package_us / 1000:.1f} ms in health_md itself, best of {args.repeat})")
+    print(f"\n{'module':<40} {'self':>9} {'cumulative':>11}")
+    for name in sorted(own, key=own.get, reverse=True)[:args.top]:
+        print(f"{name:<40} {own[name] / 1000:>7.1f}ms {cumulative[name] / 1000:>9.1f}ms")
+
+    failures = []
+    if total_us > args.budget_ms * 1000:
+        failures.append(f"import took {total_us / 1000:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    eager = [name for name in LAZY_MODULES if name in own]
+    if eager:
+        failures.append(f"imported at startup but only needed lazily: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Per-record memory footprint of parsed HealthRecords.
+
+Compares the legacy representation (plain dataclasses with a __dict__,
+dict conditions, no string interning, source text kept) with the current
+slotted, interned entities, with and without HealthRecord.compact().
+
+Usage:
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --records 5000 --file ../examples/anonymous-diabetes-patient.health.md
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from health_md.parser import HealthRecord  # noqa: E402
+
+DEFAULT_FILE = Path(__file__).resolve().parents[2] / 'examples' / 'anonymous-diabetes-patient.health.md'
+
+
+# Legacy entity shapes, as they were before slotting and interning
+
+@dataclass
+class LegacyMedication:
+    name: str
+    generic_name: Optional[str] = None
+    indication: Optional[str] = None
+    dosage: Optional[str] = None
+    route: Optional[str] = None
+    frequency: Optional[str] = None
+    started: Optional[datetime] = None
+    prescriber: Optional[str] = None
+    notes: Optional[str] = None
+    icd_codes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class LegacyLabResult:
+    name: str
+    date: datetime
+    value: str
+    reference_range: Optional[str] = None
+    units: Optional[str] = None
+    clinical_significance: Optional[str] = None
+    trend: Optional[str] = None
+
+
+@dataclass
+class LegacyVitalSign:
+    name: str
+    date: datetime
+    value: str
+    units: Optional[str] = None
+    notes: Optional[str] = None
+
+
+@dataclass
+class LegacyClinicalEvent:
+    date: datetime
+    title: str
+    provider_type: Optional[str] = None
+    visit_type: Optional[str] = None
+    chief_complaint: Optional[str] = None
+    assessment: Optional[str] = None
+    plan: Optional[str] = None
+    notes: Optional[str] = None
+
+
+def _fresh(value: Any) -> Any:
+    """Copy a string into a new object, as a separate parse would produce."""
+    if isinstance(value, str) and len(value) > 1:
+        return (value + ' ')[:-1]
+    return value
+
+
+def _legacy_copy(entity: Any, legacy_cls: type) -> Any:
+    names = legacy_cls.__dataclass_fields__
+    values = {name: _fresh(getattr(entity, name)) for name in names}
+    if 'icd_codes' in values:
+        values['icd_codes'] = [_fresh(code) for code in values['icd_codes']]
+    return legacy_cls(**values)
+
+
+def legacy_record(content: str) -> Dict[str, Any]:
+    """Everything the pre-slots parser kept alive for one record."""
+    record = HealthRecord(content)
+    record._parse_content()
+    return {
+        'raw_content': content,
+        'markdown_content': _fresh(record.markdown_content),
+        'sections': {s.path: _fresh(s.text) for s in record.sections.walk()},
+        'frontmatter': record.frontmatter,
+        'demographics': {k: _fresh(v) for k, v in record.demographics.items()},
+        'medications': [_legacy_copy(m, LegacyMedication) for m in record.medications],
+        'lab_results': [_legacy_copy(l, LegacyLabResult) for l in record.lab_results],
+        'vital_signs': [_legacy_copy(v, LegacyVitalSign) for v in record.vital_signs],
+        'clinical_timeline': [_legacy_copy(e, LegacyClinicalEvent) for e in record.clinical_timeline],
+        'medical_history': [{k: _fresh(v) for k, v in c.items()} for c in record.medical_history],
+        'allergies': record.allergies,
+    }
+
+
+def legacy_entities(content: str) -> Dict[str, Any]:
+    """The legacy entities alone, comparable to a compact() record."""
+    record = legacy_record(content)
+    for name in ('raw_content', 'markdown_content', 'sections'):
+        del record[name]
+    for condition in record['medical_history']:
+        condition['content'] = None
+    return record
+
+
+def current_record(content: str) -> HealthRecord:
+    record = HealthRecord(content)
+    record._parse_content()
+    return record
+
+
+def compact_record(content: str) -> HealthRecord:
+    return HealthRecord(content).compact()
+
+
+def measure(build: Callable[[str], Any], contents: List[str]) -> float:
+    """Bytes retained per record after building all of them."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [build(content) for content in contents]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return (after - before) / len(contents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--records', type=int, default=2000, help='Records to hold in memory (default: 2000)')
+    parser.add_argument('--file', type=Path, default=DEFAULT_FILE, help='Health.md template file')
+    args = parser.parse_args()
+
+    template = args.file.read_text(encoding='utf-8')
+    # Distinct source strings per record, as when loading a real cohort
+    contents = [template.replace('anonymous-001', f'patient-{i:06d}') for i in range(args.records)]
+
+    results = [
+        ('legacy (dataclass + dict, source kept)', measure(legacy_record, contents)),
+        ('slotted + interned, source kept', measure(current_record, contents)),
+        ('legacy, entities only', measure(legacy_entities, contents)),
+        ('slotted + interned, compact()', measure(compact_record, contents)),
+    ]
+
+    baseline = results[0][1]
+    print(f"Per-record footprint over {args.records} records of {args.file.name}:")
+    for label, per_record in results:
+        print(f"  {label:<40} {per_record / 1024:8.1f} KiB  ({per_record / baseline:6.1%})")
+
+
+if __name__ == '__main__':
+    main()
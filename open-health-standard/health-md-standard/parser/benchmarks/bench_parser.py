@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Parser benchmark suite over a synthetic Health.md corpus.
+
+Times each extraction stage of HealthRecord._parse_content, the full
+parse, to_llm_context, to_dict and the skill CLI end to end, and tracks
+peak memory while holding the parsed corpus. Results can be saved as a
+baseline and later runs compared against it; --check exits non-zero when
+any metric regressed by more than the tolerance.
+
+Usage:
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --files 500 --lab-panels 100 --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_parser.py --baseline benchmarks/baseline.json --check
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+PARSER_DIR = BENCH_DIR.parent
+CLI = PARSER_DIR.parent / 'openclaw-skill' / 'scripts' / 'parse_health.py'
+
+sys.path.insert(0, str(PARSER_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from health_md.parser import HealthRecord  # noqa: E402
+from generate_corpus import CorpusShape, add_shape_arguments, shape_from_args, write_corpus  # noqa: E402
+
+# Extraction stages, in the order _parse_content effectively runs them
+STAGES = ('frontmatter', 'sections') + HealthRecord.STRUCTURED_FIELDS
+
+
+def best_of(repeat: int, run: Callable[[], float]) -> float:
+    """Smallest of ``repeat`` measurements; ``run`` returns seconds."""
+    return min(run() for _ in range(repeat))
+
+
+def time_stages(contents: List[str]) -> Dict[str, float]:
+    """Seconds spent in each extraction stage over the whole corpus."""
+    totals = dict.fromkeys(STAGES, 0.0)
+    clock = time.perf_counter
+    for content in contents:
+        record = HealthRecord(content)
+        for stage in STAGES:
+            start = clock()
+            getattr(record, stage)
+            totals[stage] += clock() - start
+    return totals
+
+
+def time_parse(contents: List[str]) -> float:
+    start = time.perf_counter()
+    for content in contents:
+        HealthRecord(content)._parse_content()
+    return time.perf_counter() - start
+
+
+def time_method(records: List[HealthRecord], method: Callable[[HealthRecord], object],
+                reset: tuple = ()) -> float:
+    """Seconds to call ``method`` on every record, after dropping cached ``reset`` attributes."""
+    for record in records:
+        for name in reset:
+            record.__dict__.pop(name, None)
+    start = time.perf_counter()
+    for record in records:
+        method(record)
+    return time.perf_counter() - start
+
+
+def time_cli(paths: List[Path]) -> Optional[float]:
+    """Mean wall-clock seconds of ``parse_health.py --json`` per file, or None if it fails."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(PARSER_DIR), os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    for path in paths:
+        result = subprocess.run([sys.executable, str(CLI), str(path), '--json'],
+                                capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            message = (result.stderr or result.stdout).strip().splitlines()
+            print(f"  CLI run failed, skipping: {message[-1] if message else result.returncode}")
+            return None
+    return (time.perf_counter() - start) / len(paths)
+
+
+def measure_memory(contents: List[str]) -> Dict[str, float]:
+    """Peak and retained bytes per record while parsing and holding the corpus."""
+    gc.collect()
+    tracemalloc.start()
+    records = []
+    for content in contents:
+        record = HealthRecord(content)
+        record._parse_content()
+        records.append(record)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return {'retained_bytes_per_record': retained / len(contents), 'peak_bytes': float(peak)}
+
+
+def run(paths: List[Path], repeat: int, cli_files: int) -> Dict[str, Optional[float]]:
+    contents = [path.read_text(encoding='utf-8') for path in paths]
+    count = len(contents)
+    metrics: Dict[str, Optional[float]] = {}
+
+    stage_runs = [time_stages(contents) for _ in range(repeat)]
+    for stage in STAGES:
+        metrics[f'stage.{stage}'] = min(run[stage] for run in stage_runs) / count
+
+    metrics['parse_content'] = best_of(repeat, lambda: time_parse(contents)) / count
+
+    records = [HealthRecord(content) for content in contents]
+    for record in records:
+        record._parse_content()
+    now = records[0].lab_index.last_date
+    metrics['to_llm_context'] = best_of(repeat, lambda: time_method(
+        records, lambda r: r.to_llm_context(now=now), reset=('context_builder', 'lab_series'))) / count
+    metrics['to_llm_context.warm'] = best_of(repeat, lambda: time_method(
+        records, lambda r: r.to_llm_context(now=now, max_tokens=500))) / count
+    metrics['to_dict'] = best_of(repeat, lambda: time_method(records, HealthRecord.to_dict)) / count
+    del records
+
+    metrics.update(measure_memory(contents))
+    metrics['cli'] = time_cli(paths[:cli_files]) if cli_files else None
+    return metrics
+
+
+def compare(metrics: Dict[str, Optional[float]], baseline: Dict[str, Optional[float]],
+            tolerance: float) -> List[str]:
+    """Print current vs baseline per metric; returns the metrics that regressed."""
+    regressions = []
+    print(f"\n{'metric':<28} {'current':>12} {'baseline':>12} {'change':>9}")
+    for name, value in metrics.items():
+        before = baseline.get(name)
+        if value is None or not before:
+            print(f"{name:<28} {_format(name, value):>12} {_format(name, before):>12} {'':>9}")
+            continue
+        change = value / before - 1
+        marker = ''
+        if change > tolerance:
+            regressions.append(name)
+            marker = '  REGRESSION'
+        print(f"{name:<28} {_format(name, value):>12} {_format(name, before):>12} {change:>+8.1%}{marker}")
+    return regressions
+
+
+def _format(name: str, value: Optional[float]) -> str:
+    if value is None:
+        return '-'
+    if 'bytes' in name:
+        return f"{value / 1024:.1f} KiB"
+    return f"{value * 1e6:.1f} µs" if value < 0.01 else f"{value * 1e3:.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--files', type=int, default=200, help='Synthetic files to generate (default: 200)')
+    parser.add_argument('--corpus', type=Path, help='Benchmark an existing directory of *.health.md files instead')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus random seed (default: 0)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per timing, best is kept (default: 3)')
+    parser.add_argument('--cli-files', type=int, default=5, help='Files to run through the CLI, 0 to skip (default: 5)')
+    parser.add_argument('--baseline', type=Path, help='Compare against this baseline JSON')
+    parser.add_argument('--save-baseline', type=Path, help='Write the results as a baseline JSON')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Relative slowdown counted as a regression (default: 0.15)')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 on any regression')
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+
+    shape = shape_from_args(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            paths = sorted(args.corpus.rglob('*.health.md'))
+            description = {'corpus': str(args.corpus)}
+        else:
+            paths = write_corpus(Path(tmp), args.files, shape, args.seed)
+            description = {'files': args.files, 'seed': args.seed, 'shape': vars(shape)}
+        if not paths:
+            parser.error('no *.health.md files to benchmark')
+
+        print(f"Benchmarking {len(paths)} files (best of {args.repeat}, times per file)...")
+        metrics = run(paths, args.repeat, args.cli_files)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else {}
+    if baseline.get('corpus') not in (None, description):
+        print("Note: the baseline was recorded on a different corpus")
+    regressions = compare(metrics, baseline.get('metrics', {}), args.tolerance)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps({
+            'corpus': description,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'metrics': metrics,
+        }, indent=2) + '\n')
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic Health.md corpus for benchmarking.
+
+Files follow SPEC.md and the layout of
+examples/anonymous-diabetes-patient.health.md: frontmatter, demographics,
+medications, medical history, dated lab panels and trend tables, vital
+sign trends, allergies and a clinical timeline, plus the free-text
+sections the extractors have to skip. Output is deterministic for a
+given seed. No real patient data is involved.
+
+Usage:
+    python benchmarks/generate_corpus.py --out /tmp/corpus --files 1000
+    python benchmarks/generate_corpus.py --out /tmp/big --files 10 --lab-panels 500 --timeline 200
+"""
+
+import argparse
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Tuple
+
+
+@dataclass
+class CorpusShape:
+    """How much of each entry type a generated file holds."""
+    medications: int = 4
+    conditions: int = 3
+    lab_panels: int = 6       # dated panels, each with every analyte of its kind
+    trend_rows: int = 8       # date-labelled rows per trend table
+    vital_rows: int = 8
+    timeline: int = 6
+    notes: int = 3            # free-text sections the extractors skip
+
+
+_MEDICATIONS = [
+    ('Metformin', 'Metformin Hydrochloride', 'Type 2 Diabetes Mellitus', 'E11.9', (500, 850, 1000)),
+    ('Lisinopril', 'Lisinopril', 'Hypertension', 'I10', (5, 10, 20)),
+    ('Atorvastatin', 'Atorvastatin Calcium', 'Hyperlipidemia', 'E78.5', (10, 20, 40)),
+    ('Levothyroxine', 'Levothyroxine Sodium', 'Hypothyroidism', 'E03.9', (50, 75, 100)),
+    ('Sertraline', 'Sertraline Hydrochloride', 'Major Depressive Disorder', 'F32.9', (50, 100)),
+    ('Amlodipine', 'Amlodipine Besylate', 'Hypertension', 'I10', (5, 10)),
+    ('Omeprazole', 'Omeprazole', 'Gastroesophageal Reflux Disease', 'K21.9', (20, 40)),
+    ('Salbutamol', 'Albuterol Sulfate', 'Asthma', 'J45.909', (100,)),
+]
+
+_CONDITIONS = [
+    ('Type 2 Diabetes Mellitus', 'E11.9', 'Type 2 diabetes mellitus without complications'),
+    ('Hypertension', 'I10', 'Essential hypertension'),
+    ('Hyperlipidemia', 'E78.5', 'Hyperlipidemia, unspecified'),
+    ('Hypothyroidism', 'E03.9', 'Hypothyroidism, unspecified'),
+    ('Asthma', 'J45.909', 'Unspecified asthma, uncomplicated'),
+    ('Major Depressive Disorder', 'F32.9', 'Major depressive disorder, single episode'),
+]
+
+# Panel name -> analytes (name, units, low, high, typical value)
+_PANELS = {
+    'Basic Metabolic Panel': [
+        ('Glucose (fasting)', 'mg/dL', 70, 100, 105),
+        ('Creatinine', 'mg/dL', 0.6, 1.2, 0.9),
+        ('Sodium', 'mEq/L', 136, 145, 140),
+        ('Potassium', 'mEq/L', 3.5, 5.0, 4.2),
+        ('Chloride', 'mEq/L', 98, 107, 102),
+        ('BUN', 'mg/dL', 7, 20, 14),
+    ],
+    'Lipid Panel': [
+        ('Total Cholesterol', 'mg/dL', None, 200, 195),
+        ('LDL Cholesterol', 'mg/dL', None, 100, 115),
+        ('HDL Cholesterol', 'mg/dL', 40, None, 48),
+        ('Triglycerides', 'mg/dL', None, 150, 140),
+    ],
+    'Thyroid Function': [
+        ('TSH', 'mIU/L', 0.4, 4.0, 2.5),
+    ],
+}
+
+_TRENDS = [
+    ('Hemoglobin A1C Trend', '%', '<5.7% (normal), 5.7-6.4% (prediabetes), >6.5% (diabetes)', 7.2),
+    ('Fasting Glucose Trend', 'mg/dL', '70-100', 120),
+]
+
+_PROVIDERS = ['Family Medicine', 'Endocrinologist', 'Cardiologist', 'Nurse Practitioner', 'Internal Medicine']
+_VISIT_TYPES = ['Follow-up appointment', 'Annual preventive care', 'Telehealth visit', 'Urgent care visit']
+_REGIONS = ['Northern Europe', 'Western Europe', 'North America', 'East Asia', 'Oceania']
+_OCCUPATIONS = ['Technology', 'Education', 'Healthcare', 'Retail', 'Construction', 'Retired']
+_ALLERGIES = [
+    ('Penicillin', 'Documented severe reaction (anaphylaxis)'),
+    ('Sulfonamides', 'Rash and itching'),
+    ('Aspirin', 'Bronchospasm'),
+    ('Codeine', 'Nausea and vomiting'),
+]
+
+
+def _bound_text(low, high) -> str:
+    if low is not None and high is not None:
+        return f"{low}-{high}"
+    if high is not None:
+        return f"<{high}"
+    return f">{low}"
+
+
+def _dates(rng: random.Random, count: int, end: date, spacing_days: Tuple[int, int]) -> List[date]:
+    """``count`` dates going back from ``end``, newest first."""
+    dates = []
+    current = end
+    for _ in range(count):
+        dates.append(current)
+        current -= timedelta(days=rng.randint(*spacing_days))
+    return dates
+
+
+def generate_record(index: int, shape: CorpusShape = CorpusShape(), seed: int = 0,
+                    end: date = date(2024, 2, 15)) -> str:
+    """Text of one synthetic Health.md file."""
+    rng = random.Random(seed * 1_000_003 + index)
+    lines: List[str] = []
+    add = lines.append
+
+    add('---')
+    add('health_md_version: "1.0"')
+    add(f'record_id: "synthetic-{index:06d}"')
+    add(f'generated: "{end.isoformat()}T10:00:00Z"')
+    add('privacy_level: "anonymous"')
+    add(f'last_updated: "{end.isoformat()}T10:00:00Z"')
+    add('data_sources: ["ehr_export", "synthetic"]')
+    add('---')
+    add('')
+    add(f'# Health Record - Synthetic Patient {index:06d}')
+    add('')
+
+    decade = rng.randint(2, 8) * 10
+    add('## Demographics')
+    add(f'- **Age Range:** {decade}-{decade + 9}')
+    add(f"- **Sex:** {rng.choice(['Female', 'Male'])}")
+    add(f'- **Occupation Category:** {rng.choice(_OCCUPATIONS)}')
+    add(f'- **Location Region:** {rng.choice(_REGIONS)}')
+    add('')
+
+    add('## Current Medications')
+    add('')
+    for i in range(shape.medications):
+        name, generic, indication, icd, doses = _MEDICATIONS[i % len(_MEDICATIONS)]
+        dose = rng.choice(doses)
+        started = end - timedelta(days=rng.randint(30, 2000))
+        suffix = f' ({i // len(_MEDICATIONS) + 1})' if i >= len(_MEDICATIONS) else ''
+        add(f'### {name} {dose}mg{suffix}')
+        add(f'- **Generic Name:** {generic}')
+        add(f'- **Indication:** {indication} (ICD-10: {icd})')
+        add(f"- **Dosage:** {dose}mg {rng.choice(['once daily', 'twice daily', 'with meals'])}")
+        add('- **Route:** Oral')
+        add(f"- **Started:** {started.strftime('%B %Y')}")
+        add(f'- **Prescriber:** {rng.choice(_PROVIDERS)}')
+        add('- **Clinical Notes:** Well tolerated')
+        add('')
+
+    add('## Medical History')
+    add('')
+    for i in range(shape.conditions):
+        condition, icd, description = _CONDITIONS[i % len(_CONDITIONS)]
+        onset = end - timedelta(days=rng.randint(60, 4000))
+        add(f"### {condition} ({onset.strftime('%B %Y')})")
+        add(f'- **ICD-10:** {icd} - {description}')
+        add(f"- **Onset:** {onset.strftime('%B %Y')}")
+        add('- **Current Status:** Stable on treatment')
+        add('')
+
+    add('## Lab Results')
+    add('')
+    for name, units, reference, typical in _TRENDS:
+        add(f'### {name}')
+        for day in _dates(rng, shape.trend_rows, end, (20, 120)):
+            value = round(typical * rng.uniform(0.85, 1.2), 1)
+            add(f'- **{day.isoformat()}:** {value}{units if units == "%" else " " + units}')
+        add(f'- **Reference Range:** {reference}')
+        add('- **Clinical Significance:** Monitored for treatment response')
+        add('')
+
+    panel_names = list(_PANELS)
+    for i, day in enumerate(_dates(rng, shape.lab_panels, end, (7, 60))):
+        panel = panel_names[i % len(panel_names)]
+        add(f'### {panel} ({day.isoformat()})')
+        for analyte, units, low, high, typical in _PANELS[panel]:
+            value = round(typical * rng.uniform(0.8, 1.25), 1)
+            add(f'- **{analyte}:** {value} {units} (Ref: {_bound_text(low, high)})')
+        add('')
+
+    add('## Vital Signs')
+    add('')
+    add('### Blood Pressure Trend')
+    for day in _dates(rng, shape.vital_rows, end, (14, 90)):
+        add(f'- **{day.isoformat()}:** {rng.randint(112, 160)}/{rng.randint(70, 98)} mmHg')
+    add('- **Target:** <130/80 mmHg')
+    add('')
+
+    add('## Allergies & Intolerances')
+    add('')
+    add('### Drug Allergies')
+    for substance, reaction in rng.sample(_ALLERGIES, rng.randint(0, 2)):
+        add(f'- **{substance}:** {reaction}')
+    add('')
+    add('### Food Sensitivities')
+    add('- **Lactose Intolerance:** Mild')
+    add('')
+
+    add('## Clinical Timeline')
+    add('')
+    for day in _dates(rng, shape.timeline, end, (20, 200)):
+        add(f'### {day.isoformat()}: {rng.choice(["Follow-up Visit", "Annual Check-up", "Medication Review"])}')
+        add(f'- **Provider Type:** {rng.choice(_PROVIDERS)}')
+        add(f'- **Visit Type:** {rng.choice(_VISIT_TYPES)}')
+        add('- **Chief Complaint:** Routine management')
+        add('- **Assessment:**')
+        add('  - Conditions stable')
+        add('  - Continue current regimen')
+        add('- **Plan:**')
+        add('  - Recheck labs in 3 months')
+        add('  - Lifestyle counseling')
+        add('')
+
+    add('## Notes and Observations')
+    add('')
+    for i in range(shape.notes):
+        add(f'### Note {i + 1}')
+        add('- **Observation:** Patient engaged and adherent to the care plan')
+        add('```')
+        add('## Not a section: fenced text is skipped by the tokenizer')
+        add('```')
+        add('')
+
+    return '\n'.join(lines)
+
+
+def write_corpus(out: Path, files: int, shape: CorpusShape = CorpusShape(), seed: int = 0) -> List[Path]:
+    """Write ``files`` synthetic records to ``out``; returns their paths."""
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(files):
+        path = out / f'synthetic-{index:06d}.health.md'
+        path.write_text(generate_record(index, shape, seed), encoding='utf-8')
+        paths.append(path)
+    return paths
+
+
+def add_shape_arguments(parser: argparse.ArgumentParser):
+    """Command-line options for every CorpusShape field."""
+    defaults = CorpusShape()
+    for name in CorpusShape.__dataclass_fields__:
+        parser.add_argument('--' + name.replace('_', '-'), type=int, default=getattr(defaults, name),
+                            help=f'{name.replace("_", " ").capitalize()} per file (default: {getattr(defaults, name)})')
+
+
+def shape_from_args(args: argparse.Namespace) -> CorpusShape:
+    return CorpusShape(**{name: getattr(args, name) for name in CorpusShape.__dataclass_fields__})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--out', type=Path, required=True, help='Output directory')
+    parser.add_argument('--files', type=int, default=100, help='Number of files (default: 100)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+
+    paths = write_corpus(args.out, args.files, shape_from_args(args), args.seed)
+    total = sum(path.stat().st_size for path in paths)
+    print(f"Wrote {len(paths)} files ({total / 1024 / 1024:.1f} MiB) to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
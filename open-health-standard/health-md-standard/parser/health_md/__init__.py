@@ -13,15 +13,138 @@ Example usage:
     # Extract key information
     medications = record.get_current_medications()
     recent_labs = record.get_recent_labs(days=30)
+
+    # Window queries against a fixed reference time
+    q1_labs = record.lab_index.between(datetime(2024, 1, 1), datetime(2024, 3, 31))
+    last_visits = record.timeline_index.latest(3, now=as_of)
     
     # Generate LLM-optimized context
     context = record.to_llm_context()
+
+    # Pack the most relevant facts into a token budget
+    context = record.to_llm_context(max_tokens=500)
+
+    # Read only the frontmatter, e.g. to route files by privacy level
+    meta = read_frontmatter('patient.health.md')
+
+    # Stream entries from a very large file with bounded memory
+    with open('patient.health.md', encoding='utf-8') as f:
+        for kind, entity in iter_entries(f):
+            ...
+
+    # Apply an edit, re-extracting only the changed blocks
+    changes = record.update(new_content)
+
+    # Export one entity per line for downstream loaders
+    with open('entities.ndjson', 'w', encoding='utf-8') as out:
+        write_ndjson(record, out, source='patient.health.md')
+
+    # Export a corpus as FHIR Bulk Data NDJSON, one file per resource type
+    manifest = export_to_fhir(parse_many(paths, workers=8), 'bulk/')
+
+    # Flatten a corpus into typed Parquet tables for analytics
+    rows = export_to_parquet(parse_many(paths, workers=8), 'tables/')
+
+    # Validate while parsing, with line/column positions for each issue
+    report = record.validate(fail_fast=True)
+    for issue in report.errors:
+        print(issue)
+
+    # De-identify a corpus for research export, in parallel
+    anonymizer = Anonymizer(key, PrivacyLevel.PSEUDONYMIZED, names=names)
+    for result in anonymize_paths(paths, 'export/', anonymizer, workers=8):
+        ...
+
+    # Time each parse stage, and feed every parse to a metrics exporter
+    record = HealthRecord.from_file('patient.health.md', profile=True)
+    record.to_dict()
+    print(record.parse_stats.format())
+    add_stats_hook(lambda stats, stage, seconds, size: histogram(stage).observe(seconds))
+
+    # Parse a whole corpus in parallel
+    for result in parse_many(paths, workers=8):
+        ...
+
+    # Index a corpus once, then answer cohort questions without parsing
+    index = CorpusIndex.from_paths(paths)
+    index.save('corpus.hmdi')
+    cohort = index.all_of(index.lookup('medication', 'metformin'),
+                          index.lookup('icd', 'E11'))
+
+    # Evaluate declarative insight rules, or screen a cohort for care gaps
+    insights = RuleSet(DEFAULT_RULES).evaluate(record)
+    screening = RuleSet(DEFAULT_RULES).screen_paths(paths)
+    screening.matching('medications_without_monitoring')
 """
 
+import importlib
+from typing import TYPE_CHECKING
+
 from .parser import HealthRecord
-from .validators import validate_health_md, HealthMdValidationError
-from .privacy import anonymize_record, PrivacyLevel
-from .exporters import export_to_fhir, export_to_json
+from .frontmatter import read_frontmatter
+from .sections import SectionTree
+from .dateindex import DateIndex
+from .dates import DateParser
+from .stats import ParseStats, add_stats_hook, remove_stats_hook
+
+# Everything else is imported on first attribute access, so a script that
+# only parses one file does not pay for multiprocessing, validation or the
+# exporters at startup
+_LAZY_ATTRIBUTES = {
+    'parse_many': 'batch',
+    'ParseResult': 'batch',
+    'iter_entries': 'stream',
+    'RecordCache': 'cache',
+    'FieldChange': 'incremental',
+    'ContextSection': 'context',
+    'DEFAULT_CONTEXT_SECTIONS': 'context',
+    'entity_to_dict': 'serialize',
+    'write_json': 'serialize',
+    'write_ndjson': 'serialize',
+    'CorpusIndex': 'index',
+    'Rule': 'insights',
+    'RuleSet': 'insights',
+    'DEFAULT_RULES': 'insights',
+    'LAB_RANGE_RULES': 'insights',
+    'validate_health_md': 'validators',
+    'HealthMdValidationError': 'validators',
+    'ValidationReport': 'validators',
+    'anonymize_record': 'privacy',
+    'PrivacyLevel': 'privacy',
+    'Anonymizer': 'privacy',
+    'anonymize_paths': 'privacy',
+    'export_to_fhir': 'exporters',
+    'export_to_json': 'exporters',
+    'export_to_parquet': 'exporters',
+    'export_to_arrow': 'exporters',
+}
+
+if TYPE_CHECKING:
+    from .batch import parse_many, ParseResult
+    from .stream import iter_entries
+    from .cache import RecordCache
+    from .incremental import FieldChange
+    from .context import ContextSection, DEFAULT_CONTEXT_SECTIONS
+    from .serialize import entity_to_dict, write_json, write_ndjson
+    from .index import CorpusIndex
+    from .insights import Rule, RuleSet, DEFAULT_RULES, LAB_RANGE_RULES
+    from .validators import validate_health_md, HealthMdValidationError, ValidationReport
+    from .privacy import anonymize_record, PrivacyLevel, Anonymizer, anonymize_paths
+    from .exporters import export_to_fhir, export_to_json, export_to_parquet, export_to_arrow
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 __version__ = "1.0.0"
 __author__ = "Birger Moëll"
@@ -29,10 +152,37 @@ __email__ = "birger.moell@uu.se"
 
 __all__ = [
     'HealthRecord',
+    'SectionTree',
+    'DateIndex',
+    'DateParser',
+    'ParseStats',
+    'add_stats_hook',
+    'remove_stats_hook',
+    'read_frontmatter',
+    'parse_many',
+    'ParseResult',
+    'iter_entries',
+    'RecordCache',
+    'FieldChange',
+    'ContextSection',
+    'DEFAULT_CONTEXT_SECTIONS',
+    'entity_to_dict',
+    'write_json',
+    'write_ndjson',
+    'CorpusIndex',
+    'Rule',
+    'RuleSet',
+    'DEFAULT_RULES',
+    'LAB_RANGE_RULES',
     'validate_health_md',
     'HealthMdValidationError',
+    'ValidationReport',
     'anonymize_record',
     'PrivacyLevel',
+    'Anonymizer',
+    'anonymize_paths',
     'export_to_fhir',
-    'export_to_json'
+    'export_to_json',
+    'export_to_parquet',
+    'export_to_arrow'
 ]
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Health.md Batch - Parallel parsing of Health.md corpora
+"""
+
+import os
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from .parser import HealthRecord
+
+
+@dataclass
+class ParseResult:
+    """Outcome of parsing one file: a record (or dict payload) or an error."""
+    path: str
+    record: Optional[Union[HealthRecord, Dict[str, Any]]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the file parsed without error."""
+        return self.error is None
+
+
+def _parse_file(path: str, as_dict: bool) -> ParseResult:
+    """Fully parse one file, capturing any failure in the result."""
+    try:
+        record = HealthRecord.from_file(path)
+        record._parse_content()
+        return ParseResult(path, record.to_dict() if as_dict else record)
+    except Exception as e:
+        return ParseResult(path, error=f"{type(e).__name__}: {e}")
+
+
+def _parse_chunk(paths: List[str], as_dict: bool) -> List[ParseResult]:
+    """Worker entry point; chunking amortizes inter-process overhead."""
+    return [_parse_file(path, as_dict) for path in paths]
+
+
+def _chunks(paths: Iterable[Union[str, Path]], size: int) -> Iterator[List[str]]:
+    iterator = iter(paths)
+    while True:
+        chunk = [str(path) for path in islice(iterator, size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_many(
+    paths: Iterable[Union[str, Path]],
+    workers: Optional[int] = None,
+    ordered: bool = False,
+    as_dict: bool = False,
+    chunksize: int = 16,
+    errors: Optional[List[ParseResult]] = None
+) -> Iterator[ParseResult]:
+    """
+    Parse many Health.md files in a process pool.
+
+    Args:
+        paths: Files to parse; consumed lazily, so a generator over a large
+            directory tree is fine
+        workers: Number of worker processes (default: CPU count); ``1``
+            parses in the calling process without a pool
+        ordered: Yield results in input order instead of completion order
+        as_dict: Yield compact ``to_dict()`` payloads instead of records,
+            which are cheaper to send back from the workers
+        chunksize: Number of files handed to a worker per task
+        errors: If given, failed results are appended to this list instead
+            of being yielded
+
+    Yields:
+        ParseResult for each file. A file that fails to parse never aborts
+        the run; its result carries the error message instead.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(paths, max(1, chunksize))
+
+    def emit(results: List[ParseResult]) -> Iterator[ParseResult]:
+        for result in results:
+            if errors is not None and not result.ok:
+                errors.append(result)
+            else:
+                yield result
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from emit(_parse_chunk(chunk, as_dict))
+        return
+
+    # Imported here: multiprocessing is slow to import and single-file
+    # callers never need it
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    # Keep a bounded number of tasks in flight so memory stays flat no
+    # matter how many paths are queued.
+    max_pending = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_parse_chunk, chunk, as_dict))
+            if len(pending) < max_pending:
+                continue
+
+            if ordered:
+                yield from emit(pending.popleft().result())
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from emit(future.result())
+
+        if ordered:
+            while pending:
+                yield from emit(pending.popleft().result())
+        else:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from emit(future.result())
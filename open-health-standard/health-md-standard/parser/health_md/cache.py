@@ -0,0 +1,164 @@
+"""
+Health.md Cache - Persistent on-disk cache of parsed HealthRecords
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Optional, Type, Union
+
+from .parser import PARSER_VERSION, HealthRecord
+
+
+_SUFFIX = '.hmdc'
+
+
+class RecordCache:
+    """
+    Directory of parsed records, so unchanged files are never reparsed.
+
+    Entries are keyed by the parser version and the file's resolved path,
+    size and modification time, which lets a warm lookup skip reading the
+    source file entirely; the entry also stores the SHA-256 of the content
+    it was parsed from, checked when ``verify=True``. Entries are written
+    atomically (temp file + rename), so concurrent writers never expose a
+    partial entry, and the least recently used entries are evicted once the
+    directory grows past ``max_bytes``.
+
+    Entries are pickles: only point this at a directory you trust.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 256 * 1024 * 1024,
+                 verify: bool = False):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, filepath: Union[str, Path], stat: Optional[os.stat_result] = None) -> Path:
+        if stat is None:
+            stat = os.stat(filepath)
+        key = f"{PARSER_VERSION}\0{os.path.realpath(filepath)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+        return self.directory / (hashlib.sha256(key.encode('utf-8')).hexdigest() + _SUFFIX)
+
+    def get(self, filepath: Union[str, Path], cls: Type[HealthRecord] = HealthRecord,
+            stat: Optional[os.stat_result] = None) -> Optional[HealthRecord]:
+        """Return the cached record for ``filepath``, or None on a miss."""
+        entry = self._entry_path(filepath, stat)
+        try:
+            with open(entry, 'rb') as f:
+                version, content_hash, record = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or written by an incompatible version
+            self._discard(entry)
+            return None
+
+        if version != PARSER_VERSION or not isinstance(record, cls):
+            return None
+        if self.verify and _content_hash(_read(filepath)) != content_hash:
+            return None
+
+        # Refresh recency for LRU eviction
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return record
+
+    def put(self, filepath: Union[str, Path], record: HealthRecord,
+            stat: Optional[os.stat_result] = None):
+        """
+        Store a fully parsed record for ``filepath``.
+
+        Pass the ``os.stat`` taken before the record's content was read:
+        statting afterwards could file an old parse under the key of a
+        newer version of the file written in between.
+        """
+        record._parse_content()
+        payload = (PARSER_VERSION, _content_hash(record.raw_content), record)
+        data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+        entry = self._entry_path(filepath, stat)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, entry)
+        except BaseException:
+            self._discard(Path(tmp_path))
+            raise
+
+        self._evict()
+
+    def load(self, filepath: Union[str, Path],
+             cls: Type[HealthRecord] = HealthRecord, profile: bool = False) -> HealthRecord:
+        """
+        Return the cached record for ``filepath``, parsing and storing it on
+        a miss. With ``profile``, a miss records the file read and every
+        parse stage in the new record's ``parse_stats``; records from the
+        cache come back without stats.
+        """
+        # One stat for both the lookup and the store, taken before reading
+        stat = os.stat(filepath)
+        record = self.get(filepath, cls, stat)
+        if record is None:
+            start = time.perf_counter()
+            content = _read(filepath)
+            record = cls(content, profile=profile)
+            if record.parse_stats is not None:
+                record.parse_stats.path = str(filepath)
+                record.parse_stats.add('read', time.perf_counter() - start, len(content))
+            self.put(filepath, record, stat)
+        return record
+
+    def clear(self):
+        """Remove every cache entry."""
+        for entry in self.directory.glob('*' + _SUFFIX):
+            self._discard(entry)
+
+    def _evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if not item.name.endswith(_SUFFIX):
+                    continue
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, item.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        # Oldest first, down to 90% of the budget so we don't evict on every put
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            self._discard(Path(path))
+            total -= size
+
+    @staticmethod
+    def _discard(path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _read(filepath: Union[str, Path]) -> str:
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
@@ -0,0 +1,242 @@
+"""
+Health.md Context - Budgeted, priority-packed LLM context for a HealthRecord
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .values import fitted_trend, parse_reference_range, parse_value
+
+if TYPE_CHECKING:
+    from .parser import HealthRecord
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token for English text."""
+    return max(1, (len(text) + 3) // 4)
+
+
+@dataclass(frozen=True)
+class ContextSection:
+    """
+    One section of the LLM context and how it competes for the budget.
+
+    Sections with a higher ``priority`` are packed first; within the same
+    priority, items compete on ``weight`` times their relevance. Dated
+    items only count within ``window_days`` of the reference time, and with
+    ``half_life_days`` their relevance halves every that many days of age.
+    Out-of-range lab values count double.
+    """
+    name: str
+    label: str
+    priority: int
+    weight: float = 1.0
+    window_days: Optional[int] = None
+    half_life_days: Optional[float] = None
+    separator: str = '; '
+
+
+# In display order; allergies are never dropped before anything else
+DEFAULT_CONTEXT_SECTIONS: Tuple[ContextSection, ...] = (
+    ContextSection('demographics', 'PATIENT', priority=3, separator=', '),
+    ContextSection('conditions', 'CONDITIONS', priority=4),
+    ContextSection('medications', 'MEDICATIONS', priority=4),
+    ContextSection('labs', 'RECENT LABS', priority=2, weight=1.0, window_days=90, half_life_days=30),
+    ContextSection('allergies', 'ALLERGIES', priority=5),
+    ContextSection('visits', 'RECENT VISITS', priority=2, weight=0.8, window_days=90, half_life_days=45),
+)
+
+_SECTION_SEPARATOR = '\n\n'
+
+# Sections whose rendering depends on the window, not just on the record
+_WINDOWED_SECTIONS = frozenset({'labs'})
+
+Window = Optional[Tuple[datetime, datetime]]
+
+
+class _Item:
+    """A rendered fact with its date, relevance boost and cached token cost."""
+    __slots__ = ('text', 'date', 'boost', 'tokens')
+
+    def __init__(self, text: str, date: Optional[datetime] = None, boost: float = 1.0):
+        self.text = text
+        self.date = date
+        self.boost = boost
+        self.tokens: Optional[int] = None
+
+
+class ContextBuilder:
+    """
+    Packs a record's facts into an LLM context under a token budget.
+
+    Each fact (a condition, a medication, one lab result, ...) is rendered
+    and measured once, then packed whole, greedily by section priority and
+    relevance, so entries are never cut mid-way. Rendered items and their
+    token estimates are cached, which makes repeated builds for different
+    budgets, windows or section configs cheap. Pass ``tokenizer`` to count
+    with a real tokenizer instead of the four-characters heuristic.
+    """
+
+    def __init__(self, record: 'HealthRecord', tokenizer: Callable[[str], int] = estimate_tokens):
+        self.record = record
+        self.tokenizer = tokenizer
+        # Per section, the window it was rendered for and its items
+        self._items: Dict[str, Tuple[Window, List[_Item]]] = {}
+        self._label_tokens: Dict[str, int] = {}
+
+    def build(self, max_tokens: Optional[int] = None, max_chars: Optional[int] = None,
+              now: Optional[datetime] = None,
+              sections: Sequence[ContextSection] = DEFAULT_CONTEXT_SECTIONS) -> str:
+        """
+        Build the context within ``max_tokens`` and ``max_chars``; either
+        may be None for no limit. ``now`` is the reference time for dated
+        sections (default: current time).
+        """
+        now = now or datetime.now()
+
+        candidates = []
+        for index, section in enumerate(sections):
+            for order, item in enumerate(self._section_items(section, now)):
+                relevance = self._relevance(section, item, now)
+                if relevance is not None:
+                    candidates.append((-section.priority, -section.weight * relevance, index, order, item))
+        candidates.sort(key=lambda c: c[:4])
+
+        chosen: Dict[int, List[Tuple[int, _Item]]] = {}
+        tokens = chars = 0
+        for _, _, index, order, item in candidates:
+            section = sections[index]
+            item_tokens = self._tokens(item)
+            if index in chosen:
+                # Separators count as about one token
+                cost_tokens = item_tokens + 1
+                cost_chars = len(item.text) + len(section.separator)
+            else:
+                opening = len(section.label) + 2 + (len(_SECTION_SEPARATOR) if chosen else 0)
+                cost_tokens = item_tokens + self._label_cost(section.label) + (1 if chosen else 0)
+                cost_chars = len(item.text) + opening
+
+            if max_tokens is not None and tokens + cost_tokens > max_tokens:
+                continue
+            if max_chars is not None and chars + cost_chars > max_chars:
+                continue
+            chosen.setdefault(index, []).append((order, item))
+            tokens += cost_tokens
+            chars += cost_chars
+
+        parts = []
+        for index, section in enumerate(sections):
+            if index in chosen:
+                items = [item.text for _, item in sorted(chosen[index], key=lambda c: c[0])]
+                parts.append(f"{section.label}: {section.separator.join(items)}")
+        return _SECTION_SEPARATOR.join(parts)
+
+    def _tokens(self, item: _Item) -> int:
+        if item.tokens is None:
+            item.tokens = self.tokenizer(item.text)
+        return item.tokens
+
+    def _label_cost(self, label: str) -> int:
+        if label not in self._label_tokens:
+            self._label_tokens[label] = self.tokenizer(label + ': ')
+        return self._label_tokens[label]
+
+    @staticmethod
+    def _relevance(section: ContextSection, item: _Item, now: datetime) -> Optional[float]:
+        """Relevance of an item at ``now``, or None when outside the section's window."""
+        relevance = item.boost
+        if item.date is None:
+            return None if section.window_days is not None else relevance
+
+        age_days = (now - item.date).total_seconds() / 86400
+        if section.window_days is not None and not 0 <= age_days <= section.window_days:
+            return None
+        if section.half_life_days:
+            relevance *= 0.5 ** (max(age_days, 0) / section.half_life_days)
+        return relevance
+
+    def _section_items(self, section: ContextSection, now: datetime) -> List[_Item]:
+        window: Window = None
+        if section.name in _WINDOWED_SECTIONS and section.window_days is not None:
+            window = (now - timedelta(days=section.window_days), now)
+        cached = self._items.get(section.name)
+        if cached is not None and cached[0] == window:
+            return cached[1]
+
+        render = getattr(self, '_render_' + section.name, None)
+        if render is None:
+            raise ValueError(f"Unknown context section: {section.name!r}")
+        items = render(window) if section.name in _WINDOWED_SECTIONS else render()
+        self._items[section.name] = (window, items)
+        return items
+
+    # Rendering, one _Item per fact
+
+    def _render_demographics(self) -> List[_Item]:
+        return [
+            _Item(f"{key.replace('_', ' ').title()}: {value}")
+            for key, value in self.record.demographics.items() if value
+        ]
+
+    def _render_conditions(self) -> List[_Item]:
+        return [
+            _Item(f"{cond['condition']} ({cond.get('icd_code', 'unknown onset')})")
+            for cond in self.record.medical_history
+        ]
+
+    def _render_medications(self) -> List[_Item]:
+        items = []
+        for med in self.record.medications:
+            text = med.name
+            if med.dosage:
+                text += f" {med.dosage}"
+            if med.indication:
+                text += f" for {med.indication}"
+            items.append(_Item(text))
+        return items
+
+    def _render_labs(self, window: Window = None) -> List[_Item]:
+        # One trend per test, fitted over its numeric results in the window
+        # (without LabSeries and NumPy) and shown on its latest result there
+        rows = list(self.record.lab_index)
+        points: Dict[str, List[Tuple[datetime, float]]] = {}
+        latest: Dict[str, int] = {}
+        for position, lab in enumerate(rows):
+            if window is not None and not window[0] <= lab.date <= window[1]:
+                continue
+            latest[lab.name] = position
+            value = parse_value(lab.value)[0]
+            if value is not None:
+                points.setdefault(lab.name, []).append((lab.date, value))
+        trends = {name: fitted_trend(test_points) for name, test_points in points.items()}
+
+        items = []
+        for position, lab in enumerate(rows):
+            text = f"{lab.name}: {lab.value}"
+            trend = trends.get(lab.name) if latest.get(lab.name) == position else None
+            if trend:
+                text += f" {trend}"
+            text += f" ({lab.date.strftime('%Y-%m-%d')})"
+            items.append(_Item(text, lab.date, 2.0 if _out_of_range(lab.value, lab.reference_range) else 1.0))
+        return items
+
+    def _render_allergies(self) -> List[_Item]:
+        return [_Item(allergy) for allergy in self.record.allergies.get('drug_allergies', ())]
+
+    def _render_visits(self) -> List[_Item]:
+        items = []
+        for event in self.record.timeline_index:
+            text = f"{event.date.strftime('%Y-%m-%d')}: {event.title}"
+            if event.assessment:
+                text += f" - {event.assessment}"
+            items.append(_Item(text, event.date))
+        return items
+
+
+def _out_of_range(value: str, reference_range: Optional[str]) -> bool:
+    number = parse_value(value)[0]
+    if number is None:
+        return False
+    low, high = parse_reference_range(reference_range)
+    return (low is not None and number < low) or (high is not None and number > high)
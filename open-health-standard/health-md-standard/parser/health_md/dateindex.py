@@ -0,0 +1,70 @@
+"""
+Health.md Date Index - Date-sorted entity indexes with range queries
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Generic, Iterable, Iterator, List, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+
+class DateIndex(Generic[T]):
+    """
+    Entities with a ``date`` attribute, sorted chronologically.
+
+    Built once per record, so every window query is a pair of bisections
+    instead of a scan. Entities without a date are left out; entities with
+    the same date keep their file order. Queries never read the wall clock:
+    relative windows take an explicit reference time ``now``.
+    """
+
+    __slots__ = ('_dates', '_items')
+
+    def __init__(self, items: Iterable[T]):
+        dated = sorted((item for item in items if getattr(item, 'date', None) is not None),
+                       key=lambda item: item.date)
+        self._items: List[T] = dated
+        self._dates: List[datetime] = [item.date for item in dated]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def __repr__(self) -> str:
+        return f"DateIndex(n={len(self)})"
+
+    @property
+    def first_date(self) -> Optional[datetime]:
+        return self._dates[0] if self._dates else None
+
+    @property
+    def last_date(self) -> Optional[datetime]:
+        return self._dates[-1] if self._dates else None
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[T]:
+        """Entities dated within ``[start, end]``, oldest first; either bound may be open."""
+        lo = 0 if start is None else bisect_left(self._dates, start)
+        hi = len(self._dates) if end is None else bisect_right(self._dates, end)
+        return self._items[lo:hi]
+
+    def since(self, date: datetime) -> List[T]:
+        """Entities dated on or after ``date``, oldest first."""
+        return self._items[bisect_left(self._dates, date):]
+
+    def within(self, days: int, now: datetime) -> List[T]:
+        """Entities from the ``days`` days up to and including ``now``, oldest first."""
+        return self.between(now - timedelta(days=days), now)
+
+    def latest(self, n: int = 1, now: Optional[datetime] = None) -> List[T]:
+        """
+        The ``n`` most recent entities, oldest first. With ``now``, entities
+        dated after it are ignored.
+        """
+        if n <= 0:
+            return []
+        hi = len(self._dates) if now is None else bisect_right(self._dates, now)
+        return self._items[max(0, hi - n):hi]
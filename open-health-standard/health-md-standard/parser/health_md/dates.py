@@ -0,0 +1,124 @@
+"""
+Health.md Dates - Fast, memoized parsing of the date formats used in Health.md
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Union
+
+
+# 2024-01-15, 2024-01-15T09:30:00Z, 2024-01-15T09:30:00+01:00
+_ISO_RE = re.compile(
+    r'(\d{4})-(\d{1,2})-(\d{1,2})'
+    r'(?:T(\d{1,2}):(\d{1,2}):(\d{1,2})(Z|[+-]\d{2}:?\d{2})?)?'
+)
+# January 2024
+_MONTH_YEAR_RE = re.compile(r'([A-Za-z]+)\s+(\d{4})')
+_YEAR_RE = re.compile(r'\d{4}')
+# 3 months ago
+_RELATIVE_RE = re.compile(r'(\d+)\s+(day|week|month|year)s?\s+ago')
+
+_MONTHS = {
+    name: number for number, name in enumerate(
+        ('january', 'february', 'march', 'april', 'may', 'june', 'july',
+         'august', 'september', 'october', 'november', 'december'), 1)
+}
+
+# Months and years are approximate, as they always have been
+_RELATIVE_UNITS = {
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': timedelta(days=30),
+    'year': timedelta(days=365),
+}
+
+
+class DateParser:
+    """
+    Parses the date strings found in Health.md files.
+
+    Accepts ISO dates and datetimes (``Z`` gives a naive datetime, a numeric
+    offset an aware one), ``"January 2024"``, a bare year and relative dates
+    such as ``"3 months ago"``. Anything else gives None.
+
+    Well-formed dates are matched directly instead of trying each format in
+    turn, and results are memoized: the same few dates recur on every lab
+    row of a panel. At most ``cache_size`` distinct strings are kept.
+    Relative dates are resolved against ``clock()``, so pass a fixed clock
+    to make them deterministic; they are cached as offsets, never as
+    absolute times.
+    """
+
+    def __init__(self, clock: Callable[[], datetime] = datetime.now, cache_size: int = 4096):
+        self.clock = clock
+        self.cache_size = cache_size
+        self._cache: Dict[str, Union[datetime, timedelta, None]] = {}
+
+    def __call__(self, text: str) -> Optional[datetime]:
+        return self.parse(text)
+
+    def parse(self, text: str) -> Optional[datetime]:
+        """Parse ``text`` into a datetime, or None if it is not a recognised date."""
+        try:
+            result = self._cache[text]
+        except KeyError:
+            result = self._parse(text.strip())
+            if self.cache_size > 0:
+                if len(self._cache) >= self.cache_size:
+                    # Drop the oldest entry; dicts keep insertion order
+                    self._cache.pop(next(iter(self._cache), None), None)
+                self._cache[text] = result
+
+        if isinstance(result, timedelta):
+            return self.clock() - result
+        return result
+
+    def clear(self):
+        """Forget every memoized result."""
+        self._cache.clear()
+
+    def _parse(self, text: str) -> Union[datetime, timedelta, None]:
+        try:
+            match = _ISO_RE.fullmatch(text)
+            if match:
+                return _from_iso(match)
+
+            match = _MONTH_YEAR_RE.fullmatch(text)
+            if match:
+                month = _MONTHS.get(match.group(1).lower())
+                if month:
+                    return datetime(int(match.group(2)), month, 1)
+
+            if _YEAR_RE.fullmatch(text):
+                return datetime(int(text), 1, 1)
+        except ValueError:
+            # Well-formed but impossible, e.g. 2024-02-30
+            return None
+
+        match = _RELATIVE_RE.search(text.lower())
+        if match:
+            return int(match.group(1)) * _RELATIVE_UNITS[match.group(2)]
+
+        return None
+
+
+def _from_iso(match: 're.Match[str]') -> datetime:
+    year, month, day, hour, minute, second, offset = match.groups()
+    if hour is None:
+        return datetime(int(year), int(month), int(day))
+
+    tzinfo = None
+    if offset and offset != 'Z':
+        sign = -1 if offset[0] == '-' else 1
+        digits = offset[1:].replace(':', '')
+        tzinfo = timezone(sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:])))
+    return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second),
+                    tzinfo=tzinfo)
+
+
+DEFAULT_DATE_PARSER = DateParser()
+
+
+def parse_date(text: str) -> Optional[datetime]:
+    """Parse a Health.md date string with the shared default DateParser."""
+    return DEFAULT_DATE_PARSER.parse(text)
@@ -0,0 +1,720 @@
+"""
+Health.md Exporters - FHIR R4 Bulk Data (NDJSON), columnar and JSON export
+
+export_to_fhir writes records in the FHIR Bulk Data layout: one NDJSON
+file per resource type plus a ``manifest.json`` shaped like the response
+to a bulk ``$export``. export_to_parquet and export_to_arrow flatten
+records into typed tables for analytics. Records are consumed one at a
+time either way, so memory stays flat however many stream through.
+"""
+
+import json
+import re
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from html import escape
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+from .batch import ParseResult
+from .parser import ClinicalEvent, Condition, HealthRecord, Medication, _digest
+from .serialize import write_json
+from .values import _VALUE_RE, parse_reference_range, parse_value
+
+
+ICD10_SYSTEM = 'http://hl7.org/fhir/sid/icd-10'
+LOINC_SYSTEM = 'http://loinc.org'
+_OBSERVATION_CATEGORY = 'http://terminology.hl7.org/CodeSystem/observation-category'
+_CONDITION_CATEGORY = 'http://terminology.hl7.org/CodeSystem/condition-category'
+_ALLERGY_CLINICAL_STATUS = 'http://terminology.hl7.org/CodeSystem/allergyintolerance-clinical'
+_ACT_CODE = 'http://terminology.hl7.org/CodeSystem/v3-ActCode'
+
+# Resource types written by export_to_fhir, in file order of the manifest
+RESOURCE_TYPES = ('Patient', 'MedicationStatement', 'Observation', 'Condition', 'Encounter',
+                  'AllergyIntolerance')
+
+MANIFEST_NAME = 'manifest.json'
+
+# Allergy category -> (AllergyIntolerance.type, AllergyIntolerance.category)
+_ALLERGY_KINDS = {
+    'drug_allergies': ('allergy', 'medication'),
+    'environmental_allergies': ('allergy', 'environment'),
+    'food_intolerances': ('intolerance', 'food'),
+}
+
+_GENDERS = {'female': 'female', 'f': 'female', 'kvinna': 'female',
+            'male': 'male', 'm': 'male', 'man': 'male',
+            'other': 'other', 'intersex': 'other', 'unknown': 'unknown'}
+
+# Encounter.class from the visit type or title; ambulatory otherwise
+_ENCOUNTER_CLASSES = (
+    (re.compile(r'emergency|\bER\b|\bED\b', re.IGNORECASE), ('EMER', 'emergency')),
+    (re.compile(r'inpatient|admission|admitted|hospitali[sz]', re.IGNORECASE), ('IMP', 'inpatient encounter')),
+    (re.compile(r'tele|video|virtual|phone', re.IGNORECASE), ('VR', 'virtual')),
+)
+_AMBULATORY = ('AMB', 'ambulatory')
+
+# "126/78 mmHg" for blood pressure readings
+_PAIR_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)\s*([A-Za-z][^\s(),;]*)?')
+_BLOOD_PRESSURE_RE = re.compile(r'blood\s+pressure|\bBP\b', re.IGNORECASE)
+
+# FHIR ids: at most 64 of [A-Za-z0-9-.]; record ids that fit (with room
+# for the per-resource suffix) are kept as the Patient id
+_ID_RE = re.compile(r'[A-Za-z0-9\-.]{1,48}')
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), check_circular=False).encode
+
+
+def _fhir_date(value: Union[date, datetime]) -> str:
+    """FHIR dateTime; naive datetimes give a date, as a time needs an offset."""
+    if isinstance(value, datetime):
+        return value.isoformat() if value.tzinfo is not None else value.date().isoformat()
+    return value.isoformat()
+
+
+def _concept(text: Optional[str], codes: Iterable[str] = (), system: str = ICD10_SYSTEM) -> Dict[str, Any]:
+    concept: Dict[str, Any] = {}
+    coding = [{'system': system, 'code': code} for code in codes]
+    if coding:
+        concept['coding'] = coding
+    if text:
+        concept['text'] = text
+    return concept
+
+
+def _notes(*texts: Optional[str]) -> List[Dict[str, str]]:
+    return [{'text': text} for text in texts if text]
+
+
+def _quantity(value: Optional[float], unit: Optional[str]) -> Dict[str, Any]:
+    quantity: Dict[str, Any] = {'value': value}
+    if unit:
+        quantity['unit'] = unit
+    return quantity
+
+
+def patient_id(record: HealthRecord) -> str:
+    """
+    FHIR id for the record's patient: the frontmatter ``record_id`` when it
+    is a valid id, otherwise a hash of it (or of the content, without one).
+    """
+    record_id = record.frontmatter.get('record_id')
+    if record_id is None:
+        return _digest(record.raw_content)
+    record_id = str(record_id)
+    if _ID_RE.fullmatch(record_id):
+        return record_id
+    return _digest(record_id)
+
+
+class _Resources:
+    """Builds the resources of one record, sharing its subject reference."""
+
+    def __init__(self, record: HealthRecord, patient: str):
+        self.record = record
+        self.patient = patient
+        self.subject = {'reference': f'Patient/{patient}'}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        record = self.record
+        yield self.patient_resource()
+        for index, medication in enumerate(record.medications):
+            yield self.medication_statement(index, medication)
+        for index, lab in enumerate(record.lab_results):
+            yield self.observation(f'lab{index}', 'laboratory', lab.name, lab.date, lab.value, lab.units,
+                                   lab.reference_range, lab.clinical_significance)
+        for index, vital in enumerate(record.vital_signs):
+            yield self.observation(f'vs{index}', 'vital-signs', vital.name, vital.date, vital.value,
+                                   vital.units, None, vital.notes)
+        for index, condition in enumerate(record.medical_history):
+            yield self.condition(index, condition)
+        for index, event in enumerate(record.clinical_timeline):
+            yield self.encounter(index, event)
+        index = 0
+        for category, allergies in record.allergies.items():
+            for allergy in allergies:
+                yield self.allergy_intolerance(index, category, allergy)
+                index += 1
+
+    def _id(self, suffix: str) -> str:
+        return f'{self.patient}-{suffix}'
+
+    def patient_resource(self) -> Dict[str, Any]:
+        resource: Dict[str, Any] = {'resourceType': 'Patient', 'id': self.patient}
+        gender = _GENDERS.get(str(self.record.demographics.get('sex', '')).strip().lower())
+        if gender:
+            resource['gender'] = gender
+        return resource
+
+    def medication_statement(self, index: int, medication: Medication) -> Dict[str, Any]:
+        resource: Dict[str, Any] = {
+            'resourceType': 'MedicationStatement',
+            'id': self._id(f'med{index}'),
+            'status': 'active',
+            'medicationCodeableConcept': _concept(medication.name),
+            'subject': self.subject,
+        }
+        if medication.started is not None:
+            resource['effectivePeriod'] = {'start': _fhir_date(medication.started)}
+        if medication.prescriber:
+            resource['informationSource'] = {'display': medication.prescriber}
+        if medication.indication or medication.icd_codes:
+            resource['reasonCode'] = [_concept(medication.indication, medication.icd_codes or ())]
+        dosage: Dict[str, Any] = {}
+        if medication.dosage:
+            dosage['text'] = medication.dosage
+        if medication.frequency:
+            dosage['timing'] = {'code': {'text': medication.frequency}}
+        if medication.route:
+            dosage['route'] = {'text': medication.route}
+        if dosage:
+            resource['dosage'] = [dosage]
+        notes = _notes(medication.generic_name and f'Generic name: {medication.generic_name}',
+                       medication.notes)
+        if notes:
+            resource['note'] = notes
+        return resource
+
+    def observation(self, suffix: str, category: str, name: str, when: Optional[datetime], value: str,
+                    units: Optional[str], reference_range: Optional[str],
+                    note: Optional[str]) -> Dict[str, Any]:
+        resource: Dict[str, Any] = {
+            'resourceType': 'Observation',
+            'id': self._id(suffix),
+            'status': 'final',
+            'category': [{'coding': [{'system': _OBSERVATION_CATEGORY, 'code': category}]}],
+            'code': {'text': name},
+            'subject': self.subject,
+        }
+        if when is not None:
+            resource['effectiveDateTime'] = _fhir_date(when)
+
+        pair = _PAIR_RE.match(value or '') if _BLOOD_PRESSURE_RE.search(name) else None
+        if pair:
+            # Systolic/diastolic components of the blood pressure panel
+            unit = pair.group(3) or units
+            resource['code'] = _concept(name, ('85354-9',), LOINC_SYSTEM)
+            resource['component'] = [
+                {'code': _concept('Systolic blood pressure', ('8480-6',), LOINC_SYSTEM),
+                 'valueQuantity': _quantity(float(pair.group(1)), unit)},
+                {'code': _concept('Diastolic blood pressure', ('8462-4',), LOINC_SYSTEM),
+                 'valueQuantity': _quantity(float(pair.group(2)), unit)},
+            ]
+        else:
+            number, unit = parse_value(value)
+            if number is not None:
+                resource['valueQuantity'] = _quantity(number, unit or units)
+            elif value:
+                resource['valueString'] = value
+
+        if reference_range:
+            low, high = parse_reference_range(reference_range)
+            bounds: Dict[str, Any] = {}
+            if low is not None:
+                bounds['low'] = _quantity(low, units)
+            if high is not None:
+                bounds['high'] = _quantity(high, units)
+            bounds['text'] = reference_range
+            resource['referenceRange'] = [bounds]
+
+        # Flags and comments after a quantity ("6.8% ✓ (Target: <7.0%)")
+        # would be lost otherwise, so the raw value goes in a note
+        quantity = _VALUE_RE.match(value or '')
+        trailing = 'valueString' not in resource and quantity and value[quantity.end():].strip()
+        notes = _notes(value if trailing else None, note)
+        if notes:
+            resource['note'] = notes
+        return resource
+
+    def condition(self, index: int, condition: Condition) -> Dict[str, Any]:
+        resource: Dict[str, Any] = {
+            'resourceType': 'Condition',
+            'id': self._id(f'cond{index}'),
+            'category': [{'coding': [{'system': _CONDITION_CATEGORY, 'code': 'problem-list-item'}]}],
+            'code': _concept(condition.condition, (condition.icd_code,) if condition.icd_code else ()),
+            'subject': self.subject,
+        }
+        if condition.onset is not None:
+            resource['onsetDateTime'] = _fhir_date(condition.onset)
+        content = (condition.content or '').strip()
+        if content:
+            # Annotation.text is markdown, so the block goes in as written
+            resource['note'] = [{'text': content}]
+        return resource
+
+    def encounter(self, index: int, event: ClinicalEvent) -> Dict[str, Any]:
+        kind = f'{event.visit_type or ""} {event.title or ""}'
+        code, display = next((found for pattern, found in _ENCOUNTER_CLASSES if pattern.search(kind)),
+                             _AMBULATORY)
+        resource: Dict[str, Any] = {
+            'resourceType': 'Encounter',
+            'id': self._id(f'enc{index}'),
+            'status': 'finished',
+            'class': {'system': _ACT_CODE, 'code': code, 'display': display},
+            'type': [{'text': text} for text in (event.title, event.visit_type) if text],
+            'subject': self.subject,
+        }
+        if not resource['type']:
+            del resource['type']
+        if event.provider_type:
+            resource['serviceType'] = {'text': event.provider_type}
+        if event.date is not None:
+            resource['period'] = {'start': _fhir_date(event.date)}
+        if event.chief_complaint:
+            resource['reasonCode'] = [{'text': event.chief_complaint}]
+
+        # Encounter has no note element; assessment and plan go in the narrative
+        paragraphs = [f'<p><b>{label}:</b> {escape(text)}</p>'
+                      for label, text in (('Assessment', event.assessment), ('Plan', event.plan),
+                                          ('Notes', event.notes)) if text]
+        if paragraphs:
+            resource['text'] = {
+                'status': 'additional',
+                'div': '<div xmlns="http://www.w3.org/1999/xhtml">' + ''.join(paragraphs) + '</div>',
+            }
+        return resource
+
+    def allergy_intolerance(self, index: int, category: str, allergy: str) -> Dict[str, Any]:
+        substance, _, reaction = allergy.partition(':')
+        kind, fhir_category = _ALLERGY_KINDS.get(category, ('allergy', None))
+        resource: Dict[str, Any] = {
+            'resourceType': 'AllergyIntolerance',
+            'id': self._id(f'alg{index}'),
+            'clinicalStatus': {'coding': [{'system': _ALLERGY_CLINICAL_STATUS, 'code': 'active'}]},
+            'type': kind,
+            'code': {'text': substance.strip()},
+            'patient': self.subject,
+        }
+        if fhir_category:
+            resource['category'] = [fhir_category]
+        if reaction.strip():
+            resource['reaction'] = [{'manifestation': [{'text': reaction.strip()}]}]
+        return resource
+
+
+def record_to_fhir(record: HealthRecord, patient: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    FHIR R4 resources for one record, built lazily: the Patient, then a
+    MedicationStatement per medication, an Observation per lab result and
+    vital sign, a Condition per medical history entry, an Encounter per
+    timeline event and an AllergyIntolerance per allergy.
+
+    Resource ids derive from ``patient`` (default: :func:`patient_id`) and
+    the entity's position, so re-exporting a record gives the same ids.
+    """
+    return iter(_Resources(record, patient or patient_id(record)))
+
+
+def operation_outcome(diagnostics: str, code: str = 'processing') -> Dict[str, Any]:
+    """OperationOutcome reporting one error, as listed under the manifest's ``error``."""
+    return {
+        'resourceType': 'OperationOutcome',
+        'issue': [{'severity': 'error', 'code': code, 'diagnostics': diagnostics}],
+    }
+
+
+@lru_cache(maxsize=None)
+def _fhir_validator() -> Callable[[str, Dict[str, Any]], Any]:
+    """fhir.resources model constructor, which validates; imported on first use."""
+    try:
+        from fhir.resources import construct_fhir_element
+    except ImportError:
+        raise ImportError("FHIR validation needs fhir.resources: pip install 'health-md[fhir]'") from None
+    return construct_fhir_element
+
+
+class BulkDataWriter:
+    """
+    Writer for the FHIR Bulk Data layout under ``out_dir``.
+
+    Each resource type goes to ``<ResourceType>.ndjson``, opened on its first
+    resource; OperationOutcomes are the manifest's error files. ``close``
+    writes ``manifest.json`` and returns it. Output URLs are the file names,
+    or absolute under ``base_url`` when given.
+    """
+
+    def __init__(self, out_dir: Union[str, Path], base_url: Optional[str] = None,
+                 request: str = '$export'):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip('/') + '/' if base_url else ''
+        self.request = request
+        self.transaction_time = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.counts: Dict[str, int] = {}
+        self._files: Dict[str, TextIO] = {}
+
+    def write(self, resource: Dict[str, Any]):
+        resource_type = resource['resourceType']
+        stream = self._files.get(resource_type)
+        if stream is None:
+            stream = self._files[resource_type] = open(
+                self.out_dir / f'{resource_type}.ndjson', 'w', encoding='utf-8')
+            self.counts[resource_type] = 0
+        stream.write(_dumps(resource) + '\n')
+        self.counts[resource_type] += 1
+
+    def manifest(self) -> Dict[str, Any]:
+        order = {name: position for position, name in enumerate(RESOURCE_TYPES)}
+        entries = [
+            {'type': resource_type, 'url': f'{self.base_url}{resource_type}.ndjson', 'count': count}
+            for resource_type, count in sorted(self.counts.items(),
+                                               key=lambda item: order.get(item[0], len(order)))
+        ]
+        return {
+            'transactionTime': self.transaction_time,
+            'request': self.request,
+            'requiresAccessToken': False,
+            'output': [entry for entry in entries if entry['type'] != 'OperationOutcome'],
+            'error': [entry for entry in entries if entry['type'] == 'OperationOutcome'],
+        }
+
+    def close(self) -> Dict[str, Any]:
+        for stream in self._files.values():
+            stream.close()
+        self._files.clear()
+        manifest = self.manifest()
+        with open(self.out_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+        return manifest
+
+    def __enter__(self) -> 'BulkDataWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _unwrap(item: Union[HealthRecord, ParseResult]) -> Tuple[Optional[HealthRecord], Optional[str]]:
+    """Record and source path of an exporter input; no record for a failed ParseResult."""
+    if not isinstance(item, ParseResult):
+        return item, None
+    if not item.ok:
+        return None, item.path
+    if not isinstance(item.record, HealthRecord):
+        raise TypeError('Exporters need parsed records, not as_dict payloads')
+    return item.record, item.path
+
+
+def export_to_fhir(records: Iterable[Union[HealthRecord, ParseResult]], out_dir: Union[str, Path],
+                   base_url: Optional[str] = None, validate: bool = False) -> Dict[str, Any]:
+    """
+    Export records as FHIR R4 Bulk Data NDJSON, one file per resource type.
+
+    Args:
+        records: HealthRecords, or ParseResults as yielded by ``parse_many``;
+            consumed lazily, one record at a time. A failed ParseResult
+            becomes an OperationOutcome in the error output.
+        out_dir: Directory for the NDJSON files and ``manifest.json``
+        base_url: Prefix for the manifest's output URLs
+        validate: Check every resource against the FHIR models of
+            ``fhir.resources`` (the ``fhir`` extra); resources that fail are
+            reported as OperationOutcomes instead of being written
+
+    Returns:
+        The manifest, as written to ``out_dir/manifest.json``.
+
+    Example:
+        >>> export_to_fhir(parse_many(paths, workers=8), 'bulk/')
+    """
+    check = _fhir_validator() if validate else None
+    with BulkDataWriter(out_dir, base_url) as writer:
+        for item in records:
+            record, _ = _unwrap(item)
+            if record is None:
+                writer.write(operation_outcome(f'{item.path}: {item.error}'))
+                continue
+
+            for resource in record_to_fhir(record):
+                if check is not None:
+                    try:
+                        check(resource['resourceType'], resource)
+                    except ValueError as e:
+                        writer.write(operation_outcome(
+                            f"{resource['resourceType']}/{resource['id']}: {e}", 'invalid'))
+                        continue
+                writer.write(resource)
+    return writer.manifest()
+
+
+def export_to_json(record: HealthRecord, target: Union[str, Path, TextIO, None] = None,
+                   indent: Optional[int] = 2) -> Optional[str]:
+    """
+    Write the record as one JSON document (the layout of ``write_json``) to
+    a path or stream; without a target, return the JSON text.
+    """
+    if target is None:
+        from io import StringIO
+        buffer = StringIO()
+        write_json(record, buffer, indent=indent)
+        return buffer.getvalue()
+    if isinstance(target, (str, Path)):
+        with open(target, 'w', encoding='utf-8') as f:
+            write_json(record, f, indent=indent)
+    else:
+        write_json(record, target, indent=indent)
+    return None
+
+
+# Columnar export. Column kinds map to Arrow types in _arrow_type;
+# 'category' columns are dictionary-encoded.
+COLUMNAR_TABLES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    'frontmatter': (
+        ('record', 'int'), ('file', 'string'), ('record_id', 'string'), ('health_md_version', 'category'),
+        ('privacy_level', 'category'), ('generated', 'utc'), ('last_updated', 'utc'),
+        ('data_sources', 'list'),
+    ),
+    'medications': (
+        ('record', 'int'), ('name', 'string'), ('generic_name', 'string'), ('indication', 'string'),
+        ('dosage', 'string'), ('route', 'category'), ('frequency', 'string'), ('started', 'time'),
+        ('prescriber', 'category'), ('notes', 'string'), ('icd_codes', 'list'),
+    ),
+    'lab_results': (
+        ('record', 'int'), ('name', 'category'), ('date', 'time'), ('value', 'string'),
+        ('value_numeric', 'float'), ('units', 'category'), ('reference_range', 'string'),
+        ('reference_low', 'float'), ('reference_high', 'float'), ('clinical_significance', 'string'),
+        ('trend', 'category'),
+    ),
+    'vital_signs': (
+        ('record', 'int'), ('name', 'category'), ('date', 'time'), ('value', 'string'),
+        ('value_numeric', 'float'), ('units', 'category'), ('notes', 'string'),
+    ),
+    'clinical_timeline': (
+        ('record', 'int'), ('date', 'time'), ('title', 'string'), ('provider_type', 'category'),
+        ('visit_type', 'category'), ('chief_complaint', 'string'), ('assessment', 'string'),
+        ('plan', 'string'), ('notes', 'string'),
+    ),
+    'conditions': (
+        ('record', 'int'), ('condition', 'category'), ('onset', 'time'), ('icd_code', 'category'),
+        ('content', 'string'),
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def _pyarrow() -> Any:
+    """pyarrow, imported on first use."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Columnar export needs pyarrow: pip install 'health-md[arrow]'") from None
+    return pyarrow
+
+
+def _arrow_type(pa: Any, kind: str) -> Any:
+    return {
+        'int': pa.int64(),
+        'string': pa.string(),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'float': pa.float64(),
+        # Milliseconds: Parquet has no seconds unit
+        'time': pa.timestamp('ms'),
+        'utc': pa.timestamp('ms', tz='UTC'),
+        'list': pa.list_(pa.string()),
+    }[kind]
+
+
+def _utc(value: Any) -> Optional[datetime]:
+    """Frontmatter timestamp (YAML datetime or ISO text) as an aware datetime."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class _Categories:
+    """
+    Dictionary of one categorical column, grown across batches. Every batch
+    carries the whole dictionary so far, so later batches only append to
+    it, which Arrow IPC files require (as dictionary deltas).
+    """
+
+    def __init__(self, pa: Any):
+        self.pa = pa
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, column: Sequence[Optional[str]]) -> Any:
+        codes = self.codes
+        indices = []
+        for value in column:
+            if value is None:
+                indices.append(None)
+                continue
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(self.values)
+                self.values.append(value)
+            indices.append(code)
+        pa = self.pa
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(self.values, pa.string()))
+
+
+class _ColumnarTable:
+    """Rows of one table, buffered and written as a batch every ``batch_rows`` rows."""
+
+    def __init__(self, pa: Any, columns: Tuple[Tuple[str, str], ...], writer_factory: Callable[[Any], Any],
+                 batch_rows: int):
+        self.pa = pa
+        self.schema = pa.schema([(name, _arrow_type(pa, kind)) for name, kind in columns])
+        self.categories = {index: _Categories(pa) for index, (_, kind) in enumerate(columns)
+                           if kind == 'category'}
+        self.batch_rows = batch_rows
+        self.pending: List[Tuple[Any, ...]] = []
+        self.rows = 0
+        self.writer = writer_factory(self.schema)
+
+    def append(self, row: Tuple[Any, ...]):
+        self.pending.append(row)
+        if len(self.pending) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        pa = self.pa
+        arrays = [
+            self.categories[index].encode(column) if index in self.categories
+            else pa.array(column, field.type)
+            for index, (field, column) in enumerate(zip(self.schema, zip(*self.pending)))
+        ]
+        self.writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self.rows += len(self.pending)
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def _columnar_rows(index: int, record: HealthRecord,
+                   path: Optional[str]) -> Iterator[Tuple[str, Tuple[Any, ...]]]:
+    """``(table, row)`` for every row one record contributes."""
+    frontmatter = record.frontmatter
+    sources = frontmatter.get('data_sources')
+    yield 'frontmatter', (
+        index, path, _text(frontmatter.get('record_id')), _text(frontmatter.get('health_md_version')),
+        _text(frontmatter.get('privacy_level')), _utc(frontmatter.get('generated')),
+        _utc(frontmatter.get('last_updated')),
+        [str(source) for source in sources] if isinstance(sources, list) else None,
+    )
+    for medication in record.medications:
+        yield 'medications', (
+            index, medication.name, medication.generic_name, medication.indication, medication.dosage,
+            medication.route, medication.frequency, medication.started, medication.prescriber,
+            medication.notes, medication.icd_codes or [],
+        )
+    for lab in record.lab_results:
+        number, unit = parse_value(lab.value)
+        low, high = parse_reference_range(lab.reference_range)
+        yield 'lab_results', (
+            index, lab.name, lab.date, lab.value, number, lab.units or unit, lab.reference_range,
+            low, high, lab.clinical_significance, lab.trend,
+        )
+    for vital in record.vital_signs:
+        # "126/78 mmHg" has no single numeric value
+        pair = _PAIR_RE.match(vital.value or '')
+        number, unit = (None, pair.group(3)) if pair else parse_value(vital.value)
+        yield 'vital_signs', (index, vital.name, vital.date, vital.value, number, vital.units or unit,
+                              vital.notes)
+    for event in record.clinical_timeline:
+        yield 'clinical_timeline', (
+            index, event.date, event.title, event.provider_type, event.visit_type,
+            event.chief_complaint, event.assessment, event.plan, event.notes,
+        )
+    for condition in record.medical_history:
+        yield 'conditions', (index, condition.condition, condition.onset, condition.icd_code,
+                             condition.content)
+
+
+def _export_columnar(records: Iterable[Union[HealthRecord, ParseResult]],
+                     writer_factory: Callable[[str, Any], Any], batch_rows: int,
+                     errors: Optional[List[ParseResult]]) -> Dict[str, int]:
+    pa = _pyarrow()
+    tables = {
+        name: _ColumnarTable(pa, columns, lambda schema, name=name: writer_factory(name, schema), batch_rows)
+        for name, columns in COLUMNAR_TABLES.items()
+    }
+    try:
+        index = 0
+        for item in records:
+            record, path = _unwrap(item)
+            if record is None:
+                if errors is not None:
+                    errors.append(item)
+                continue
+            for table, row in _columnar_rows(index, record, path):
+                tables[table].append(row)
+            index += 1
+    finally:
+        for table in tables.values():
+            table.close()
+    return {name: table.rows for name, table in tables.items()}
+
+
+def export_to_parquet(records: Iterable[Union[HealthRecord, ParseResult]], out_dir: Union[str, Path],
+                      batch_rows: int = 65536, compression: str = 'zstd',
+                      errors: Optional[List[ParseResult]] = None) -> Dict[str, int]:
+    """
+    Flatten records into typed tables, one Parquet file each, for analytics.
+
+    Writes ``frontmatter``, ``medications``, ``lab_results``,
+    ``vital_signs``, ``clinical_timeline`` and ``conditions`` (columns in
+    :data:`COLUMNAR_TABLES`) to ``out_dir/<table>.parquet``. The ``record``
+    column numbers the records in input order and joins the tables; lab
+    and vital values are parsed into ``value_numeric`` next to the raw
+    text. Low-cardinality columns such as lab names and units are
+    dictionary-encoded, and come back as categoricals in pandas.
+
+    Args:
+        records: HealthRecords, or ParseResults as yielded by ``parse_many``;
+            consumed lazily, one record at a time
+        out_dir: Directory for the table files
+        batch_rows: Rows buffered per table before a row group is written
+        compression: Parquet compression codec
+        errors: If given, failed ParseResults are appended to this list;
+            otherwise they are skipped
+
+    Returns:
+        Rows written per table.
+
+    Requires pyarrow (the ``arrow`` extra).
+    """
+    _pyarrow()
+    import pyarrow.parquet as pq
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    return _export_columnar(
+        records, lambda name, schema: pq.ParquetWriter(str(out / f'{name}.parquet'), schema, compression=compression),
+        batch_rows, errors)
+
+
+def export_to_arrow(records: Iterable[Union[HealthRecord, ParseResult]], out_dir: Union[str, Path],
+                    batch_rows: int = 65536, compression: Optional[str] = None,
+                    errors: Optional[List[ParseResult]] = None) -> Dict[str, int]:
+    """
+    Like :func:`export_to_parquet`, but writes Arrow IPC files
+    (``out_dir/<table>.arrow``), which can be memory-mapped and scanned
+    without decoding. Uncompressed by default; ``'zstd'`` or ``'lz4'``
+    trade that for size.
+    """
+    _pyarrow()
+    import pyarrow.ipc as ipc
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    options = ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+    return _export_columnar(
+        records, lambda name, schema: ipc.new_file(str(out / f'{name}.arrow'), schema, options=options),
+        batch_rows, errors)
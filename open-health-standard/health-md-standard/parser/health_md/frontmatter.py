@@ -0,0 +1,75 @@
+"""
+Health.md Frontmatter - Fast access to the YAML header of Health.md files
+"""
+
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+
+DELIMITER = '---'
+
+_FRONTMATTER_RE = re.compile(
+    r'\A\ufeff?[ \t]*---[ \t]*\r?\n(.*?)^[ \t]*---[ \t]*$',
+    re.MULTILINE | re.DOTALL
+)
+
+
+@lru_cache(maxsize=None)
+def _yaml_loader() -> Callable[[str], Any]:
+    """
+    Safe YAML load function, importing PyYAML on first use.
+
+    PyYAML takes longer to import than the rest of the parser, and records
+    coming from the cache never need it.
+    """
+    import yaml
+    try:
+        # libyaml-backed loader, several times faster than the pure-Python one
+        from yaml import CSafeLoader as loader
+    except ImportError:  # pragma: no cover - depends on how PyYAML was built
+        from yaml import SafeLoader as loader
+    return lambda text: yaml.load(text, Loader=loader)
+
+
+def load_frontmatter(text: str) -> Dict[str, Any]:
+    """Parse frontmatter YAML text, returning an empty dict for empty input."""
+    return _yaml_loader()(text) or {}
+
+
+def split_frontmatter(content: str) -> Tuple[Optional[str], str]:
+    """
+    Split a Health.md document into its frontmatter text and markdown body.
+
+    The frontmatter must open on the first line and close with a ``---``
+    line of its own; otherwise the frontmatter is ``None`` and the whole
+    document is returned as the body.
+    """
+    match = _FRONTMATTER_RE.match(content)
+    if not match:
+        return None, content
+    return match.group(1), content[match.end():].strip()
+
+
+def read_frontmatter(filepath: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Read only the frontmatter of a Health.md file.
+
+    Lines are consumed up to the closing ``---`` delimiter and the body of
+    the file is never read, which makes this suitable for triaging large
+    numbers of files by ``privacy_level`` or ``health_md_version``.
+    """
+    with open(filepath, 'r', encoding='utf-8-sig') as f:
+        first_line = f.readline()
+        if first_line.strip() != DELIMITER:
+            return {}
+
+        lines = []
+        for line in f:
+            if line.strip() == DELIMITER:
+                return load_frontmatter(''.join(lines))
+            lines.append(line)
+
+    # No closing delimiter: not a frontmatter block
+    return {}
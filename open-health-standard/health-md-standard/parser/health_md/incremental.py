@@ -0,0 +1,94 @@
+"""
+Health.md Incremental - Re-extract only the parts of a record that changed
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from .parser import _BLOCK_FIELDS, HealthRecord
+
+
+@dataclass
+class FieldChange:
+    """
+    What changed in one structured field after an update.
+
+    List fields report the entities themselves; dict fields (frontmatter,
+    demographics, allergies) report ``(key, value)`` pairs, with allergies
+    reported per entry as ``(category, allergy)``.
+    """
+    field: str
+    added: List[Any] = field(default_factory=list)
+    removed: List[Any] = field(default_factory=list)
+
+
+# Fields compared by update_record, in to_dict order
+_DIFFED_FIELDS = ('frontmatter',) + HealthRecord.STRUCTURED_FIELDS
+
+
+def update_record(record: HealthRecord, content: str) -> Dict[str, FieldChange]:
+    """
+    Point ``record`` at ``content``, reusing the entities of unchanged blocks.
+
+    Records built without block hashes (e.g. by the streaming parser) are
+    re-extracted in full, but the reported changes are the same.
+    """
+    record._parse_content()
+    before = {name: getattr(record, name) for name in _DIFFED_FIELDS}
+    previous = record._block_entities
+
+    dropped = set(_DIFFED_FIELDS) | set(record._TRANSIENT_FIELDS) | {'section_hashes'}
+    dropped -= {'date_parser', 'parse_stats'}
+    for name in dropped:
+        record.__dict__.pop(name, None)
+    record.raw_content = content
+    record._block_entities = {}
+
+    for name in _BLOCK_FIELDS:
+        record.__dict__[name] = record._timed(name, lambda: record._parse_blocks(name, previous.get(name)))
+    record._parse_content()
+
+    changes = {}
+    for name, old in before.items():
+        added, removed = _diff(_items(old), _items(getattr(record, name)))
+        if added or removed:
+            changes[name] = FieldChange(name, added, removed)
+    return changes
+
+
+def _items(value: Any) -> List[Any]:
+    if not isinstance(value, dict):
+        return value
+    items = []
+    for key, item in value.items():
+        if isinstance(item, list):
+            items.extend((key, entry) for entry in item)
+        else:
+            items.append((key, item))
+    return items
+
+
+def _diff(old: List[Any], new: List[Any]) -> Tuple[List[Any], List[Any]]:
+    """Entities only in ``new`` and only in ``old``, as multisets."""
+    # Reused blocks carry the very same objects, so most entities match by identity
+    shared = {id(item) for item in old} & {id(item) for item in new}
+    added = [item for item in new if id(item) not in shared]
+    removed = [item for item in old if id(item) not in shared]
+    if not (added and removed):
+        return added, removed
+
+    # Re-parsed blocks give fresh objects that may still be equal
+    common = Counter(map(repr, added)) & Counter(map(repr, removed))
+    return _without(added, common.copy()), _without(removed, common)
+
+
+def _without(items: List[Any], counts: Counter) -> List[Any]:
+    kept = []
+    for item in items:
+        key = repr(item)
+        if counts[key]:
+            counts[key] -= 1
+        else:
+            kept.append(item)
+    return kept
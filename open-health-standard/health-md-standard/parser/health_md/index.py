@@ -0,0 +1,268 @@
+"""
+Health.md Index - Inverted index over a corpus of HealthRecords
+"""
+
+import os
+import pickle
+import re
+import tempfile
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from heapq import merge
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from .parser import HealthRecord
+
+
+# Bump whenever the on-disk layout changes
+INDEX_VERSION = 2
+
+MEDICATION = 'medication'
+ICD = 'icd'
+LAB = 'lab'
+CONDITION = 'condition'
+FIELDS = (MEDICATION, ICD, LAB, CONDITION)
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+# Dose and unit tokens ("500mg", "mg") say nothing about the drug
+_DOSE_RE = re.compile(r'\d+(?:\.\d+)?(?:mg|mcg|g|ml|iu|units?)|mg|mcg|ml|iu')
+# In medication names bare numbers are doses too; in conditions and labs
+# they are part of the name ("Type 1 Diabetes", "Vitamin B12")
+_NUMBER_RE = re.compile(r'\d+')
+# Lab names written several ways, each indexed under the others as well
+_LAB_ALIASES = {
+    'a1c': ('hba1c',),
+    'hba1c': ('a1c',),
+    'gfr': ('egfr',),
+    'egfr': ('gfr',),
+}
+
+
+def _words(field: str, text: str) -> List[str]:
+    words = [word for word in _WORD_RE.findall(text.lower()) if not _DOSE_RE.fullmatch(word)]
+    if field == MEDICATION:
+        words = [word for word in words if not _NUMBER_RE.fullmatch(word)]
+    return words
+
+
+def _terms(field: str, text: Optional[str]) -> Set[str]:
+    """
+    Lookup terms for a name: the whole normalized name plus its words.
+    Bare numbers only count as part of the whole name, never on their own.
+    """
+    if not text:
+        return set()
+    words = _words(field, text)
+    terms = {word for word in words if not _NUMBER_RE.fullmatch(word)}
+    if words:
+        terms.add(' '.join(words))
+    if field == LAB:
+        for word in list(terms):
+            terms.update(_LAB_ALIASES.get(word, ()))
+    return terms
+
+
+def _normalize_term(field: str, term: str) -> str:
+    if field == ICD:
+        return term.strip().upper()
+    return ' '.join(_words(field, term))
+
+
+class CorpusIndex:
+    """
+    Inverted index from medications, ICD-10 codes, lab tests and conditions
+    to the records mentioning them.
+
+    Each record gets a dense integer id; postings are sorted arrays of
+    those ids, so AND/OR queries are set intersections and merges that
+    never touch the source files. Lab postings also keep the date of each
+    record's latest result, for "had an HbA1c since ..." queries.
+
+    >>> index = CorpusIndex.from_paths(paths)
+    >>> cohort = index.all_of(
+    ...     index.lookup('medication', 'metformin'),
+    ...     index.lookup('icd', 'E11'),
+    ...     index.lookup('lab', 'a1c', since=now - timedelta(days=90)),
+    ... )
+    >>> index.record_ids(cohort)
+
+    Names match on their whole normalized form or on any single whole
+    word: "metformin" finds "Metformin 500mg", and "type 1 diabetes
+    mellitus" finds only that condition, while "diabetes" finds every
+    kind. Doses are dropped from medication names, but numbers stay in
+    condition and lab names. Lab names also match a few common aliases,
+    so "a1c" finds "HbA1c" and "gfr" finds "eGFR". ICD codes match by
+    prefix, so ``E11`` finds ``E11.9``.
+    """
+
+    def __init__(self):
+        self.records: List[str] = []
+        self.paths: List[Optional[str]] = []
+        self._postings: Dict[str, Dict[str, array]] = {field: {} for field in FIELDS}
+        # Per lab term, the day ordinal of each posting's latest result
+        self._lab_days: Dict[str, array] = {}
+        self._sorted_terms: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, record: HealthRecord, path: Optional[Union[str, Path]] = None) -> int:
+        """Index one record; returns its id. The record id defaults to the path."""
+        doc = len(self.records)
+        record_id = record.frontmatter.get('record_id') or (str(path) if path is not None else str(doc))
+        self.records.append(str(record_id))
+        self.paths.append(str(path) if path is not None else None)
+
+        medications: Set[str] = set()
+        codes: Set[str] = set()
+        for med in record.medications:
+            medications |= _terms(MEDICATION, med.name) | _terms(MEDICATION, med.generic_name)
+            codes.update(code.upper() for code in med.icd_codes)
+
+        conditions: Set[str] = set()
+        for condition in record.medical_history:
+            conditions |= _terms(CONDITION, condition.condition)
+            if condition.icd_code:
+                codes.add(condition.icd_code.upper())
+
+        labs: Dict[str, int] = {}
+        for lab in record.lab_results:
+            day = lab.date.toordinal() if lab.date else 0
+            for term in _terms(LAB, lab.name):
+                labs[term] = max(labs.get(term, 0), day)
+
+        for field, terms in ((MEDICATION, medications), (ICD, codes), (CONDITION, conditions)):
+            postings = self._postings[field]
+            for term in terms:
+                postings.setdefault(term, array('I')).append(doc)
+        lab_postings = self._postings[LAB]
+        for term, day in labs.items():
+            lab_postings.setdefault(term, array('I')).append(doc)
+            self._lab_days.setdefault(term, array('I')).append(day)
+
+        self._sorted_terms.clear()
+        return doc
+
+    @classmethod
+    def from_records(cls, records: Iterable[HealthRecord]) -> 'CorpusIndex':
+        """Index already parsed records."""
+        index = cls()
+        for record in records:
+            index.add(record)
+        return index
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[Union[str, Path]], workers: Optional[int] = None,
+                   errors: Optional[list] = None) -> 'CorpusIndex':
+        """
+        Parse and index many files in parallel.
+
+        Files that fail to parse are skipped; pass a list as ``errors`` to
+        collect their ParseResults.
+        """
+        index = cls()
+        for result in HealthRecord.parse_many(paths, workers=workers, ordered=True, errors=errors):
+            index.add(result.record, result.path)
+        return index
+
+    def terms(self, field: str) -> List[str]:
+        """Every indexed term of ``field``, sorted."""
+        if field not in self._sorted_terms:
+            self._sorted_terms[field] = sorted(self._field(field))
+        return self._sorted_terms[field]
+
+    def lookup(self, field: str, term: str, since: Optional[datetime] = None) -> List[int]:
+        """
+        Sorted ids of the records matching ``term`` in ``field``.
+
+        ICD codes match by prefix. For labs, ``since`` keeps only records
+        whose latest matching result is dated on or after it.
+        """
+        term = _normalize_term(field, term)
+        postings = self._field(field)
+
+        if field == ICD:
+            terms = self.terms(ICD)
+            matched = []
+            for position in range(bisect_left(terms, term), len(terms)):
+                if not terms[position].startswith(term):
+                    break
+                matched.append(terms[position])
+        else:
+            matched = [term] if term in postings else []
+
+        if since is not None:
+            if field != LAB:
+                raise ValueError("'since' only applies to lab lookups")
+            cutoff = since.toordinal()
+            return self.any_of(*(
+                [doc for doc, day in zip(postings[t], self._lab_days[t]) if day >= cutoff]
+                for t in matched
+            ))
+        return self.any_of(*(postings[t] for t in matched))
+
+    @staticmethod
+    def all_of(*postings: Iterable[int]) -> List[int]:
+        """Records present in every posting list (AND)."""
+        if not postings:
+            return []
+        sets = sorted((set(p) for p in postings), key=len)
+        result = sets[0].intersection(*sets[1:])
+        return sorted(result)
+
+    @staticmethod
+    def any_of(*postings: Iterable[int]) -> List[int]:
+        """Records present in any posting list (OR)."""
+        result: List[int] = []
+        for doc in merge(*postings):
+            if not result or result[-1] != doc:
+                result.append(doc)
+        return result
+
+    @staticmethod
+    def without(postings: Iterable[int], excluded: Iterable[int]) -> List[int]:
+        """Records in ``postings`` but not in ``excluded`` (AND NOT)."""
+        excluded = set(excluded)
+        return [doc for doc in postings if doc not in excluded]
+
+    def record_ids(self, docs: Iterable[int]) -> List[str]:
+        """Record ids (frontmatter ``record_id``, else path) for index ids."""
+        return [self.records[doc] for doc in docs]
+
+    def save(self, path: Union[str, Path]):
+        """Write the index to ``path`` atomically."""
+        payload = (INDEX_VERSION, self.records, self.paths, self._postings, self._lab_days)
+        data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        path = Path(path)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'CorpusIndex':
+        """
+        Read an index written by save().
+
+        The file is a pickle: only load indexes you wrote yourself.
+        """
+        with open(path, 'rb') as f:
+            version, records, paths, postings, lab_days = pickle.loads(zlib.decompress(f.read()))
+        if version != INDEX_VERSION:
+            raise ValueError(f"Index version {version} is not supported (expected {INDEX_VERSION})")
+        index = cls()
+        index.records, index.paths, index._postings, index._lab_days = records, paths, postings, lab_days
+        return index
+
+    def _field(self, field: str) -> Dict[str, array]:
+        try:
+            return self._postings[field]
+        except KeyError:
+            raise ValueError(f"Unknown index field: {field!r} (expected one of {', '.join(FIELDS)})")
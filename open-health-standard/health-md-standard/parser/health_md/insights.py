@@ -0,0 +1,448 @@
+"""
+Health.md Insights - Declarative clinical insight rules, compiled once
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union,
+)
+
+from .parser import HealthRecord
+
+if TYPE_CHECKING:
+    import numpy as np
+    from .batch import ParseResult
+    from .labs import LabSeries
+
+# Entries a condition matched, e.g. medications or lab tests; empty when it did not hold
+Matches = List[Any]
+Predicate = Callable[['RecordFacts'], Matches]
+
+_LAB_QUALIFIERS = ('trend', 'out_of_range', 'above', 'below', 'within_days', 'min_results')
+_AGE_RE = re.compile(r'\s*(\d+)')
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    One insight: a message emitted when its conditions hold for a record.
+
+    Conditions are dicts naming one subject, plus qualifiers for labs:
+
+    - ``{'medication': 'metformin'}``: a medication's name or generic name
+      contains the text
+    - ``{'indication': 'diabetes'}``: a medication's indication contains it
+    - ``{'condition': 'diabetes'}``: a medical history entry's name contains it
+    - ``{'icd': 'E11'}``: a condition or medication ICD-10 code starts with it
+    - ``{'lab': 'a1c', ...}``: a lab test whose name contains the text,
+      narrowed by ``trend`` (``'↑'``, ``'↓'`` or ``'→'``), ``out_of_range``
+      (latest value outside its reference range), ``above`` / ``below``
+      (latest value thresholds), ``within_days`` (has a result that
+      recent; the other qualifiers then only look at results from that
+      many days back) and ``min_results`` (has at least that many results)
+    - ``{'age_at_least': 50}``: lower bound of the age or age range
+
+    ``'*'`` matches any entry. The rule fires when every ``all`` condition,
+    at least one ``any`` condition (if there are any) and no ``none``
+    condition holds. The message is formatted with the entries matched by
+    the first condition that held: ``{count}`` and ``{names}``, and for
+    labs ``{lab}``, ``{value}`` (with its unit), ``{direction}`` and
+    ``{trend}``. With ``each``, one insight is emitted per matched entry.
+    """
+    name: str
+    category: str
+    message: str
+    all: Tuple[Mapping[str, Any], ...] = ()
+    any: Tuple[Mapping[str, Any], ...] = ()
+    none: Tuple[Mapping[str, Any], ...] = ()
+    each: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> 'Rule':
+        """Build a rule from its JSON form, e.g. one entry of a rules file."""
+        return cls(
+            name=data['name'],
+            category=data['category'],
+            message=data['message'],
+            all=tuple(data.get('all', ())),
+            any=tuple(data.get('any', ())),
+            none=tuple(data.get('none', ())),
+            each=bool(data.get('each', False)),
+        )
+
+
+class _LabFacts:
+    """One lab test of a record; series statistics are computed on first use."""
+
+    __slots__ = ('name', 'key', 'last_date', 'dates', '_record', '_since', '_series', '_windows')
+
+    def __init__(self, name: str, record: HealthRecord, since: Optional[datetime] = None):
+        self.name = name
+        self.key = name.lower()
+        self.last_date: Optional[datetime] = None
+        self.dates: List[datetime] = []
+        self._record = record
+        self._since = since
+        self._series: Optional['LabSeries'] = None
+        self._windows: Optional[Dict[datetime, '_LabFacts']] = None
+
+    @property
+    def series(self) -> 'LabSeries':
+        if self._series is None:
+            series = self._record.lab_series[self.name].valid()
+            self._series = series if self._since is None else series.window(self._since)
+        return self._series
+
+    def since(self, cutoff: datetime) -> '_LabFacts':
+        """The same test limited to results dated on or after ``cutoff``."""
+        if self._windows is None:
+            self._windows = {}
+        windowed = self._windows.get(cutoff)
+        if windowed is None:
+            windowed = self._windows[cutoff] = _LabFacts(self.name, self._record, cutoff)
+            windowed.dates = [day for day in self.dates if day >= cutoff]
+            windowed.last_date = max(windowed.dates, default=None)
+        return windowed
+
+    def trend(self) -> Optional[str]:
+        return self.series.trend()
+
+    def latest_value(self) -> Optional[float]:
+        series = self.series
+        return float(series.values[-1]) if len(series) else None
+
+    def direction(self) -> Optional[str]:
+        """``'above'`` or ``'below'`` when the latest value is out of range."""
+        series = self.series
+        if not len(series):
+            return None
+        if series.above_range()[-1]:
+            return 'above'
+        if series.below_range()[-1]:
+            return 'below'
+        return None
+
+
+class RecordFacts:
+    """Everything rules look at, taken from a record in a single pass."""
+
+    __slots__ = ('now', 'medications', 'conditions', 'codes', 'labs', 'age')
+
+    def __init__(self, record: HealthRecord, now: datetime):
+        self.now = now
+        self.medications = [
+            (f"{med.name} {med.generic_name or ''}".lower(), (med.indication or '').lower(), med)
+            for med in record.medications
+        ]
+        self.conditions = [(condition.condition.lower(), condition) for condition in record.medical_history]
+
+        codes = {code.upper() for med in record.medications for code in med.icd_codes}
+        codes.update(c.icd_code.upper() for c in record.medical_history if c.icd_code)
+        self.codes = sorted(codes)
+
+        labs: Dict[str, _LabFacts] = {}
+        for lab in record.lab_results:
+            facts = labs.get(lab.name)
+            if facts is None:
+                facts = labs[lab.name] = _LabFacts(lab.name, record)
+            if lab.date:
+                facts.dates.append(lab.date)
+                if facts.last_date is None or lab.date > facts.last_date:
+                    facts.last_date = lab.date
+        self.labs = list(labs.values())
+
+        demographics = record.demographics
+        match = _AGE_RE.match(demographics.get('age') or demographics.get('age_range') or '')
+        self.age = int(match.group(1)) if match else None
+
+
+def _contains(text: str) -> Callable[[str], bool]:
+    if text == '*':
+        return lambda value: True
+    text = text.lower()
+    return lambda value: text in value
+
+
+def _lab_predicate(spec: Mapping[str, Any]) -> Predicate:
+    matches_name = _contains(spec['lab'])
+    trend = spec.get('trend')
+    out_of_range = spec.get('out_of_range')
+    above = spec.get('above')
+    below = spec.get('below')
+    within = timedelta(days=spec['within_days']) if spec.get('within_days') is not None else None
+    min_results = spec.get('min_results')
+
+    def predicate(facts: RecordFacts) -> Matches:
+        matched = []
+        for lab in facts.labs:
+            if not matches_name(lab.key):
+                continue
+            if within is not None:
+                # Whole days, as LabSeries.window() counts them
+                cutoff = datetime.combine((facts.now - within).date(), time())
+                if lab.last_date is None or lab.last_date < cutoff:
+                    continue
+                # Trends, values and counts only look at the window
+                lab = lab.since(cutoff)
+            if min_results is not None and len(lab.dates) < min_results:
+                continue
+            if trend is not None and lab.trend() != trend:
+                continue
+            if out_of_range is not None and (lab.direction() is not None) != out_of_range:
+                continue
+            if above is not None or below is not None:
+                value = lab.latest_value()
+                if value is None or (above is not None and value <= above) or (below is not None and value >= below):
+                    continue
+            matched.append(lab)
+        return matched
+    return predicate
+
+
+def compile_condition(spec: Mapping[str, Any]) -> Predicate:
+    """Compile one condition dict (see :class:`Rule`) into a predicate over RecordFacts."""
+    subjects = [key for key in spec if key not in _LAB_QUALIFIERS]
+    if len(subjects) != 1:
+        raise ValueError(f"A condition names exactly one subject, got {sorted(spec)}")
+    subject = subjects[0]
+    if subject != 'lab' and any(key in spec for key in _LAB_QUALIFIERS):
+        raise ValueError(f"Lab qualifiers only apply to 'lab' conditions: {dict(spec)}")
+
+    if subject == 'lab':
+        return _lab_predicate(spec)
+    if subject == 'medication':
+        matches = _contains(spec[subject])
+        return lambda facts: [med for text, _, med in facts.medications if matches(text)]
+    if subject == 'indication':
+        matches = _contains(spec[subject])
+        return lambda facts: [med for _, indication, med in facts.medications if matches(indication)]
+    if subject == 'condition':
+        matches = _contains(spec[subject])
+        return lambda facts: [condition for name, condition in facts.conditions if matches(name)]
+    if subject == 'icd':
+        prefix = str(spec[subject]).strip().upper()
+        return lambda facts: [code for code in facts.codes if code.startswith(prefix)]
+    if subject == 'age_at_least':
+        minimum = spec[subject]
+        return lambda facts: [facts.age] if facts.age is not None and facts.age >= minimum else []
+    raise ValueError(f"Unknown condition subject: {subject!r}")
+
+
+def _condition_key(spec: Mapping[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple(sorted((key, str(value)) for key, value in spec.items()))
+
+
+def _entry_name(entry: Any) -> str:
+    if isinstance(entry, str):
+        return entry
+    if isinstance(entry, int):
+        return str(entry)
+    return getattr(entry, 'name', None) or getattr(entry, 'condition', None) or str(entry)
+
+
+def _format(message: str, entry: Any, matched: Matches) -> str:
+    fields = {'count': len(matched), 'names': ', '.join(_entry_name(m) for m in matched)}
+    if isinstance(entry, _LabFacts):
+        value = entry.latest_value()
+        unit = entry.series.unit
+        fields.update(
+            lab=entry.name,
+            value='' if value is None else f"{value:g}{' ' + unit if unit else ''}",
+            direction=entry.direction() or 'within',
+            trend=entry.trend() or '',
+        )
+    return message.format(**fields)
+
+
+@dataclass
+class Screening:
+    """
+    Outcome of screening a cohort with a RuleSet.
+
+    ``fired`` is a boolean matrix with one row per record and one column
+    per rule; ``insights`` holds each record's messages by category.
+    """
+    rules: Tuple[Rule, ...]
+    record_ids: List[str]
+    fired: 'np.ndarray'
+    insights: List[Dict[str, List[str]]]
+    errors: List['ParseResult'] = field(default_factory=list)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of records each rule fired for."""
+        totals = self.fired.sum(axis=0) if len(self.record_ids) else [0] * len(self.rules)
+        return {rule.name: int(total) for rule, total in zip(self.rules, totals)}
+
+    def matching(self, rule_name: str) -> List[str]:
+        """Ids of the records ``rule_name`` fired for."""
+        column = [rule.name for rule in self.rules].index(rule_name)
+        return [self.record_ids[i] for i in self.fired[:, column].nonzero()[0]]
+
+
+class RuleSet:
+    """
+    Insight rules compiled into predicates.
+
+    Identical conditions shared by several rules are compiled and
+    evaluated once. evaluate() extracts a record's facts in one pass and
+    checks every rule against them; screen() does the same for a whole
+    cohort. Conditions are still evaluated record by record in Python;
+    only combining them into rule results is done on a NumPy matrix per
+    chunk of records. screen() and the lab trend and range qualifiers
+    need NumPy, from the ``analytics`` extra.
+
+    >>> rules = RuleSet(DEFAULT_RULES)
+    >>> rules.evaluate(record)['care_gaps']
+    >>> screening = rules.screen_paths(paths, now=as_of)
+    >>> screening.matching('medications_without_monitoring')
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = tuple(rules)
+        self.categories = tuple(dict.fromkeys(rule.category for rule in self.rules))
+        self._predicates: List[Predicate] = []
+        positions: Dict[Tuple[Tuple[str, Any], ...], int] = {}
+
+        def position(spec: Mapping[str, Any]) -> int:
+            key = _condition_key(spec)
+            if key not in positions:
+                positions[key] = len(self._predicates)
+                self._predicates.append(compile_condition(spec))
+            return positions[key]
+
+        self._plans = [
+            (tuple(map(position, rule.all)), tuple(map(position, rule.any)), tuple(map(position, rule.none)))
+            for rule in self.rules
+        ]
+
+    @classmethod
+    def from_dicts(cls, data: Iterable[Mapping[str, Any]]) -> 'RuleSet':
+        return cls(Rule.from_dict(item) for item in data)
+
+    def _match(self, record: HealthRecord, now: datetime) -> List[Matches]:
+        facts = RecordFacts(record, now)
+        return [predicate(facts) for predicate in self._predicates]
+
+    def _messages(self, index: int, matches: List[Matches]) -> List[str]:
+        rule = self.rules[index]
+        held = [matches[i] for i in self._plans[index][0] + self._plans[index][1] if matches[i]]
+        matched = held[0] if held else []
+        if rule.each:
+            return [_format(rule.message, entry, matched) for entry in matched]
+        return [_format(rule.message, matched[0] if matched else None, matched)]
+
+    def evaluate(self, record: HealthRecord, now: Optional[datetime] = None) -> Dict[str, List[str]]:
+        """Messages of every rule that fires for ``record``, by category."""
+        matches = self._match(record, now or datetime.now())
+        insights: Dict[str, List[str]] = {category: [] for category in self.categories}
+        for index, (all_of, any_of, none_of) in enumerate(self._plans):
+            if (all(matches[i] for i in all_of)
+                    and (not any_of or any(matches[i] for i in any_of))
+                    and not any(matches[i] for i in none_of)):
+                insights[self.rules[index].category].extend(self._messages(index, matches))
+        return insights
+
+    def _fire(self, hits: 'np.ndarray') -> 'np.ndarray':
+        """Rule results (records x rules) from condition results (records x conditions)."""
+        np = _numpy()
+        fired = np.ones((hits.shape[0], len(self.rules)), dtype=bool)
+        for index, (all_of, any_of, none_of) in enumerate(self._plans):
+            column = fired[:, index]
+            if all_of:
+                column &= hits[:, all_of].all(axis=1)
+            if any_of:
+                column &= hits[:, any_of].any(axis=1)
+            if none_of:
+                column &= ~hits[:, none_of].any(axis=1)
+        return fired
+
+    def _screen(self, records: Iterable[Tuple[str, HealthRecord]], now: Optional[datetime],
+                chunk_size: int) -> Screening:
+        np = _numpy()
+        now = now or datetime.now()
+        record_ids: List[str] = []
+        blocks: List[np.ndarray] = []
+        insights: List[Dict[str, List[str]]] = []
+
+        iterator = iter(records)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            matches = [self._match(record, now) for _, record in chunk]
+            hits = np.array([[bool(m) for m in row] for row in matches], dtype=bool)
+            fired = self._fire(hits.reshape(len(chunk), len(self._predicates)))
+            for (record_id, _), row, record_matches in zip(chunk, fired, matches):
+                found: Dict[str, List[str]] = {}
+                for index in row.nonzero()[0]:
+                    found.setdefault(self.rules[index].category, []).extend(self._messages(index, record_matches))
+                record_ids.append(record_id)
+                insights.append(found)
+            blocks.append(fired)
+
+        fired = np.concatenate(blocks) if blocks else np.zeros((0, len(self.rules)), dtype=bool)
+        return Screening(self.rules, record_ids, fired, insights)
+
+    def screen(self, records: Iterable[HealthRecord], now: Optional[datetime] = None,
+               chunk_size: int = 1024) -> Screening:
+        """
+        Evaluate every rule over a cohort of records.
+
+        Records are consumed ``chunk_size`` at a time and not kept, so a
+        generator over a large corpus screens in bounded memory. Records
+        are identified by their frontmatter ``record_id``, else by position.
+        """
+        return self._screen(
+            ((str(record.frontmatter.get('record_id') or position), record)
+             for position, record in enumerate(records)),
+            now, chunk_size,
+        )
+
+    def screen_paths(self, paths: Iterable[Union[str, Path]], now: Optional[datetime] = None,
+                     workers: Optional[int] = None, chunk_size: int = 1024) -> Screening:
+        """Parse files in parallel and screen them; records are identified by path."""
+        errors: List['ParseResult'] = []
+        results: Iterator['ParseResult'] = HealthRecord.parse_many(paths, workers=workers, ordered=True,
+                                                                   errors=errors)
+        screening = self._screen(((result.path, result.record) for result in results), now, chunk_size)
+        screening.errors = errors
+        return screening
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """NumPy, imported on first use."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Screening needs NumPy: pip install 'health-md[analytics]'") from None
+    return numpy
+
+
+DEFAULT_RULES: Tuple[Rule, ...] = (
+    Rule('diabetes_medications', 'medication_insights',
+         'Patient is on {count} diabetes medication(s)',
+         all=({'indication': 'diabetes'},)),
+    Rule('a1c_improving', 'lab_trends',
+         'HbA1c trending downward - good glycemic control',
+         all=({'lab': 'a1c', 'trend': '↓', 'within_days': 180, 'min_results': 2},)),
+    Rule('medications_without_monitoring', 'care_gaps',
+         'Patient on medications but no recent lab monitoring',
+         all=({'medication': '*'},), none=({'lab': '*', 'within_days': 180},)),
+    Rule('cardiovascular_risk', 'risk_factors',
+         'Increased cardiovascular risk - consider lipid monitoring',
+         any=({'age_at_least': 50}, {'condition': 'diabetes'})),
+)
+
+# Opt-in rules that go beyond the default insights:
+# RuleSet(DEFAULT_RULES + LAB_RANGE_RULES)
+LAB_RANGE_RULES: Tuple[Rule, ...] = (
+    Rule('latest_lab_out_of_range', 'lab_trends',
+         'Latest {lab} ({value}) is {direction} reference range',
+         all=({'lab': '*', 'out_of_range': True},), each=True),
+)
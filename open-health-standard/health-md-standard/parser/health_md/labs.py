@@ -0,0 +1,177 @@
+"""
+Health.md Labs - Columnar lab series with vectorized flagging and trends
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("Lab series need NumPy: pip install 'health-md[analytics]'") from None
+
+from .parser import LabResult
+from .values import (
+    STABLE_THRESHOLD, TREND_DOWN, TREND_STABLE, TREND_UP, parse_reference_range, parse_value,
+)
+
+
+def _day(date: datetime) -> np.datetime64:
+    return np.datetime64(date.date() if isinstance(date, datetime) else date, 'D')
+
+
+class LabSeries:
+    """
+    Columnar view of every result of one lab test, sorted by date.
+
+    ``dates`` (datetime64[D]), ``values`` (float64, NaN when the value is
+    not numeric), ``units`` (object) and the parsed reference bounds
+    ``low``/``high`` (float64, NaN when absent) are parallel arrays, so
+    flagging, trends and windowed aggregates run vectorized.
+    """
+
+    def __init__(self, name: str, dates: np.ndarray, values: np.ndarray, units: np.ndarray,
+                 low: np.ndarray, high: np.ndarray):
+        self.name = name
+        self.dates = dates
+        self.values = values
+        self.units = units
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def from_results(cls, name: str, results: Iterable[LabResult]) -> 'LabSeries':
+        """Build a series from LabResults; results without a date are skipped."""
+        rows = sorted((r for r in results if r.date is not None), key=lambda r: r.date)
+
+        values = np.full(len(rows), np.nan)
+        low = np.full(len(rows), np.nan)
+        high = np.full(len(rows), np.nan)
+        units = np.empty(len(rows), dtype=object)
+
+        for i, result in enumerate(rows):
+            value, unit = parse_value(result.value)
+            if value is not None:
+                values[i] = value
+            units[i] = result.units or unit
+            lower, upper = parse_reference_range(result.reference_range)
+            if lower is not None:
+                low[i] = lower
+            if upper is not None:
+                high[i] = upper
+
+        dates = np.array([_day(r.date) for r in rows], dtype='datetime64[D]')
+        return cls(name, dates, values, units, low, high)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        return f"LabSeries({self.name!r}, n={len(self)})"
+
+    @property
+    def unit(self) -> Optional[str]:
+        """Most common unit across the series."""
+        counts = Counter(u for u in self.units if u)
+        return counts.most_common(1)[0][0] if counts else None
+
+    def _subset(self, mask: np.ndarray) -> 'LabSeries':
+        return LabSeries(self.name, self.dates[mask], self.values[mask], self.units[mask],
+                         self.low[mask], self.high[mask])
+
+    def valid(self) -> 'LabSeries':
+        """Only the results with a numeric value."""
+        return self._subset(~np.isnan(self.values))
+
+    def below_range(self) -> np.ndarray:
+        """Boolean mask of values under their lower reference bound."""
+        with np.errstate(invalid='ignore'):
+            return self.values < self.low
+
+    def above_range(self) -> np.ndarray:
+        """Boolean mask of values over their upper reference bound."""
+        with np.errstate(invalid='ignore'):
+            return self.values > self.high
+
+    def out_of_range(self) -> np.ndarray:
+        """Boolean mask of values outside their reference range."""
+        return self.below_range() | self.above_range()
+
+    def flags(self) -> np.ndarray:
+        """Per-result flag: ``'L'`` below range, ``'H'`` above range, else ``''``."""
+        return np.where(self.below_range(), 'L', np.where(self.above_range(), 'H', ''))
+
+    def slope(self) -> Optional[float]:
+        """Least-squares change in value per day, or None without two dated values."""
+        series = self.valid()
+        if len(series) < 2:
+            return None
+        days = (series.dates - series.dates[0]).astype(np.float64)
+        centered = days - days.mean()
+        spread = np.dot(centered, centered)
+        if spread == 0:
+            return None
+        return float(np.dot(centered, series.values - series.values.mean()) / spread)
+
+    def trend(self, threshold: float = STABLE_THRESHOLD) -> Optional[str]:
+        """
+        Direction of the fitted trend: ``↑``, ``↓`` or ``→`` when the fitted
+        change across the series is under ``threshold`` of its mean value.
+        """
+        slope = self.slope()
+        if slope is None:
+            return None
+        series = self.valid()
+        span = float((series.dates[-1] - series.dates[0]).astype(np.float64))
+        scale = abs(float(series.values.mean())) or 1.0
+        change = slope * span / scale
+        if abs(change) < threshold:
+            return TREND_STABLE
+        return TREND_UP if change > 0 else TREND_DOWN
+
+    def window(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> 'LabSeries':
+        """Results dated within ``[start, end]``; either bound may be open."""
+        lo = 0 if start is None else np.searchsorted(self.dates, _day(start), side='left')
+        hi = len(self) if end is None else np.searchsorted(self.dates, _day(end), side='right')
+        return self._subset(slice(lo, hi))
+
+    def rolling_mean(self, days: int) -> np.ndarray:
+        """Mean of the numeric values in the trailing ``days`` window ending at each result."""
+        valid = ~np.isnan(self.values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(valid, self.values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(valid)))
+        left = np.searchsorted(self.dates, self.dates - np.timedelta64(days, 'D'), side='right')
+        right = np.arange(1, len(self) + 1)
+        totals = counts[right] - counts[left]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(totals > 0, (sums[right] - sums[left]) / totals, np.nan)
+
+    def aggregate(self, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> Dict[str, Optional[float]]:
+        """Count, min, max and mean of the numeric values within a date window."""
+        values = self.window(start, end).values
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return {'count': 0, 'min': None, 'max': None, 'mean': None}
+        return {
+            'count': int(len(values)),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'mean': float(values.mean()),
+        }
+
+    def latest(self) -> Optional[Tuple[datetime, float]]:
+        """Date and value of the most recent numeric result."""
+        series = self.valid()
+        if not len(series):
+            return None
+        return series.dates[-1].astype('datetime64[s]').astype(datetime), float(series.values[-1])
+
+
+def build_lab_series(results: Iterable[LabResult]) -> Dict[str, LabSeries]:
+    """Group lab results by test name into one LabSeries per test."""
+    grouped: Dict[str, List[LabResult]] = {}
+    for result in results:
+        grouped.setdefault(result.name, []).append(result)
+    return {name: LabSeries.from_results(name, rows) for name, rows in grouped.items()}
@@ -2,17 +2,48 @@
 Health.md Parser - Core parsing functionality for Health.md files
 """
 
-import yaml
+import hashlib
+import io
 import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+import sys
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
-import markdown
-from bs4 import BeautifulSoup
 
+from .dateindex import DateIndex
+from .dates import DEFAULT_DATE_PARSER, DateParser
+from .frontmatter import load_frontmatter, split_frontmatter
+from .sections import SectionTree
+from .stats import ParseStats, hooks_installed
+from .values import parse_value
 
-@dataclass
+if TYPE_CHECKING:
+    from .batch import ParseResult
+    from .cache import RecordCache
+    from .context import ContextBuilder, ContextSection
+    from .incremental import FieldChange
+    from .labs import LabSeries
+    from .validators import ValidationReport
+
+
+# Bump whenever extraction output changes; invalidates on-disk record caches
+PARSER_VERSION = 4
+
+# Entities are slotted where dataclasses support it (Python 3.10+), which
+# drops the per-instance __dict__ when holding large cohorts in memory.
+_ENTITY_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Intern a categorical string so repeats across records share one object."""
+    return sys.intern(value) if value else value
+
+
+@dataclass(**_ENTITY_OPTIONS)
 class Medication:
     """Represents a medication entry from a Health.md file."""
     name: str
@@ -31,7 +62,7 @@ class Medication:
             self.icd_codes = []
 
 
-@dataclass  
+@dataclass(**_ENTITY_OPTIONS)
 class LabResult:
     """Represents a lab result from a Health.md file."""
     name: str
@@ -43,7 +74,7 @@ class LabResult:
     trend: Optional[str] = None  # ↑, ↓, →, etc.
     
     
-@dataclass
+@dataclass(**_ENTITY_OPTIONS)
 class VitalSign:
     """Represents a vital sign measurement."""
     name: str
@@ -53,7 +84,7 @@ class VitalSign:
     notes: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_ENTITY_OPTIONS)
 class ClinicalEvent:
     """Represents an event in the clinical timeline."""
     date: datetime
@@ -66,336 +97,715 @@ class ClinicalEvent:
     notes: Optional[str] = None
 
 
+class Condition(Mapping):
+    """
+    Represents a condition from the medical history.
+
+    Slotted, but reads like the dict it replaces: ``condition['condition']``,
+    ``condition.get('icd_code')`` and ``dict(condition)`` all work.
+    """
+    __slots__ = ('condition', 'onset', 'content', 'icd_code')
+
+    def __init__(self, condition: str, onset: Optional[datetime] = None,
+                 content: Optional[str] = None, icd_code: Optional[str] = None):
+        self.condition = condition
+        self.onset = onset
+        self.content = content
+        self.icd_code = icd_code
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__ and (key != 'icd_code' or self.icd_code is not None):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield 'condition'
+        yield 'onset'
+        yield 'content'
+        if self.icd_code is not None:
+            yield 'icd_code'
+
+    def __len__(self) -> int:
+        return 3 if self.icd_code is None else 4
+
+    def __repr__(self) -> str:
+        return f"Condition({dict(self)!r})"
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: Tuple[Any, ...]):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+# Fields interned by the extractors, per entity type
+_INTERNED_FIELDS = {
+    Medication: ('name', 'generic_name', 'indication', 'route', 'frequency', 'prescriber'),
+    LabResult: ('name', 'reference_range', 'units', 'trend'),
+    VitalSign: ('name', 'units'),
+    ClinicalEvent: ('provider_type', 'visit_type'),
+    Condition: ('condition', 'icd_code'),
+}
+
+# Bullet lines ("- item", "* item"); group 1 is the indent
+_BULLET_RE = re.compile(r'^([ \t]*)[*\-][ \t]+(.*?)[ \t]*$')
+# "**Label:** value", "Label: value" inside a bullet
+_LABEL_RE = re.compile(r'^\*{0,2}([^*:]+?)\*{0,2}:\*{0,2}[ \t]*(.*)$')
+_REF_RE = re.compile(r'\((?:Ref|Normal):\s*([^)]+)\)')
+_TREND_RE = re.compile(r'[↑↓→]')
+_ICD_RE = re.compile(r'ICD-10:\s*([A-Z]\d{2}(?:\.\d+)?)')
+_ICD_FIELD_RE = re.compile(r'ICD-10:\*{0,2}\s*([A-Z]\d{2}(?:\.\d+)?)')
+# "Type 2 Diabetes (2024-01-15)" and "2024-02-10: Diabetes Follow-up"
+_DATED_TITLE_RE = re.compile(r'^(.+?)\s*\(([^)]+)\)\s*$')
+_EVENT_TITLE_RE = re.compile(r'^([^:]+):\s*(.+)$')
+
+_DEMOGRAPHIC_LABELS = {
+    'age': ('age',),
+    'age_range': ('age range',),
+    'sex': ('sex',),
+    'gender_identity': ('gender identity',),
+    'occupation': ('occupation', 'occupation category'),
+    'location': ('location', 'location region'),
+}
+
+_MEDICATION_LABELS = {
+    'generic_name': 'generic name',
+    'indication': 'indication',
+    'dosage': 'dosage',
+    'route': 'route',
+    'frequency': 'frequency',
+    'prescriber': 'prescriber',
+    'notes': 'clinical notes',
+}
+
+_INTERNED_MEDICATION_FIELDS = set(_INTERNED_FIELDS[Medication])
+_INTERNED_EVENT_FIELDS = set(_INTERNED_FIELDS[ClinicalEvent])
+
+_EVENT_LABELS = {
+    'provider_type': ('provider type', 'provider'),
+    'visit_type': ('visit type',),
+    'chief_complaint': ('chief complaint',),
+    'assessment': ('assessment',),
+    'plan': ('plan',),
+    'notes': ('clinical notes', 'notes'),
+}
+
+# Lab block fields that describe the test rather than report a result
+_LAB_METADATA_LABELS = {
+    'reference range',
+    'clinical significance',
+    'clinical notes',
+    'clinical plan',
+    'trend',
+    'next due',
+}
+
+_ALLERGY_CATEGORIES = {
+    'drug_allergies': 'drug_allergies',
+    'environmental_allergies': 'environmental_allergies',
+    'food_intolerances': 'food_intolerances',
+    'food_sensitivities': 'food_intolerances',
+}
+
+# List fields extracted block by block: the section whose children are the
+# blocks, and the method parsing one block's title and body
+_BLOCK_FIELDS = {
+    'medications': ('current_medications', '_parse_single_medication'),
+    'lab_results': ('lab_results', '_parse_single_lab_test'),
+    'vital_signs': ('vital_signs', '_parse_single_vital'),
+    'clinical_timeline': ('clinical_timeline', '_parse_single_event'),
+    'medical_history': ('medical_history', '_parse_single_condition'),
+}
+
+# Section each extractor reads, for the input sizes in parse_stats
+_STAGE_SECTIONS = {
+    'demographics': 'demographics',
+    'allergies': 'allergies_&_intolerances',
+    **{field: parent for field, (parent, _) in _BLOCK_FIELDS.items()},
+}
+
+
+def _iter_fields(content: str) -> List[Tuple[str, str]]:
+    """
+    Collect the top-level ``- **Label:** value`` bullets of a block in one pass.
+
+    A field whose value is empty takes its nested bullets, joined with
+    ``; ``, as its value (e.g. a multi-line **Plan:**).
+    """
+    fields = []
+    nested = None
+
+    for line in content.split('\n'):
+        bullet = _BULLET_RE.match(line)
+        if not bullet:
+            continue
+        indent, item = bullet.groups()
+
+        if indent:
+            if nested is not None:
+                nested.append(item)
+            continue
+
+        if nested:
+            label, _ = fields[-1]
+            fields[-1] = (label, '; '.join(nested))
+        nested = None
+
+        labelled = _LABEL_RE.match(item)
+        if labelled:
+            label, value = labelled.group(1).strip(), labelled.group(2).strip()
+            fields.append((label, value))
+            if not value:
+                nested = []
+
+    if nested:
+        label, _ = fields[-1]
+        fields[-1] = (label, '; '.join(nested))
+
+    return fields
+
+
+def _digest(text: str) -> str:
+    """Short content hash identifying a section's text."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _field_map(content: str) -> Dict[str, str]:
+    """Map lower-cased field labels to values; the first occurrence wins."""
+    fields = {}
+    for label, value in _iter_fields(content):
+        fields.setdefault(label.lower(), value)
+    return fields
+
+
 class HealthRecord:
     """
     Main class for parsing and working with Health.md files.
     
     Provides methods to extract structured data and generate
-    LLM-optimized summaries.
+    LLM-optimized summaries. Structured attributes are extracted
+    on first access and memoized.
     """
     
-    def __init__(self, content: str):
+    # Structured attributes, each extracted on first access
+    STRUCTURED_FIELDS = (
+        'demographics',
+        'medications',
+        'lab_results',
+        'vital_signs',
+        'clinical_timeline',
+        'allergies',
+        'medical_history',
+    )
+
+    # Derived data that is cheap to rebuild, so left out of pickles
+    _TRANSIENT_FIELDS = ('_split_content', 'markdown_content', 'sections', 'lab_series',
+                         'lab_index', 'vital_index', 'timeline_index', 'context_builder', 'date_parser',
+                         'parse_stats')
+
+    # Shared by default; pass a DateParser with a fixed clock to make
+    # relative dates ("3 months ago") deterministic
+    date_parser: DateParser = DEFAULT_DATE_PARSER
+
+    # Per-stage timings, or None when the record is not profiled
+    parse_stats: Optional[ParseStats] = None
+
+    def __init__(self, content: str, date_parser: Optional[DateParser] = None,
+                 profile: bool = False):
+        """
+        Args:
+            content: Health.md text
+            date_parser: Parser for entry dates (default: shared DEFAULT_DATE_PARSER)
+            profile: Record per-stage timings in ``parse_stats``; always on
+                while a hook from :func:`health_md.stats.add_stats_hook` is
+                registered
+        """
         self.raw_content = content
-        self._parse_content()
+        if profile or hooks_installed():
+            self.parse_stats = ParseStats()
+        # Per list field, the entities extracted from each block, keyed by
+        # the block's content hash; lets update() skip unchanged blocks
+        self._block_entities: Dict[str, Dict[str, List[Any]]] = {}
+        if date_parser is not None:
+            self.date_parser = date_parser
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        for name in self._TRANSIENT_FIELDS:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        # Interning does not survive pickling; restore it so records coming
+        # back from worker processes or the cache share categorical strings
+        for name in ('medications', 'lab_results', 'vital_signs', 'clinical_timeline', 'medical_history'):
+            for entity in state.get(name, ()):
+                for field in _INTERNED_FIELDS[type(entity)]:
+                    setattr(entity, field, _intern(getattr(entity, field)))
+        for med in state.get('medications', ()):
+            med.icd_codes = [_intern(code) for code in med.icd_codes]
     
     @classmethod
-    def from_file(cls, filepath: Union[str, Path]) -> 'HealthRecord':
-        """Load a Health.md file and create a HealthRecord instance."""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return cls(content)
+    def from_file(cls, filepath: Union[str, Path],
+                  cache: Optional[Union[str, Path, 'RecordCache']] = None,
+                  profile: bool = False) -> 'HealthRecord':
+        """
+        Load a Health.md file and create a HealthRecord instance.
+
+        Args:
+            filepath: Path to the Health.md file
+            cache: Optional cache directory (or RecordCache); unchanged
+                files are then loaded from the cache instead of reparsed
+            profile: Record per-stage timings in ``parse_stats``, starting
+                with the file read (``cache`` on a cache hit)
+        """
+        start = time.perf_counter()
+        if cache is not None:
+            from .cache import RecordCache
+            if not isinstance(cache, RecordCache):
+                cache = RecordCache(cache)
+            record = cache.load(filepath, cls, profile=profile)
+            stage, size = None, 0
+            # A miss has already timed the read and parse stages
+            if record.parse_stats is None and (profile or hooks_installed()):
+                record.parse_stats = ParseStats()
+                stage, size = 'cache', len(record.raw_content)
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+            record = cls(content, profile=profile)
+            stage, size = 'read', len(content)
+
+        if record.parse_stats is not None and stage is not None:
+            record.parse_stats.path = str(filepath)
+            record.parse_stats.add(stage, time.perf_counter() - start, size)
+        return record
+
+    @classmethod
+    def from_stream(cls, lines: Iterable[str]) -> 'HealthRecord':
+        """
+        Build a HealthRecord from a line iterator or open file handle.
+
+        Entries are extracted block by block without holding the whole
+        file in memory; see :func:`health_md.stream.iter_entries` to
+        consume them as a generator instead.
+        """
+        from .stream import build_record
+        return build_record(lines, cls(''))
+
+    @classmethod
+    def parse_many(cls, paths: Iterable[Union[str, Path]], workers: Optional[int] = None,
+                   ordered: bool = False, **kwargs) -> Iterator['ParseResult']:
+        """
+        Parse many Health.md files in parallel.
+
+        See :func:`health_md.batch.parse_many` for the available options.
+        """
+        from .batch import parse_many
+        return parse_many(paths, workers=workers, ordered=ordered, **kwargs)
     
+    def update(self, new_content: str) -> Dict[str, 'FieldChange']:
+        """
+        Replace the record's content, re-extracting only what changed.
+
+        Blocks (a medication, a lab test, a timeline visit, ...) whose text
+        is unchanged keep their already extracted entities; only new or
+        edited blocks are parsed. Returns a FieldChange per structured
+        field that differs, listing the entities added and removed.
+        """
+        from .incremental import update_record
+        return update_record(self, new_content)
+
+    def validate(self, fail_fast: bool = False, strict: bool = False) -> 'ValidationReport':
+        """
+        Check the record against the SPEC.md validation rules.
+
+        The checks run as each field is extracted and reuse what extraction
+        produced, so validating and then using the record parses it once.
+        See :func:`health_md.validators.validate_record` for the options.
+        """
+        from .validators import validate_record
+        return validate_record(self, fail_fast=fail_fast, strict=strict)
+
     def _parse_content(self):
-        """Parse the raw markdown content into structured data."""
-        # Split frontmatter and content
-        parts = self.raw_content.split('---', 2)
-        if len(parts) >= 3:
-            self.frontmatter = yaml.safe_load(parts[1])
-            self.markdown_content = parts[2].strip()
+        """
+        Parse the raw markdown content into structured data.
+
+        Extraction is otherwise lazy; this runs every extractor up front.
+        """
+        self.frontmatter
+        for name in self.STRUCTURED_FIELDS:
+            getattr(self, name)
+
+    def compact(self) -> 'HealthRecord':
+        """
+        Extract everything, then release the source text.
+
+        Only the structured entities stay in memory, which is what you want
+        when holding a large cohort. ``raw_content`` and each condition's
+        ``content`` are cleared, so the record cannot be re-extracted, and
+        a later update() parses every block afresh.
+        """
+        self._parse_content()
+        for name in self._TRANSIENT_FIELDS:
+            self.__dict__.pop(name, None)
+        self.__dict__.pop('section_hashes', None)
+        self._block_entities = {}
+        for condition in self.medical_history:
+            condition.content = None
+        self.raw_content = ''
+        return self
+
+    @cached_property
+    def _split_content(self) -> Tuple[Optional[str], str]:
+        """Split the raw content into frontmatter text and markdown body."""
+        return split_frontmatter(self.raw_content)
+
+    @cached_property
+    def frontmatter(self) -> Dict[str, Any]:
+        """Parsed YAML frontmatter."""
+        frontmatter_text = self._split_content[0]
+        if frontmatter_text is None:
+            return {}
+        return self._timed('frontmatter', lambda: load_frontmatter(frontmatter_text))
+
+    @cached_property
+    def markdown_content(self) -> str:
+        """Markdown body following the frontmatter."""
+        return self._split_content[1]
+
+    @cached_property
+    def sections(self) -> SectionTree:
+        """Header tree shared by every extractor."""
+        return self._timed('sections', self._parse_sections)
+
+    @cached_property
+    def section_hashes(self) -> Dict[str, str]:
+        """Content hash of every section, header line included, by path."""
+        return {
+            section.path: _digest(section.source[section.start:section.end])
+            for section in self.sections.walk()
+        }
+
+    @cached_property
+    def demographics(self) -> Dict[str, Any]:
+        """Demographic fields such as age range, sex and location."""
+        return self._timed('demographics', self._parse_demographics)
+
+    @cached_property
+    def medications(self) -> List[Medication]:
+        """Current medications."""
+        return self._timed('medications', self._parse_medications)
+
+    @cached_property
+    def lab_results(self) -> List[LabResult]:
+        """Lab results in file order."""
+        return self._timed('lab_results', self._parse_lab_results)
+
+    @cached_property
+    def vital_signs(self) -> List[VitalSign]:
+        """Vital sign readings in file order."""
+        return self._timed('vital_signs', self._parse_vital_signs)
+
+    @cached_property
+    def clinical_timeline(self) -> List[ClinicalEvent]:
+        """Clinical timeline events in file order."""
+        return self._timed('clinical_timeline', self._parse_clinical_timeline)
+
+    @cached_property
+    def allergies(self) -> Dict[str, List[str]]:
+        """Allergies grouped by category."""
+        return self._timed('allergies', self._parse_allergies)
+
+    @cached_property
+    def medical_history(self) -> List[Condition]:
+        """Medical history conditions."""
+        return self._timed('medical_history', self._parse_medical_history)
+
+    @cached_property
+    def lab_index(self) -> DateIndex[LabResult]:
+        """Lab results sorted by date, for range queries."""
+        return DateIndex(self.lab_results)
+
+    @cached_property
+    def vital_index(self) -> DateIndex[VitalSign]:
+        """Vital signs sorted by date, for range queries."""
+        return DateIndex(self.vital_signs)
+
+    @cached_property
+    def timeline_index(self) -> DateIndex[ClinicalEvent]:
+        """Clinical events sorted by date, for range queries."""
+        return DateIndex(self.clinical_timeline)
+
+    @cached_property
+    def context_builder(self) -> 'ContextBuilder':
+        """Cached renderings of the record's facts for to_llm_context."""
+        from .context import ContextBuilder
+        return ContextBuilder(self)
+
+    @cached_property
+    def lab_series(self) -> Dict[str, 'LabSeries']:
+        """
+        Columnar LabSeries per test name, for vectorized range flagging,
+        trends and windowed aggregates (requires NumPy, the ``analytics`` extra).
+        """
+        from .labs import build_lab_series
+        return build_lab_series(self.lab_results)
+
+    def _timed(self, stage: str, extract: Callable[[], Any]) -> Any:
+        """Run one parse stage, adding its timing to parse_stats when profiling."""
+        stats = self.parse_stats
+        if stats is None:
+            return extract()
+
+        if stage in _STAGE_SECTIONS:
+            # Build the header tree first so it is timed as its own stage
+            # rather than billed to whichever extractor runs first
+            section = self.sections.get(_STAGE_SECTIONS[stage])
+            size = section.end - section.start if section is not None else 0
+        elif stage == 'sections':
+            size = len(self.markdown_content)
         else:
-            self.frontmatter = {}
-            self.markdown_content = self.raw_content
-        
-        # Parse markdown into sections
-        self.sections = self._parse_sections()
-        
-        # Extract structured data
-        self.demographics = self._parse_demographics()
-        self.medications = self._parse_medications()
-        self.lab_results = self._parse_lab_results()
-        self.vital_signs = self._parse_vital_signs()
-        self.clinical_timeline = self._parse_clinical_timeline()
-        self.allergies = self._parse_allergies()
-        self.medical_history = self._parse_medical_history()
-    
-    def _parse_sections(self) -> Dict[str, str]:
-        """Split markdown content into sections based on headers."""
-        sections = {}
-        current_section = None
-        current_content = []
-        
-        for line in self.markdown_content.split('\n'):
-            header_match = re.match(r'^(#{1,6})\s+(.+)$', line)
-            if header_match:
-                # Save previous section
-                if current_section:
-                    sections[current_section] = '\n'.join(current_content)
-                
-                # Start new section
-                level = len(header_match.group(1))
-                title = header_match.group(2)
-                current_section = title.lower().replace(' ', '_')
-                current_content = []
-            else:
-                current_content.append(line)
-        
-        # Save last section
-        if current_section:
-            sections[current_section] = '\n'.join(current_content)
-            
-        return sections
-    
+            size = len(self._split_content[0] or '')
+
+        start = time.perf_counter()
+        value = extract()
+        stats.add(stage, time.perf_counter() - start, size)
+        return value
+
+    def _parse_sections(self) -> SectionTree:
+        """Build the header tree for the markdown content."""
+        return SectionTree(self.markdown_content)
+
     def _parse_demographics(self) -> Dict[str, Any]:
         """Extract demographics information."""
-        demographics_section = self.sections.get('demographics', '')
+        section = self.sections.get('demographics')
+        if section is None:
+            return {}
+        return self._parse_demographic_fields(section.body)
+
+    def _parse_demographic_fields(self, content: str) -> Dict[str, Any]:
+        """Parse the fields of a demographics block."""
+        fields = _field_map(content)
         demographics = {}
-        
-        patterns = {
-            'age': r'[*\-]\s*\*?Age\*?:?\s*(.+)',
-            'age_range': r'[*\-]\s*\*?Age Range\*?:?\s*(.+)',
-            'sex': r'[*\-]\s*\*?Sex\*?:?\s*(.+)',
-            'gender_identity': r'[*\-]\s*\*?Gender Identity\*?:?\s*(.+)',
-            'occupation': r'[*\-]\s*\*?Occupation\*?:?\s*(.+)',
-            'location': r'[*\-]\s*\*?Location\*?:?\s*(.+)',
-        }
-        
-        for key, pattern in patterns.items():
-            match = re.search(pattern, demographics_section, re.IGNORECASE)
-            if match:
-                demographics[key] = match.group(1).strip()
-        
+        for key, labels in _DEMOGRAPHIC_LABELS.items():
+            for label in labels:
+                if fields.get(label):
+                    demographics[key] = fields[label]
+                    break
+
         return demographics
-    
+
+    def _parse_blocks(self, field: str, previous: Optional[Dict[str, List[Any]]] = None) -> List[Any]:
+        """
+        Extract a list field block by block.
+
+        The entities of each block are recorded under the block's content
+        hash; blocks whose hash is found in ``previous`` reuse those
+        entities instead of being parsed again.
+        """
+        parent, method = _BLOCK_FIELDS[field]
+        parse_block = getattr(self, method)
+        entities = []
+        extracted = {}
+        for block in self.sections.children(parent):
+            key = _digest(block.source[block.start:block.end])
+            found = previous.get(key) if previous else None
+            if found is None:
+                found = parse_block(block.title, block.body)
+                if found is None:
+                    found = []
+                elif not isinstance(found, list):
+                    found = [found]
+            extracted[key] = found
+            entities.extend(found)
+        self._block_entities[field] = extracted
+        return entities
+
     def _parse_medications(self) -> List[Medication]:
         """Extract current medications."""
-        medications_section = self.sections.get('current_medications', '')
-        medications = []
-        
-        # Split into individual medication blocks
-        med_blocks = re.split(r'\n### (.+)\n', medications_section)[1:]
-        
-        for i in range(0, len(med_blocks), 2):
-            if i + 1 < len(med_blocks):
-                med_name = med_blocks[i].strip()
-                med_content = med_blocks[i + 1]
-                
-                med = self._parse_single_medication(med_name, med_content)
-                medications.append(med)
-        
-        return medications
-    
+        return self._parse_blocks('medications')
+
     def _parse_single_medication(self, name: str, content: str) -> Medication:
         """Parse a single medication block."""
-        med = Medication(name=name)
-        
-        patterns = {
-            'generic_name': r'[*\-]\s*\*?Generic Name\*?:?\s*(.+)',
-            'indication': r'[*\-]\s*\*?Indication\*?:?\s*(.+)',
-            'dosage': r'[*\-]\s*\*?Dosage\*?:?\s*(.+)',
-            'route': r'[*\-]\s*\*?Route\*?:?\s*(.+)',
-            'prescriber': r'[*\-]\s*\*?Prescriber\*?:?\s*(.+)',
-            'notes': r'[*\-]\s*\*?Clinical Notes\*?:?\s*(.+)',
-        }
-        
-        for field, pattern in patterns.items():
-            match = re.search(pattern, content, re.IGNORECASE)
-            if match:
-                setattr(med, field, match.group(1).strip())
-        
-        # Parse started date
-        started_match = re.search(r'[*\-]\s*\*?Started\*?:?\s*(.+)', content, re.IGNORECASE)
-        if started_match:
-            date_str = started_match.group(1).strip()
-            med.started = self._parse_date(date_str)
-        
+        med = Medication(name=_intern(name))
+        fields = _field_map(content)
+
+        for field, label in _MEDICATION_LABELS.items():
+            if fields.get(label):
+                value = fields[label]
+                if field in _INTERNED_MEDICATION_FIELDS:
+                    value = _intern(value)
+                setattr(med, field, value)
+
+        if fields.get('started'):
+            med.started = self._parse_date(fields['started'])
+
         # Extract ICD codes
-        icd_matches = re.findall(r'ICD-10:\s*([A-Z]\d{2}(?:\.\d+)?)', content)
-        med.icd_codes = icd_matches
-        
+        med.icd_codes = [_intern(code) for code in _ICD_RE.findall(content)]
+
         return med
-    
+
     def _parse_lab_results(self) -> List[LabResult]:
         """Extract lab results from the file."""
-        lab_section = self.sections.get('lab_results', '')
-        lab_results = []
-        
-        # Parse individual lab tests
-        test_blocks = re.split(r'\n### (.+)\n', lab_section)[1:]
-        
-        for i in range(0, len(test_blocks), 2):
-            if i + 1 < len(test_blocks):
-                test_name = test_blocks[i].strip()
-                test_content = test_blocks[i + 1]
-                
-                results = self._parse_single_lab_test(test_name, test_content)
-                lab_results.extend(results)
-        
-        return lab_results
-    
+        return self._parse_blocks('lab_results')
+
     def _parse_single_lab_test(self, test_name: str, content: str) -> List[LabResult]:
-        """Parse a single lab test section."""
+        """
+        Parse a single lab test section.
+
+        Either a test with date-labelled rows ("### Hemoglobin A1C" with
+        "- **2024-02-10:** 6.8%") or a dated panel whose fields are analytes
+        ("### Basic Metabolic Panel (2024-02-10)" with "- **Glucose:** 125 mg/dL").
+        """
         results = []
-        
-        # Look for date-value pairs
-        date_value_pattern = r'[*\-]\s*\*?(\d{4}-\d{2}-\d{2})\*?:?\s*(.+)'
-        matches = re.findall(date_value_pattern, content)
-        
-        for date_str, value_info in matches:
+        fields = _iter_fields(content)
+        labels = {label.lower(): value for label, value in reversed(fields)}
+        significance = labels.get('clinical significance')
+        block_range = labels.get('reference range')
+
+        panel_date = None
+        title_match = _DATED_TITLE_RE.match(test_name)
+        if title_match:
+            panel_date = self._parse_date(title_match.group(2))
+
+        for label, value_info in fields:
+            if label.lower() in _LAB_METADATA_LABELS:
+                continue
+
+            date = self._parse_date(label)
+            if date is not None:
+                name = test_name
+                reference_range = block_range
+            elif panel_date is not None and parse_value(value_info)[0] is not None:
+                name, date, reference_range = label, panel_date, None
+            else:
+                continue
+
             result = LabResult(
-                name=test_name,
-                date=self._parse_date(date_str),
-                value=value_info.strip()
+                name=_intern(name),
+                date=date,
+                value=value_info,
+                units=_intern(parse_value(value_info)[1]),
+                clinical_significance=significance
             )
-            
+
             # Extract reference range if present
-            ref_match = re.search(r'\(Ref:\s*([^)]+)\)', value_info)
+            ref_match = _REF_RE.search(value_info)
             if ref_match:
-                result.reference_range = ref_match.group(1)
-            
-            # Extract trend if present  
-            trend_match = re.search(r'[↑↓→]', value_info)
+                reference_range = ref_match.group(1)
+            result.reference_range = _intern(reference_range)
+
+            # Extract trend if present
+            trend_match = _TREND_RE.search(value_info)
             if trend_match:
-                result.trend = trend_match.group(0)
-            
+                result.trend = _intern(trend_match.group(0))
+
             results.append(result)
-        
+
         return results
-    
+
     def _parse_vital_signs(self) -> List[VitalSign]:
         """Extract vital signs from the file."""
-        vitals_section = self.sections.get('vital_signs', '')
+        return self._parse_blocks('vital_signs')
+
+    def _parse_single_vital(self, title: str, content: str) -> List[VitalSign]:
+        """Parse a single vital sign block."""
+        title_match = _DATED_TITLE_RE.match(title)
+        if title_match:
+            # "### Blood Pressure (2024-02-10)" with a Reading field
+            reading = _field_map(content).get('reading')
+            if not reading:
+                return []
+            return [VitalSign(
+                name=_intern(title_match.group(1)),
+                date=self._parse_date(title_match.group(2)),
+                value=reading
+            )]
+
+        # "### Blood Pressure Trend" with date-labelled readings
         vital_signs = []
-        
-        # Look for vital sign entries
-        vital_blocks = re.split(r'\n### (.+)\s*\(([^)]+)\)', vitals_section)[1:]
-        
-        for i in range(0, len(vital_blocks), 3):
-            if i + 2 < len(vital_blocks):
-                vital_name = vital_blocks[i].strip()
-                date_str = vital_blocks[i + 1].strip()
-                content = vital_blocks[i + 2]
-                
-                # Parse the main reading
-                reading_match = re.search(r'[*\-]\s*\*?Reading\*?:?\s*(.+)', content)
-                if reading_match:
-                    vital = VitalSign(
-                        name=vital_name,
-                        date=self._parse_date(date_str),
-                        value=reading_match.group(1).strip()
-                    )
-                    vital_signs.append(vital)
-        
+        title = _intern(title)
+        for label, value in _iter_fields(content):
+            date = self._parse_date(label)
+            if date is not None:
+                vital_signs.append(VitalSign(name=title, date=date, value=value))
         return vital_signs
-    
+
     def _parse_clinical_timeline(self) -> List[ClinicalEvent]:
         """Extract clinical timeline events."""
-        timeline_section = self.sections.get('clinical_timeline', '')
-        events = []
-        
-        # Parse timeline entries
-        event_blocks = re.split(r'\n### ([^:]+):\s*(.+)\n', timeline_section)[1:]
-        
-        for i in range(0, len(event_blocks), 3):
-            if i + 2 < len(event_blocks):
-                date_str = event_blocks[i].strip()
-                title = event_blocks[i + 1].strip()
-                content = event_blocks[i + 2]
-                
-                event = ClinicalEvent(
-                    date=self._parse_date(date_str),
-                    title=title
-                )
-                
-                # Parse additional fields
-                patterns = {
-                    'provider_type': r'[*\-]\s*\*?Provider Type\*?:?\s*(.+)',
-                    'visit_type': r'[*\-]\s*\*?Visit Type\*?:?\s*(.+)',
-                    'chief_complaint': r'[*\-]\s*\*?Chief Complaint\*?:?\s*(.+)',
-                    'assessment': r'[*\-]\s*\*?Assessment\*?:?\s*(.+)',
-                    'plan': r'[*\-]\s*\*?Plan\*?:?\s*(.+)',
-                }
-                
-                for field, pattern in patterns.items():
-                    match = re.search(pattern, content, re.IGNORECASE)
-                    if match:
-                        setattr(event, field, match.group(1).strip())
-                
-                events.append(event)
-        
-        return events
-    
+        return self._parse_blocks('clinical_timeline')
+
+    def _parse_single_event(self, title: str, content: str) -> Optional[ClinicalEvent]:
+        """Parse a single timeline entry such as ``2024-02-10: Follow-up``."""
+        title_match = _EVENT_TITLE_RE.match(title)
+        if not title_match:
+            return None
+
+        event = ClinicalEvent(
+            date=self._parse_date(title_match.group(1)),
+            title=title_match.group(2).strip()
+        )
+
+        fields = _field_map(content)
+        for field, labels in _EVENT_LABELS.items():
+            for label in labels:
+                if fields.get(label):
+                    value = fields[label]
+                    if field in _INTERNED_EVENT_FIELDS:
+                        value = _intern(value)
+                    setattr(event, field, value)
+                    break
+
+        return event
+
     def _parse_allergies(self) -> Dict[str, List[str]]:
         """Extract allergy information."""
-        allergies_section = self.sections.get('allergies_&_intolerances', '')
         allergies = {
             'drug_allergies': [],
             'environmental_allergies': [],
             'food_intolerances': []
         }
-        
-        # Parse drug allergies
-        drug_section = re.search(r'### Drug Allergies\n(.*?)(?=\n###|\Z)', allergies_section, re.DOTALL)
-        if drug_section:
-            drug_matches = re.findall(r'[*\-]\s*\*?([^:]+)\*?:?\s*(.+)', drug_section.group(1))
-            allergies['drug_allergies'] = [f"{drug.strip()}: {reaction.strip()}" for drug, reaction in drug_matches]
-        
+
+        for block in self.sections.children('allergies_&_intolerances'):
+            category = _ALLERGY_CATEGORIES.get(block.key)
+            if category is not None:
+                allergies[category].extend(self._parse_allergy_entries(block.body))
+
         return allergies
-    
-    def _parse_medical_history(self) -> List[Dict[str, Any]]:
+
+    def _parse_allergy_entries(self, content: str) -> List[str]:
+        """Parse the ``Substance: reaction`` entries of an allergy block."""
+        return [f"{label}: {value}" for label, value in _iter_fields(content)]
+
+    def _parse_medical_history(self) -> List[Condition]:
         """Extract medical history."""
-        history_section = self.sections.get('medical_history', '')
-        history = []
-        
-        # Parse condition blocks
-        condition_blocks = re.split(r'\n### (.+)\s*\(([^)]+)\)', history_section)[1:]
-        
-        for i in range(0, len(condition_blocks), 3):
-            if i + 2 < len(condition_blocks):
-                condition_name = condition_blocks[i].strip()
-                date_str = condition_blocks[i + 1].strip()
-                content = condition_blocks[i + 2]
-                
-                condition = {
-                    'condition': condition_name,
-                    'onset': self._parse_date(date_str),
-                    'content': content
-                }
-                
-                # Extract ICD codes
-                icd_match = re.search(r'ICD-10:\*?\s*([A-Z]\d{2}(?:\.\d+)?)', content)
-                if icd_match:
-                    condition['icd_code'] = icd_match.group(1)
-                
-                history.append(condition)
-        
-        return history
-    
+        return self._parse_blocks('medical_history')
+
+    def _parse_single_condition(self, title: str, content: str) -> Optional[Condition]:
+        """Parse a single condition block such as ``Hypertension (2023-08-10)``."""
+        title_match = _DATED_TITLE_RE.match(title)
+        if not title_match:
+            return None
+
+        condition = Condition(
+            condition=_intern(title_match.group(1)),
+            onset=self._parse_date(title_match.group(2)),
+            content=content
+        )
+
+        # Extract ICD codes
+        icd_match = _ICD_FIELD_RE.search(content)
+        if icd_match:
+            condition.icd_code = _intern(icd_match.group(1))
+
+        return condition
+
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Parse various date formats into datetime objects."""
-        date_str = date_str.strip()
-        
-        # Common date formats
-        formats = [
-            '%Y-%m-%d',
-            '%Y-%m-%dT%H:%M:%SZ',
-            '%Y-%m-%dT%H:%M:%S%z',
-            '%B %Y',  # January 2024
-            '%Y'      # 2024
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-        
-        # Handle relative dates like "1 month ago"
-        relative_match = re.search(r'(\d+)\s+(day|week|month|year)s?\s+ago', date_str.lower())
-        if relative_match:
-            num = int(relative_match.group(1))
-            unit = relative_match.group(2)
-            
-            now = datetime.now()
-            if unit == 'day':
-                return now - timedelta(days=num)
-            elif unit == 'week':
-                return now - timedelta(weeks=num)
-            elif unit == 'month':
-                return now - timedelta(days=num * 30)  # Approximate
-            elif unit == 'year':
-                return now - timedelta(days=num * 365)  # Approximate
-        
-        return None
+        return self.date_parser.parse(date_str)
     
     # Public API methods
     
@@ -403,18 +813,17 @@ class HealthRecord:
         """Get list of current medications."""
         return self.medications
     
-    def get_recent_labs(self, days: int = 30) -> List[LabResult]:
-        """Get lab results from the last N days."""
-        cutoff_date = datetime.now() - timedelta(days=days)
-        return [lab for lab in self.lab_results if lab.date and lab.date >= cutoff_date]
+    def get_recent_labs(self, days: int = 30, now: Optional[datetime] = None) -> List[LabResult]:
+        """Get lab results from the last N days before ``now`` (default: current time), oldest first."""
+        return self.lab_index.within(days, now or datetime.now())
     
-    def get_clinical_timeline(self, days: Optional[int] = None) -> List[ClinicalEvent]:
-        """Get clinical timeline events, optionally filtered by days."""
+    def get_clinical_timeline(self, days: Optional[int] = None,
+                              now: Optional[datetime] = None) -> List[ClinicalEvent]:
+        """Get clinical timeline events, optionally filtered by days before ``now``, oldest first."""
         if days is None:
-            return self.clinical_timeline
+            return list(self.timeline_index)
         
-        cutoff_date = datetime.now() - timedelta(days=days)
-        return [event for event in self.clinical_timeline if event.date >= cutoff_date]
+        return self.timeline_index.within(days, now or datetime.now())
     
     def get_conditions(self) -> List[str]:
         """Get list of medical conditions."""
@@ -424,120 +833,50 @@ class HealthRecord:
         """Get the privacy level of this record."""
         return self.frontmatter.get('privacy_level', 'unknown')
     
-    def to_llm_context(self, max_length: int = 4000) -> str:
+    def to_llm_context(self, max_length: int = 4000, now: Optional[datetime] = None,
+                       max_tokens: Optional[int] = None,
+                       sections: Optional[Sequence['ContextSection']] = None) -> str:
         """
         Generate a concise, LLM-optimized summary of the health record.
         
+        Whole facts are packed by section priority and relevance until the
+        budget is spent, so allergies are kept first and no entry is cut
+        mid-way; see :class:`health_md.context.ContextBuilder`.
+        
         Args:
             max_length: Maximum character length of the summary
+            now: Reference time for the recent labs and visits windows
+                (default: current time)
+            max_tokens: Optional token budget, estimated per fact
+            sections: Section priorities and weights
+                (default: ``DEFAULT_CONTEXT_SECTIONS``)
             
         Returns:
             String summary optimized for LLM consumption
         """
-        context_parts = []
-        
-        # Demographics
-        if self.demographics:
-            demo_parts = []
-            for key, value in self.demographics.items():
-                if value:
-                    demo_parts.append(f"{key.replace('_', ' ').title()}: {value}")
-            if demo_parts:
-                context_parts.append(f"PATIENT: {', '.join(demo_parts)}")
-        
-        # Current conditions
-        if self.medical_history:
-            conditions = [f"{cond['condition']} ({cond.get('icd_code', 'unknown onset')})" 
-                         for cond in self.medical_history]
-            context_parts.append(f"CONDITIONS: {'; '.join(conditions)}")
-        
-        # Current medications
-        if self.medications:
-            meds = []
-            for med in self.medications:
-                med_str = f"{med.name}"
-                if med.dosage:
-                    med_str += f" {med.dosage}"
-                if med.indication:
-                    med_str += f" for {med.indication}"
-                meds.append(med_str)
-            context_parts.append(f"MEDICATIONS: {'; '.join(meds)}")
-        
-        # Recent lab results (last 90 days)
-        recent_labs = self.get_recent_labs(90)
-        if recent_labs:
-            labs = []
-            for lab in recent_labs[-5:]:  # Last 5 results
-                lab_str = f"{lab.name}: {lab.value}"
-                if lab.date:
-                    lab_str += f" ({lab.date.strftime('%Y-%m-%d')})"
-                labs.append(lab_str)
-            context_parts.append(f"RECENT LABS: {'; '.join(labs)}")
-        
-        # Allergies
-        if self.allergies.get('drug_allergies'):
-            context_parts.append(f"ALLERGIES: {'; '.join(self.allergies['drug_allergies'])}")
-        
-        # Recent clinical events
-        recent_events = self.get_clinical_timeline(90)
-        if recent_events:
-            events = []
-            for event in recent_events[-3:]:  # Last 3 events
-                event_str = f"{event.date.strftime('%Y-%m-%d')}: {event.title}"
-                if event.assessment:
-                    event_str += f" - {event.assessment}"
-                events.append(event_str)
-            context_parts.append(f"RECENT VISITS: {'; '.join(events)}")
-        
-        # Join and truncate if needed
-        full_context = '\n\n'.join(context_parts)
-        
-        if len(full_context) > max_length:
-            full_context = full_context[:max_length - 3] + "..."
-        
-        return full_context
+        from .context import DEFAULT_CONTEXT_SECTIONS
+        return self.context_builder.build(
+            max_tokens=max_tokens,
+            max_chars=max_length,
+            now=now,
+            sections=sections or DEFAULT_CONTEXT_SECTIONS,
+        )
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert the health record to a dictionary representation."""
-        return {
-            'frontmatter': self.frontmatter,
-            'demographics': self.demographics,
-            'medications': [
-                {
-                    'name': med.name,
-                    'generic_name': med.generic_name,
-                    'indication': med.indication,
-                    'dosage': med.dosage,
-                    'route': med.route,
-                    'started': med.started.isoformat() if med.started else None,
-                    'prescriber': med.prescriber,
-                    'notes': med.notes,
-                    'icd_codes': med.icd_codes
-                } for med in self.medications
-            ],
-            'lab_results': [
-                {
-                    'name': lab.name,
-                    'date': lab.date.isoformat() if lab.date else None,
-                    'value': lab.value,
-                    'reference_range': lab.reference_range,
-                    'units': lab.units,
-                    'clinical_significance': lab.clinical_significance,
-                    'trend': lab.trend
-                } for lab in self.lab_results
-            ],
-            'medical_history': self.medical_history,
-            'allergies': self.allergies,
-            'clinical_timeline': [
-                {
-                    'date': event.date.isoformat() if event.date else None,
-                    'title': event.title,
-                    'provider_type': event.provider_type,
-                    'visit_type': event.visit_type,
-                    'chief_complaint': event.chief_complaint,
-                    'assessment': event.assessment,
-                    'plan': event.plan,
-                    'notes': event.notes
-                } for event in self.clinical_timeline
-            ]
-        }
\ No newline at end of file
+        from .serialize import record_to_dict
+        return record_to_dict(self)
+
+    def to_json(self, stream: Optional[TextIO] = None, indent: Optional[int] = None) -> Optional[str]:
+        """
+        Serialize the record as JSON, entity by entity.
+
+        Writes to ``stream`` when given, otherwise returns the JSON text.
+        """
+        from .serialize import write_json
+        if stream is not None:
+            write_json(self, stream, indent)
+            return None
+        buffer = io.StringIO()
+        write_json(self, buffer, indent)
+        return buffer.getvalue()
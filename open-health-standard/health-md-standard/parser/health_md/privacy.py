@@ -0,0 +1,650 @@
+"""
+Health.md Privacy - Streaming de-identification to the SPEC.md privacy levels
+"""
+
+import hashlib
+import hmac
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, timedelta
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from .frontmatter import DELIMITER
+
+if TYPE_CHECKING:
+    from .parser import HealthRecord
+
+
+class PrivacyLevel(str, Enum):
+    """The ``privacy_level`` values of SPEC.md, least to most identifying."""
+    ANONYMOUS = 'anonymous'
+    PSEUDONYMIZED = 'pseudonymized'
+    IDENTIFIED = 'identified'
+
+
+KEY_ENV = 'HEALTH_MD_PSEUDONYM_KEY'
+
+_MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+                'August', 'September', 'October', 'November', 'December')
+_MONTHS = {name.lower(): number for number, name in enumerate(_MONTH_NAMES, 1)}
+# Dates with a day in free text: "12 March 1985", "March 12, 1985", "12/03/1985"
+_DAY = r'(?:0?[1-9]|[12]\d|3[01])(?:st|nd|rd|th)?'
+_DAY_MONTH_RE = re.compile(r'(\d{1,2})(?:st|nd|rd|th)?[ \t]+([A-Za-z]+)[ \t]+(\d{4})')
+_MONTH_DAY_RE = re.compile(r'([A-Za-z]+)[ \t]+(\d{1,2})(?:st|nd|rd|th)?(,?)[ \t]+(\d{4})')
+_NUMERIC_DATE_RE = re.compile(r'(\d{1,2})([/.])(\d{1,2})[/.](\d{4})')
+
+# US SSNs and Swedish personal identity numbers. A personnummer written
+# without a separator must start with a real date (or a coordination
+# number's day + 60), so lab values and other long numbers don't match
+_PNR_DATE = r'\d{2}(?:0[1-9]|1[0-2])(?:0[1-9]|[12]\d|3[01]|6[1-9]|[78]\d|9[01])'
+_ID_NUMBER = (r'(?<![\w-])(?:\d{3}-\d{2}-\d{4}|(?:19|20)?\d{6}[-+]\d{4}'
+              rf'|(?:19|20)?{_PNR_DATE}\d{{4}})\b')
+
+# ``- **Label:** value`` bullets, keeping everything around the value
+_FIELD_RE = re.compile(r'^([ \t]*[*\-][ \t]+\*{0,2})([^*:\n]+?)(\*{0,2}:\*{0,2}[ \t]*)(.*?)([ \t]*\r?\n?)$')
+_FRONTMATTER_KEY_RE = re.compile(r'^(record_id|privacy_level)([ \t]*:[ \t]*)(.*?)([ \t]*\r?\n?)$')
+# Any other top-level ``key: value`` line; ``patient_name`` is read as the label "patient name"
+_FRONTMATTER_FIELD_RE = re.compile(r'^([A-Za-z][\w\-]*)([ \t]*:[ \t]*)(.*?)([ \t]*\r?\n?)$')
+_NAME_WORD = r"[A-ZÅÄÖÉÜ][\w'\-]+"
+_TITLED_NAME_RE = re.compile(rf'\b(?:Dr|Doctor|Prof|Mr|Mrs|Ms)\.?[ \t]+{_NAME_WORD}(?:[ \t]+{_NAME_WORD})?')
+# "Anna Berg, Endocrinologist": a leading name before the role in provider fields
+_LEADING_NAME_RE = re.compile(rf'^({_NAME_WORD}(?:[ \t]+{_NAME_WORD}){{1,2}})(?=[ \t]*[,(–-])')
+
+# Labelled fields by how they are handled
+_PATIENT_NAME_LABELS = {'name', 'full name', 'patient name', 'patient'}
+_ID_LABELS = {'personal number', 'personnummer', 'personal identity number', 'ssn',
+              'social security number', 'mrn', 'medical record number', 'patient id'}
+_CONTACT_LABELS = {'email', 'e-mail', 'phone', 'telephone', 'mobile', 'address', 'street address',
+                   'postal code', 'zip code', 'zip'}
+_BIRTH_LABELS = {'date of birth', 'dob', 'born', 'birth date'}
+_LOCATION_LABELS = {'location', 'city', 'municipality', 'hometown'}
+# Fields naming a care facility, often with its town: "Apoteket (Uppsala)"
+_FACILITY_LABELS = {'pharmacy', 'clinic', 'hospital', 'facility', 'health center', 'health centre',
+                    'care center', 'care centre', 'vårdcentral'}
+_PLACE_IN_PARENS_RE = re.compile(r'\(([A-ZÅÄÖ][^()\d]*)\)')
+
+# Swedish postal code and town: "753 20 Uppsala", "SE-75320 Uppsala"
+_TOWN = r'[ \t]+[A-ZÅÄÖ][a-zåäöéü]+(?:-[A-ZÅÄÖ]?[a-zåäöéü]+)?'
+_POSTAL = rf'\b(?:SE-?\d{{3}}[ \t]?\d{{2}}|\d{{3}}[ \t]\d{{2}}){_TOWN}'
+# Street addresses, with any postal code and town after them: "Storgatan 12",
+# "Storgatan 12, 75320 Uppsala", "12 Main Street"
+_STREET = (r'(?:\b[A-ZÅÄÖ]\w*?(?:gatan|vägen|gränd|torget|backen|stigen|allén|gata|väg)[ \t]+\d{1,4}[A-Za-z]?\b'
+           r'|\b\d{1,5}[ \t]+(?:[A-Z][a-z]+[ \t]+){1,2}'
+           r'(?:Street|St|Road|Rd|Avenue|Ave|Lane|Ln|Drive|Boulevard|Blvd|Way|Court|Ct)\b\.?)'
+           rf'(?:,[ \t]*(?:SE-?)?\d{{3}}[ \t]?\d{{2}}{_TOWN})?')
+_PROVIDER_LABELS = {'prescriber', 'provider', 'physician', 'doctor', 'primary care physician', 'pcp',
+                    'attending', 'attending physician', 'referring physician', 'nurse', 'specialist',
+                    'pharmacist', 'ordering provider', 'care coordinator'}
+
+
+def _scrub_pattern(gazetteer: bool) -> 're.Pattern[str]':
+    """
+    One pattern for every identifier found in free text, so each line is
+    scanned once. Word candidates for the name and location lists are only
+    included when there are lists to check them against.
+    """
+    months = '|'.join(_MONTH_NAMES)
+    branches = [
+        r'(?P<datetime>\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(?::\d{2})?(?:Z|[+-]\d{2}:?\d{2})?)',
+        rf'(?P<id>{_ID_NUMBER})',
+        r'(?P<date>\b\d{4}-\d{2}-\d{2}\b)',
+        (rf'(?P<fulldate>\b{_DAY}[ \t]+(?:{months})[ \t]+\d{{4}}\b'
+         rf'|\b(?:{months})[ \t]+{_DAY},?[ \t]+\d{{4}}\b'
+         r'|\b(?:0?[1-9]|[12]\d|3[01])(?:/(?:0?[1-9]|1[0-2])/|\.(?:0?[1-9]|1[0-2])\.)\d{4}\b)'),
+        rf'(?P<address>{_STREET})',
+        rf'(?P<postal>{_POSTAL})',
+        r'(?P<phone>(?<![\w.])(?:\+\d{1,3}[ \-]?|0)\d{1,3}(?:[ \-]?\d{2,4}){2,4}(?!\w|\.\d))',
+        rf'(?P<month>\b(?:{months})[ \t]+\d{{4}}\b)',
+        rf'(?P<titled>{_TITLED_NAME_RE.pattern})',
+    ]
+    if gazetteer:
+        branches.append(rf"(?P<words>\b{_NAME_WORD}(?:[ \t]+{_NAME_WORD})?)")
+    # Every branch starts with a digit, '+' or a capital; checking that
+    # first spares trying each branch at every other position
+    return re.compile(rf"(?=[\d+A-ZÅÄÖÉÜ])(?:{'|'.join(branches)})")
+
+
+# Lines read ahead for names before any output, at most
+_HEAD_LINES = 200
+
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+
+
+@dataclass
+class AnonymizeResult:
+    """Outcome of anonymizing one file: where it was written, or the error."""
+    path: str
+    output: Optional[str] = None
+    record_id: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Anonymizer:
+    """
+    Rewrites Health.md text down to the ``pseudonymized`` or ``anonymous``
+    privacy level, line by line.
+
+    Build one per run: the scrubbing pattern and the name and location
+    lists are compiled once, and pseudonyms are memoized across records.
+
+    Identifiers are handled by level, following SPEC.md:
+
+    - Labelled patient names and ID numbers (personnummer, SSN, MRN) become
+      keyed pseudonyms; anonymous records drop those fields. Contact
+      fields (email, phone, address) are always dropped.
+    - Provider fields keep the role; names in them (after a title such as
+      "Dr.", or before a comma as in "Anna Berg, Endocrinologist") become
+      pseudonyms, or are removed for anonymous records. Names seen in
+      labelled fields are also replaced wherever they recur further down.
+    - ID numbers, emails, phone numbers and titled names in free text are
+      replaced throughout, as are words found in ``names``; words found in
+      ``locations`` only in anonymous records, since pseudonymized ones may
+      name the city.
+    - Dates are shifted by a keyed per-patient offset, so intervals within
+      a record are preserved. Anonymous records keep month precision
+      (``January 2024``) and give the age as a ten-year range.
+
+    Pseudonyms are HMAC-SHA256 digests under ``key``, so the same person or
+    ID maps to the same pseudonym in every record and every run using the
+    same key, and cannot be reversed without it.
+
+    >>> anonymizer = Anonymizer(key, PrivacyLevel.PSEUDONYMIZED, names=load_names())
+    >>> with open('out.health.md', 'w', encoding='utf-8') as out:
+    ...     out.writelines(anonymizer.anonymize_lines(open('patient.health.md', encoding='utf-8')))
+    """
+
+    def __init__(self, key: Union[str, bytes], level: Union[PrivacyLevel, str] = PrivacyLevel.ANONYMOUS,
+                 names: Iterable[str] = (), locations: Iterable[str] = (), max_shift_days: int = 180):
+        """
+        Args:
+            key: Secret for pseudonyms and date offsets; keep it to
+                reproduce (and link) pseudonyms across exports
+            level: Target privacy level, ``anonymous`` or ``pseudonymized``
+            names: Person names (first or last names, or full names) to
+                replace wherever they appear
+            locations: Place names to remove from anonymous records
+            max_shift_days: Dates move by up to this many days either way
+        """
+        self.key = key.encode('utf-8') if isinstance(key, str) else bytes(key)
+        if not self.key:
+            raise ValueError("An anonymization key is required")
+        self.level = PrivacyLevel(level)
+        if self.level is PrivacyLevel.IDENTIFIED:
+            raise ValueError("Cannot anonymize to the 'identified' privacy level")
+        self.anonymous = self.level is PrivacyLevel.ANONYMOUS
+        self.names: Set[str] = {name.casefold() for name in names if name.strip()}
+        self.locations: Set[str] = ({place.casefold() for place in locations if place.strip()}
+                                    if self.anonymous else set())
+        self.max_shift_days = max_shift_days
+        self._scrub_re = _scrub_pattern(gazetteer=bool(self.names or self.locations))
+        self._pseudonyms: Dict[str, str] = {}
+
+    def __getstate__(self):
+        # Compiled patterns pickle by source, so workers get them recompiled
+        # once on arrival; the memo stays behind
+        state = self.__dict__.copy()
+        state['_pseudonyms'] = {}
+        return state
+
+    # Keyed values
+
+    def _digest(self, kind: str, value: str, length: int) -> str:
+        message = f"{kind}:{' '.join(value.casefold().split())}".encode('utf-8')
+        return hmac.new(self.key, message, hashlib.sha256).hexdigest()[:length]
+
+    def pseudonym(self, kind: str, value: str) -> str:
+        """Stable pseudonym for ``value``, e.g. ``Person-3f9a2c1b``."""
+        memo = f"{kind}\0{value}"
+        found = self._pseudonyms.get(memo)
+        if found is None:
+            found = self._pseudonyms[memo] = f"{kind}-{self._digest(kind, value, 8)}"
+        return found
+
+    def record_id(self, record_id: str) -> str:
+        """Pseudonymous record id, also used as the output file name."""
+        prefix = 'anon' if self.anonymous else 'pseudo'
+        return f"{prefix}-{self._digest('record', record_id, 12)}"
+
+    def date_offset(self, patient_id: str) -> timedelta:
+        """Keyed shift applied to every date of one patient's record."""
+        span = 2 * self.max_shift_days + 1
+        return timedelta(days=int(self._digest('date', patient_id, 8), 16) % span - self.max_shift_days)
+
+    # Streaming
+
+    def anonymize_text(self, content: str, patient_id: Optional[str] = None) -> str:
+        """Anonymize a whole Health.md document held in memory."""
+        return ''.join(self.anonymize_lines(content.splitlines(True), patient_id))
+
+    def anonymize_lines(self, lines: Iterable[str], patient_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Anonymize one Health.md document from a line iterator or open file.
+
+        Only the frontmatter is buffered (its ``record_id`` keys the date
+        offset); the body is rewritten a line at a time. ``patient_id``
+        keys the offset for documents without a record_id.
+        """
+        iterator = iter(lines)
+        first = next(iterator, None)
+        if first is None:
+            return
+
+        header: List[str] = []
+        body_first: Optional[str] = first
+        if first.lstrip('\ufeff').strip() == DELIMITER:
+            header.append(first)
+            body_first = None
+            for line in iterator:
+                header.append(line)
+                if line.strip() == DELIMITER:
+                    break
+            else:
+                # Never closed: not a frontmatter block
+                body_first, header = ''.join(header), []
+
+        original_id = patient_id
+        for line in header:
+            match = _FRONTMATTER_KEY_RE.match(line)
+            if match and match.group(1) == 'record_id':
+                original_id = match.group(3).strip('\'"') or patient_id
+        state = _RecordState(self, self.date_offset(original_id or ''))
+        state.learn_frontmatter_names(header)
+
+        for line in header:
+            out = state.frontmatter_line(line, original_id)
+            if out is not None:
+                yield out
+
+        # The title often names the patient before Demographics does, so
+        # the top of the body is read ahead for labelled names
+        head = body_first.splitlines(True) if body_first is not None else []
+        in_demographics = False
+        for line in iterator:
+            head.append(line)
+            if line.startswith('## '):
+                if in_demographics:
+                    break
+                in_demographics = line[3:].strip().lower() == 'demographics'
+            if len(head) >= _HEAD_LINES:
+                break
+        state.learn_names(head)
+
+        for lines in (head, iterator):
+            for line in lines:
+                out = state.body_line(line)
+                if out is not None:
+                    yield out
+
+    def anonymize_file(self, path: Union[str, Path], out_dir: Union[str, Path]) -> AnonymizeResult:
+        """
+        Anonymize one file into ``out_dir``, named after its pseudonymous
+        record id (source file names often carry the patient's name).
+        """
+        path = str(path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = list(self.anonymize_lines(f, patient_id=Path(path).name))
+            record_id = _record_id(lines) or self.record_id(Path(path).name)
+            output = os.path.join(str(out_dir), f"{record_id}.health.md")
+            with open(output, 'w', encoding='utf-8') as out:
+                out.writelines(lines)
+            return AnonymizeResult(path, output, record_id)
+        except Exception as e:
+            return AnonymizeResult(path, error=f"{type(e).__name__}: {e}")
+
+
+def _frontmatter_label(key: str) -> str:
+    return key.replace('_', ' ').replace('-', ' ').lower()
+
+
+def _record_id(lines: List[str]) -> Optional[str]:
+    if not lines or lines[0].strip() != DELIMITER:
+        return None
+    for line in lines[1:]:
+        if line.strip() == DELIMITER:
+            return None
+        match = _FRONTMATTER_KEY_RE.match(line)
+        if match and match.group(1) == 'record_id':
+            return match.group(3).strip('\'"')
+    return None
+
+
+class _RecordState:
+    """Per-record rewriting state: the date offset and names learned so far."""
+
+    __slots__ = ('anonymizer', 'offset', 'learned', '_learned_re')
+
+    def __init__(self, anonymizer: Anonymizer, offset: timedelta):
+        self.anonymizer = anonymizer
+        self.offset = offset
+        # Names from labelled fields (lower-cased) and their replacements
+        self.learned: Dict[str, str] = {}
+        self._learned_re: Optional['re.Pattern[str]'] = None
+
+    # Frontmatter: record_id and privacy_level are replaced, name, id and
+    # contact keys are handled like the labelled body fields, and every
+    # other value is scrubbed, with ISO timestamps shifted at full precision
+
+    def learn_frontmatter_names(self, header: Iterable[str]):
+        """Learn the patient's name from keys such as ``patient_name``."""
+        for line in header:
+            field = _FRONTMATTER_FIELD_RE.match(line)
+            if field and _frontmatter_label(field.group(1)) in _PATIENT_NAME_LABELS:
+                name = field.group(3).strip('\'"')
+                if name:
+                    self._learn(name, '[name]' if self.anonymizer.anonymous
+                                else self.anonymizer.pseudonym('Patient', name))
+
+    def frontmatter_line(self, line: str, original_id: Optional[str]) -> Optional[str]:
+        anonymizer = self.anonymizer
+        match = _FRONTMATTER_KEY_RE.match(line)
+        if match:
+            key, separator, _, end = match.groups()
+            if key == 'record_id':
+                value = anonymizer.record_id(original_id or '')
+            else:
+                value = anonymizer.level.value
+            return f'{key}{separator}"{value}"{end}'
+
+        field = _FRONTMATTER_FIELD_RE.match(line)
+        if field and field.group(3):
+            key, separator, value, end = field.groups()
+            label = _frontmatter_label(key)
+            if label in _CONTACT_LABELS:
+                return None
+            if label in _PATIENT_NAME_LABELS or label in _ID_LABELS:
+                if anonymizer.anonymous:
+                    return None
+                kind = 'Patient' if label in _PATIENT_NAME_LABELS else 'ID'
+                pseudonym = anonymizer.pseudonym(kind, value.strip('\'"'))
+                return f'{key}{separator}"{pseudonym}"{end}'
+        return self._scrub(line, frontmatter=True)
+
+    # Body
+
+    def learn_names(self, lines: Iterable[str]):
+        """Learn the patient's labelled name ahead of the lines that precede it."""
+        for line in lines:
+            field = _FIELD_RE.match(line)
+            if field and field.group(2).strip().lower() in _PATIENT_NAME_LABELS and field.group(4):
+                name = field.group(4)
+                self._learn(name, '[name]' if self.anonymizer.anonymous
+                            else self.anonymizer.pseudonym('Patient', name))
+
+    def body_line(self, line: str) -> Optional[str]:
+        field = _FIELD_RE.match(line)
+        if field is None:
+            return self._scrub(line)
+
+        prefix, label, separator, value, end = field.groups()
+        key = label.strip().lower()
+        anonymous = self.anonymizer.anonymous
+
+        if key in _CONTACT_LABELS:
+            return None
+        if key in _PATIENT_NAME_LABELS:
+            if anonymous:
+                self._learn(value, '[name]')
+                return None
+            pseudonym = self.anonymizer.pseudonym('Patient', value)
+            self._learn(value, pseudonym)
+            return f"{prefix}{label}{separator}{pseudonym}{end}"
+        if key in _ID_LABELS:
+            if anonymous or not value:
+                return None
+            return f"{prefix}{label}{separator}{self.anonymizer.pseudonym('ID', value)}{end}"
+        if key in _BIRTH_LABELS and anonymous:
+            return None
+        if key in _LOCATION_LABELS and anonymous:
+            self._learn(value, '[location]')
+            return None
+        if key == 'age' and anonymous:
+            years = re.match(r'\s*(\d+)', value)
+            if years is None:
+                return None
+            decade = int(years.group(1)) // 10 * 10
+            span = '90+' if decade >= 90 else f"{decade}-{decade + 9}"
+            return f"{prefix}Age Range{separator}{span}{end}"
+        if key in _PROVIDER_LABELS:
+            value = self._provider(value)
+        if key in _FACILITY_LABELS and anonymous:
+            value = _PLACE_IN_PARENS_RE.sub(self._facility_place, value)
+
+        return f"{prefix}{self._scrub(label)}{separator}{self._scrub(value)}{end}"
+
+    def _provider(self, value: str) -> str:
+        """Provider field: keep the role, replace (or drop) the name."""
+        leading = _LEADING_NAME_RE.match(value)
+        if leading:
+            name = leading.group(1)
+            if self.anonymizer.anonymous:
+                self._learn(name, '[name]')
+                value = value[leading.end():].lstrip(' \t,–-') or 'Clinician'
+            else:
+                self._learn(name, self.anonymizer.pseudonym('Person', name))
+        for titled in _TITLED_NAME_RE.finditer(value):
+            name = titled.group(0).split(None, 1)[1]
+            self._learn(name, '[name]' if self.anonymizer.anonymous else self.anonymizer.pseudonym('Person', name))
+        if self.anonymizer.anonymous:
+            value = _TITLED_NAME_RE.sub('', value).strip(' \t,–-') or 'Clinician'
+        return value
+
+    def _facility_place(self, match: 're.Match[str]') -> str:
+        self._learn(match.group(1), '[location]')
+        return '([location])'
+
+    def _learn(self, name: str, replacement: str):
+        """Replace this name, and each of its words, wherever it recurs."""
+        name = name.strip()
+        if not name:
+            return
+        self.learned[name.casefold()] = replacement
+        for word in name.split():
+            if len(word) > 2:
+                self.learned.setdefault(word.casefold(), replacement)
+        self._learned_re = None
+
+    def _person(self, titled: str) -> str:
+        """Replacement for a titled name such as ``Dr. Anna Berg``."""
+        title, name = titled.split(None, 1)
+        if self.anonymizer.anonymous:
+            return '[name]'
+        # "Dr. Lund" after "Dr. Erik Lund" gets the full name's pseudonym
+        known = self.learned.get(name.casefold())
+        return f"{title} {known or self.anonymizer.pseudonym('Person', name)}"
+
+    def _scrub(self, text: str, frontmatter: bool = False) -> str:
+        anonymizer = self.anonymizer
+        if '@' in text:
+            text = _EMAIL_RE.sub('[email]', text)
+        text = anonymizer._scrub_re.sub(self._replace_frontmatter if frontmatter else self._replacement, text)
+        if self.learned and not (anonymizer.names or anonymizer.locations):
+            # Without name lists the pattern has no word branch; learned
+            # names get a small pattern of their own, rebuilt as they come
+            if self._learned_re is None:
+                names = sorted(map(re.escape, self.learned), key=len, reverse=True)
+                self._learned_re = re.compile(rf"\b(?:{'|'.join(names)})\b", re.IGNORECASE)
+            text = self._learned_re.sub(lambda match: self.learned[match.group(0).casefold()], text)
+        return text
+
+    def _replace_frontmatter(self, match: 're.Match[str]') -> str:
+        if match.lastgroup in ('date', 'datetime'):
+            return self._shift(match.group(0), keep_precision=True)
+        return self._replacement(match)
+
+    def _replacement(self, match: 're.Match[str]') -> str:
+        kind = match.lastgroup
+        text = match.group(0)
+        anonymizer = self.anonymizer
+
+        if kind == 'date' or kind == 'datetime' or kind == 'month':
+            return self._shift(text, keep_precision=not anonymizer.anonymous)
+        if kind == 'fulldate':
+            return self._shift_full(text, keep_precision=not anonymizer.anonymous)
+        if kind == 'id':
+            return '[id]' if anonymizer.anonymous else anonymizer.pseudonym('ID', text)
+        if kind == 'phone':
+            return '[phone]'
+        if kind == 'address':
+            return '[address]'
+        if kind == 'postal':
+            # The town alone is allowed in pseudonymized records
+            return '[location]' if anonymizer.anonymous else f"[postal code] {text.split()[-1]}"
+        if kind == 'titled':
+            return self._person(text)
+
+        # Capitalized words: a two-word name or place, or each word alone
+        phrase = text.casefold()
+        found = self._lookup(phrase, text)
+        if found is not None:
+            return found
+        words = text.split()
+        if len(words) == 1:
+            return text
+        separator = text[len(words[0]):len(text) - len(words[1])]
+        return separator.join(self._lookup(word.casefold(), word) or word for word in words)
+
+    def _lookup(self, key: str, text: str) -> Optional[str]:
+        found = self.learned.get(key)
+        if found is not None:
+            return found
+        anonymizer = self.anonymizer
+        if key in anonymizer.names:
+            return '[name]' if anonymizer.anonymous else anonymizer.pseudonym('Person', text)
+        if key in anonymizer.locations:
+            return '[location]'
+        return None
+
+    def _shift(self, text: str, keep_precision: bool) -> str:
+        """Move a date by the record's offset; month precision for anonymous output."""
+        try:
+            if text[0].isdigit():
+                day = date(int(text[0:4]), int(text[5:7]), int(text[8:10])) + self.offset
+                if not keep_precision:
+                    return f"{_MONTH_NAMES[day.month - 1]} {day.year}"
+                return day.isoformat() + text[10:]
+            month, year = text.split()
+            day = date(int(year), _MONTHS[month.lower()], 15) + self.offset
+            return f"{_MONTH_NAMES[day.month - 1]} {day.year}"
+        except ValueError:
+            # Impossible dates such as 2024-02-30 could still identify
+            return '[date]'
+
+    def _shift_full(self, text: str, keep_precision: bool) -> str:
+        """
+        Move a written-out date with a day by the record's offset, in the
+        same style; anonymous output keeps only the month, as for ISO dates.
+        """
+        try:
+            numeric = _NUMERIC_DATE_RE.fullmatch(text)
+            if numeric:
+                day_text, separator, month_text, year = numeric.groups()
+                day = date(int(year), int(month_text), int(day_text)) + self.offset
+            else:
+                day_first = _DAY_MONTH_RE.fullmatch(text)
+                if day_first:
+                    day_text, month, year = day_first.groups()
+                else:
+                    month, day_text, _, year = _MONTH_DAY_RE.fullmatch(text).groups()
+                day = date(int(year), _MONTHS[month.lower()], int(day_text)) + self.offset
+        except ValueError:
+            return '[date]'
+
+        month_name = _MONTH_NAMES[day.month - 1]
+        if not keep_precision:
+            return f"{month_name} {day.year}"
+        if numeric:
+            width = len(day_text)
+            return f"{day.day:0{width}d}{separator}{day.month:0{len(month_text)}d}{separator}{day.year}"
+        if day_first:
+            return f"{day.day} {month_name} {day.year}"
+        return f"{month_name} {day.day}, {day.year}"
+
+
+# Worker state for anonymize_paths: one Anonymizer per process
+_worker_anonymizer: Optional[Anonymizer] = None
+
+
+def _init_worker(anonymizer: Anonymizer):
+    global _worker_anonymizer
+    _worker_anonymizer = anonymizer
+
+
+def _anonymize_chunk(paths: List[str], out_dir: str) -> List[AnonymizeResult]:
+    """Worker entry point; chunking amortizes inter-process overhead."""
+    return [_worker_anonymizer.anonymize_file(path, out_dir) for path in paths]
+
+
+def anonymize_paths(paths: Iterable[Union[str, Path]], out_dir: Union[str, Path], anonymizer: Anonymizer,
+                    workers: Optional[int] = None, chunksize: int = 16) -> Iterator[AnonymizeResult]:
+    """
+    Anonymize many files into ``out_dir`` in a process pool.
+
+    Every worker receives the anonymizer once, so its patterns are compiled
+    once per process rather than per file. Files are streamed through the
+    workers with a bounded number of chunks in flight; results come back
+    in completion order, and a file that fails never aborts the run.
+    """
+    from .batch import _chunks
+
+    os.makedirs(out_dir, exist_ok=True)
+    out_dir = str(out_dir)
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(paths, max(1, chunksize))
+
+    if workers == 1:
+        for chunk in chunks:
+            for path in chunk:
+                yield anonymizer.anonymize_file(path, out_dir)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    max_pending = workers * 4
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(anonymizer,)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_anonymize_chunk, chunk, out_dir))
+            while len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from future.result()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                yield from future.result()
+
+
+def load_key(value: Optional[Union[str, bytes]] = None) -> bytes:
+    """The anonymization key given, else ``$HEALTH_MD_PSEUDONYM_KEY``."""
+    key = value if value is not None else os.environ.get(KEY_ENV)
+    if not key:
+        raise ValueError(f"An anonymization key is required: pass one or set {KEY_ENV}")
+    return key.encode('utf-8') if isinstance(key, str) else key
+
+
+def anonymize_record(record: Union['HealthRecord', str], level: Union[PrivacyLevel, str] = PrivacyLevel.ANONYMOUS,
+                     key: Optional[Union[str, bytes]] = None, **options) -> str:
+    """
+    Health.md text of ``record`` (a HealthRecord or Health.md text) brought
+    down to ``level``.
+
+    ``key`` defaults to ``$HEALTH_MD_PSEUDONYM_KEY``; other options are
+    passed to :class:`Anonymizer`. Build an Anonymizer directly to process
+    many records with one set of compiled patterns.
+    """
+    content = record if isinstance(record, str) else record.raw_content
+    if not content:
+        raise ValueError("Cannot anonymize a compacted record: its source text was released")
+    return Anonymizer(load_key(key), level, **options).anonymize_text(content)
@@ -0,0 +1,153 @@
+"""
+Health.md Sections - Single-pass header tree for Health.md markdown
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+
+# One pattern for both ATX headers and code fences, so the whole document
+# is tokenized in a single C-level scan.  Group 1/2 are a header's level and
+# title, group 3 is a fence opener/closer.
+_TOKEN_RE = re.compile(
+    r'^(?:(#{1,6})[ \t]+(.+?)(?:[ \t]+#+)?[ \t]*|[ \t]{0,3}(`{3,}|~{3,}).*)$',
+    re.MULTILINE
+)
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a header title (or a ``/``-separated path) to its lookup key."""
+    return title.strip().lower().replace(' ', '_')
+
+
+@dataclass
+class Section:
+    """A header and the span of markdown it covers, including its children."""
+    level: int
+    title: str
+    path: str
+    start: int       # offset of the header line
+    body_start: int  # offset of the first line after the header
+    end: int         # offset where the next sibling or ancestor begins
+    children: List['Section'] = field(default_factory=list)
+    source: str = field(default='', repr=False, compare=False)
+
+    @property
+    def key(self) -> str:
+        """Normalized title of this section alone."""
+        return normalize_title(self.title)
+
+    @property
+    def body(self) -> str:
+        """Everything under the header, including nested subsections."""
+        return self.source[self.body_start:self.end]
+
+    @property
+    def text(self) -> str:
+        """Content under the header up to its first subsection."""
+        stop = self.children[0].start if self.children else self.end
+        return self.source[self.body_start:stop]
+
+
+class SectionTree:
+    """
+    Hierarchical view of the headers in a Health.md document.
+
+    The markdown is tokenized once; every section is then reachable in O(1)
+    by its normalized path, e.g. ``current_medications/metformin_500mg``.
+    Level-1 headers are treated as the document title and are left out of
+    their children's paths, so ``## Demographics`` is simply ``demographics``.
+    When two sections share a path, the first one wins the lookup; both are
+    still present in their parent's ``children``.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.roots: List[Section] = []
+        self._index: Dict[str, Section] = {}
+        self._tokenize()
+
+    def _tokenize(self):
+        source = self.source
+        stack: List[Section] = []
+        fence: Optional[str] = None
+
+        for match in _TOKEN_RE.finditer(source):
+            marker = match.group(3)
+            if marker:
+                if fence is None:
+                    fence = marker
+                elif marker[0] == fence[0] and len(marker) >= len(fence):
+                    fence = None
+                continue
+            if fence is not None:
+                continue
+
+            level = len(match.group(1))
+            title = match.group(2)
+            start = match.start()
+
+            while stack and stack[-1].level >= level:
+                stack.pop().end = start
+
+            parent = stack[-1] if stack else None
+            key = normalize_title(title)
+            if parent is None or parent.level == 1:
+                path = key
+            else:
+                path = f"{parent.path}/{key}"
+
+            section = Section(
+                level=level,
+                title=title,
+                path=path,
+                start=start,
+                body_start=min(match.end() + 1, len(source)),
+                end=len(source),
+                source=source
+            )
+
+            if parent is None:
+                self.roots.append(section)
+            else:
+                parent.children.append(section)
+            self._index.setdefault(path, section)
+            stack.append(section)
+
+    def get(self, path: str, default: Optional[Section] = None) -> Optional[Section]:
+        """Look up a section by path; components are normalized like titles."""
+        return self._index.get(normalize_title(path), default)
+
+    def text(self, path: str) -> str:
+        """Full body of the section at ``path``, or an empty string."""
+        section = self.get(path)
+        return section.body if section else ''
+
+    def children(self, path: str) -> List[Section]:
+        """Direct subsections of the section at ``path``."""
+        section = self.get(path)
+        return section.children if section else []
+
+    def walk(self) -> Iterator[Section]:
+        """Yield every section in document order."""
+        pending = list(reversed(self.roots))
+        while pending:
+            section = pending.pop()
+            yield section
+            pending.extend(reversed(section.children))
+
+    def __getitem__(self, path: str) -> Section:
+        section = self.get(path)
+        if section is None:
+            raise KeyError(path)
+        return section
+
+    def __contains__(self, path: str) -> bool:
+        return normalize_title(path) in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
@@ -0,0 +1,191 @@
+"""
+Health.md Serialize - Streaming JSON and NDJSON output for HealthRecords
+"""
+
+import json
+from datetime import date, datetime
+from json.encoder import encode_basestring
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from .parser import ClinicalEvent, Condition, HealthRecord, LabResult, Medication, VitalSign
+from .stream import (
+    ALLERGY, CLINICAL_EVENT, CONDITION, DEMOGRAPHICS, FRONTMATTER, LAB_RESULT, MEDICATION, VITAL_SIGN,
+)
+
+
+# Serialized fields per entity type, in output order
+ENTITY_FIELDS: Dict[type, Tuple[str, ...]] = {
+    Medication: ('name', 'generic_name', 'indication', 'dosage', 'route', 'frequency',
+                 'started', 'prescriber', 'notes', 'icd_codes'),
+    LabResult: ('name', 'date', 'value', 'reference_range', 'units', 'clinical_significance', 'trend'),
+    VitalSign: ('name', 'date', 'value', 'units', 'notes'),
+    ClinicalEvent: ('date', 'title', 'provider_type', 'visit_type', 'chief_complaint',
+                    'assessment', 'plan', 'notes'),
+    Condition: ('condition', 'onset', 'content', 'icd_code'),
+}
+
+ENTITY_KINDS: Dict[type, str] = {
+    Medication: MEDICATION,
+    LabResult: LAB_RESULT,
+    VitalSign: VITAL_SIGN,
+    ClinicalEvent: CLINICAL_EVENT,
+    Condition: CONDITION,
+}
+
+# Top-level record layout: key and whether it holds a list of entities
+_RECORD_LAYOUT = (
+    ('frontmatter', False),
+    ('demographics', False),
+    ('medications', True),
+    ('lab_results', True),
+    ('vital_signs', True),
+    ('medical_history', True),
+    ('allergies', False),
+    ('clinical_timeline', True),
+)
+
+# Pre-encoded '"field": ' prefixes, so entities are written without a dict
+_KEY_PREFIXES: Dict[type, List[Tuple[str, str]]] = {
+    cls: [(name, encode_basestring(name) + ': ') for name in names]
+    for cls, names in ENTITY_FIELDS.items()
+}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+_encode_any = json.JSONEncoder(ensure_ascii=False, default=_default).encode
+
+
+def _encode(value: Any) -> str:
+    """JSON text of a field value, with fast paths for the common types."""
+    if value is None:
+        return 'null'
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if isinstance(value, datetime):
+        return '"' + value.isoformat() + '"'
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return '[' + ', '.join(map(encode_basestring, value)) + ']'
+    return _encode_any(value)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+def entity_to_json(entity: Any, extra: str = '') -> str:
+    """
+    JSON object text for one entity.
+
+    ``extra`` is spliced in front of the entity's own fields, e.g.
+    ``'"kind": "medication", '``. Conditions leave out ``icd_code`` when it
+    is unknown, as ``dict(condition)`` does.
+    """
+    parts = [
+        prefix + _encode(value)
+        for name, prefix in _KEY_PREFIXES[type(entity)]
+        for value in (getattr(entity, name),)
+        if value is not None or name != 'icd_code'
+    ]
+    return '{' + extra + ', '.join(parts) + '}'
+
+
+def entity_to_dict(entity: Any) -> Dict[str, Any]:
+    """JSON-ready dict of one entity, with the same fields as entity_to_json."""
+    return {
+        name: _plain(value)
+        for name in ENTITY_FIELDS[type(entity)]
+        for value in (getattr(entity, name),)
+        if value is not None or name != 'icd_code'
+    }
+
+
+def record_to_dict(record: HealthRecord) -> Dict[str, Any]:
+    """Dict with the same layout as write_json's output."""
+    return {
+        key: [entity_to_dict(entity) for entity in getattr(record, key)] if is_list
+        else getattr(record, key)
+        for key, is_list in _RECORD_LAYOUT
+    }
+
+
+def write_json(record: HealthRecord, stream: TextIO, indent: Optional[int] = None):
+    """
+    Write the record as one JSON document, entity by entity.
+
+    With ``indent``, each top-level key and each entity goes on its own
+    line; entities themselves stay on one line.
+    """
+    write = stream.write
+    if indent is None:
+        outer = inner = ''
+        item_sep = ', '
+    else:
+        outer = '\n' + ' ' * indent
+        inner = outer + ' ' * indent
+        item_sep = ','
+
+    write('{')
+    for position, (key, is_list) in enumerate(_RECORD_LAYOUT):
+        if position:
+            write(item_sep)
+        write(outer + encode_basestring(key) + ': ')
+        value = getattr(record, key)
+        if not is_list:
+            write(_encode_any(value))
+            continue
+
+        write('[')
+        for index, entity in enumerate(value):
+            if index:
+                write(item_sep)
+            write(inner + entity_to_json(entity))
+        write((outer if value else '') + ']')
+    write(('\n' if indent is not None else '') + '}')
+
+
+def iter_ndjson(record: HealthRecord, source: Optional[str] = None) -> Iterator[str]:
+    """
+    NDJSON lines (newline included) for every entry of the record.
+
+    Each line carries a ``kind`` as yielded by :func:`health_md.stream.iter_entries`
+    and, when ``source`` is given, the ``file`` it came from. Frontmatter
+    and demographics are one line each; allergies are one line per entry.
+    """
+    head = '"file": ' + encode_basestring(source) + ', ' if source is not None else ''
+
+    def line(kind: str, body: str) -> str:
+        return '{' + head + '"kind": "' + kind + '", ' + body + '}\n'
+
+    if record.frontmatter:
+        yield line(FRONTMATTER, '"data": ' + _encode_any(record.frontmatter))
+    if record.demographics:
+        yield line(DEMOGRAPHICS, '"data": ' + _encode_any(record.demographics))
+
+    for key in ('medications', 'lab_results', 'vital_signs', 'clinical_timeline', 'medical_history'):
+        for entity in getattr(record, key):
+            kind_head = head + '"kind": "' + ENTITY_KINDS[type(entity)] + '", '
+            yield entity_to_json(entity, kind_head) + '\n'
+
+    for category, allergies in record.allergies.items():
+        for allergy in allergies:
+            yield line(ALLERGY, '"category": ' + encode_basestring(category)
+                       + ', "allergy": ' + encode_basestring(allergy))
+
+
+def write_ndjson(record: HealthRecord, stream: TextIO, source: Optional[str] = None) -> int:
+    """Write the record as NDJSON, one entry per line; returns the number of lines."""
+    count = 0
+    write: Callable[[str], Any] = stream.write
+    for text in iter_ndjson(record, source):
+        write(text)
+        count += 1
+    return count
@@ -0,0 +1,94 @@
+"""
+Health.md Stats - Per-stage timing of HealthRecord parsing
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+
+# Called as hook(stats, stage, seconds, input_size) after every timed stage
+StatsHook = Callable[['ParseStats', str, float, int], None]
+
+_hooks: List[StatsHook] = []
+
+
+def add_stats_hook(hook: StatsHook):
+    """
+    Register a hook receiving every timed parse stage.
+
+    While any hook is registered, every new HealthRecord is profiled, so a
+    metrics exporter sees all parses without the callers opting in.
+    """
+    _hooks.append(hook)
+
+
+def remove_stats_hook(hook: StatsHook):
+    """Unregister a hook added with add_stats_hook."""
+    _hooks.remove(hook)
+
+
+def hooks_installed() -> bool:
+    return bool(_hooks)
+
+
+@dataclass
+class StageStats:
+    """Totals for one parse stage."""
+    calls: int = 0
+    seconds: float = 0.0
+    input_size: int = 0
+
+
+@dataclass
+class ParseStats:
+    """
+    Wall time, call count and input size per parse stage of one record.
+
+    Stages are ``read`` (or ``cache`` on a cache hit), ``frontmatter``,
+    ``sections`` and one per structured field (``medications``,
+    ``lab_results``, ...). Input sizes are in characters of the text each
+    stage worked on: the whole file, the frontmatter block, the markdown
+    body, or the section an extractor read.
+    """
+    path: Optional[str] = None
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+
+    def add(self, stage: str, seconds: float, input_size: int = 0):
+        """Record one run of ``stage`` and pass it on to the registered hooks."""
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.input_size += input_size
+        for hook in _hooks:
+            hook(self, stage, seconds, input_size)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(stats.seconds for stats in self.stages.values())
+
+    def slowest(self) -> Optional[str]:
+        """Name of the stage that took the longest."""
+        if not self.stages:
+            return None
+        return max(self.stages, key=lambda stage: self.stages[stage].seconds)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Plain dict of the per-stage totals, e.g. for a metrics exporter."""
+        return {
+            stage: {'calls': stats.calls, 'seconds': stats.seconds, 'input_size': stats.input_size}
+            for stage, stats in self.stages.items()
+        }
+
+    def format(self) -> str:
+        """Human-readable breakdown, slowest stage first."""
+        total = self.total_seconds or 1.0
+        lines = [f"{'stage':<20} {'calls':>5} {'time':>10} {'share':>7} {'input':>12}"]
+        for stage, stats in sorted(self.stages.items(), key=lambda item: -item[1].seconds):
+            lines.append(
+                f"{stage:<20} {stats.calls:>5} {stats.seconds * 1000:>8.2f}ms "
+                f"{stats.seconds / total:>6.1%} {stats.input_size:>6,} chars"
+            )
+        lines.append(f"{'total':<20} {'':>5} {self.total_seconds * 1000:>8.2f}ms")
+        return '\n'.join(lines)
@@ -0,0 +1,214 @@
+"""
+Health.md Stream - Incremental, bounded-memory parsing of Health.md files
+"""
+
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .frontmatter import DELIMITER, load_frontmatter
+from .parser import _ALLERGY_CATEGORIES, HealthRecord
+from .sections import _TOKEN_RE, normalize_title
+
+
+# Entry kinds yielded by iter_entries
+FRONTMATTER = 'frontmatter'
+DEMOGRAPHICS = 'demographics'
+MEDICATION = 'medication'
+LAB_RESULT = 'lab_result'
+VITAL_SIGN = 'vital_sign'
+CLINICAL_EVENT = 'clinical_event'
+CONDITION = 'condition'
+ALLERGY = 'allergy'
+
+Entry = Tuple[str, Any]
+
+# Sections parsed as a whole vs. one block per level-3 entry
+_WHOLE_SECTIONS = {'demographics'}
+_ENTRY_SECTIONS = {
+    'current_medications',
+    'lab_results',
+    'vital_signs',
+    'clinical_timeline',
+    'medical_history',
+    'allergies_&_intolerances',
+}
+
+
+class _Block:
+    """Lines of the section or entry currently being collected."""
+    __slots__ = ('section', 'title', 'depth', 'lines')
+
+    def __init__(self, section: str, title: str, depth: int):
+        self.section = section
+        self.title = title
+        self.depth = depth
+        self.lines: List[str] = []
+
+
+def _emit(block: _Block, record: HealthRecord) -> Iterator[Entry]:
+    """Turn a finished block into entries using the record's extractors."""
+    body = ''.join(block.lines)
+    section = block.section
+
+    if section == 'demographics':
+        demographics = record._parse_demographic_fields(body)
+        if demographics:
+            yield DEMOGRAPHICS, demographics
+    elif section == 'current_medications':
+        yield MEDICATION, record._parse_single_medication(block.title, body)
+    elif section == 'lab_results':
+        for lab in record._parse_single_lab_test(block.title, body):
+            yield LAB_RESULT, lab
+    elif section == 'vital_signs':
+        for vital in record._parse_single_vital(block.title, body):
+            yield VITAL_SIGN, vital
+    elif section == 'clinical_timeline':
+        event = record._parse_single_event(block.title, body)
+        if event is not None:
+            yield CLINICAL_EVENT, event
+    elif section == 'medical_history':
+        condition = record._parse_single_condition(block.title, body)
+        if condition is not None:
+            yield CONDITION, condition
+    elif section == 'allergies_&_intolerances':
+        category = _ALLERGY_CATEGORIES.get(normalize_title(block.title))
+        if category is not None:
+            for allergy in record._parse_allergy_entries(body):
+                yield ALLERGY, (category, allergy)
+
+
+def iter_entries(lines: Iterable[str], record: Optional[HealthRecord] = None) -> Iterator[Entry]:
+    """
+    Parse a Health.md document incrementally.
+
+    Args:
+        lines: Lines of the document, e.g. an open file handle
+        record: Record whose extractors (and date handling) are used;
+            a blank HealthRecord by default
+
+    Yields:
+        ``(kind, entity)`` pairs as soon as each block is complete:
+        ``frontmatter`` and ``demographics`` dicts, ``medication``,
+        ``lab_result``, ``vital_sign`` and ``clinical_event`` entities,
+        ``condition`` dicts and ``allergy`` ``(category, text)`` pairs.
+
+    Only the block currently being read (one medication, one lab test,
+    one visit) is held in memory, so memory use does not grow with the
+    size of the file.
+    """
+    if record is None:
+        record = HealthRecord('')
+
+    iterator = iter(lines)
+    first = next(iterator, None)
+    if first is None:
+        return
+
+    pending: List[str] = []
+    if first.lstrip('\ufeff').strip() == DELIMITER:
+        frontmatter_lines = []
+        for line in iterator:
+            if line.strip() == DELIMITER:
+                yield FRONTMATTER, load_frontmatter(''.join(frontmatter_lines))
+                break
+            frontmatter_lines.append(line)
+        else:
+            # Never closed, so it was not frontmatter after all
+            pending = [first] + frontmatter_lines
+    else:
+        pending = [first]
+
+    # (level, depth, top-level section key) of each open header
+    stack: List[Tuple[int, int, str]] = []
+    block: Optional[_Block] = None
+    fence: Optional[str] = None
+
+    def all_lines() -> Iterator[str]:
+        yield from pending
+        yield from iterator
+
+    for line in all_lines():
+        if not line.endswith('\n'):
+            line += '\n'
+        token = _TOKEN_RE.match(line)
+
+        if token and token.group(3):
+            marker = token.group(3)
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence):
+                fence = None
+        elif token and fence is None:
+            level = len(token.group(1))
+            title = token.group(2)
+
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            if not stack or stack[-1][0] == 1:
+                depth, section = 1, normalize_title(title)
+            else:
+                depth, section = stack[-1][1] + 1, stack[-1][2]
+            stack.append((level, depth, section))
+
+            if block is not None and depth <= block.depth:
+                yield from _emit(block, record)
+                block = None
+
+            if block is None:
+                if depth == 1 and section in _WHOLE_SECTIONS:
+                    block = _Block(section, title, depth)
+                elif depth == 2 and section in _ENTRY_SECTIONS:
+                    block = _Block(section, title, depth)
+                continue
+
+        if block is not None:
+            block.lines.append(line)
+
+    if block is not None:
+        yield from _emit(block, record)
+
+
+def iter_file_entries(filepath: Union[str, Path],
+                      record: Optional[HealthRecord] = None) -> Iterator[Entry]:
+    """Stream the entries of a Health.md file; see :func:`iter_entries`."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        yield from iter_entries(f, record)
+
+
+
+# Record attribute that collects each list-valued entry kind
+_LIST_FIELDS = {
+    MEDICATION: 'medications',
+    LAB_RESULT: 'lab_results',
+    VITAL_SIGN: 'vital_signs',
+    CLINICAL_EVENT: 'clinical_timeline',
+    CONDITION: 'medical_history',
+}
+
+
+def build_record(lines: Iterable[str], record: Optional[HealthRecord] = None) -> HealthRecord:
+    """
+    Collect streamed entries into a HealthRecord.
+
+    The record's structured attributes are filled in directly; the source
+    text itself is not kept, so ``raw_content`` is empty.
+    """
+    if record is None:
+        record = HealthRecord('')
+
+    collected = {name: [] for name in _LIST_FIELDS.values()}
+    collected['frontmatter'] = {}
+    collected['demographics'] = {}
+    collected['allergies'] = {category: [] for category in set(_ALLERGY_CATEGORIES.values())}
+
+    for kind, entity in iter_entries(lines, record):
+        if kind in _LIST_FIELDS:
+            collected[_LIST_FIELDS[kind]].append(entity)
+        elif kind == ALLERGY:
+            category, allergy = entity
+            collected['allergies'][category].append(allergy)
+        else:
+            collected[kind].update(entity)
+
+    record.__dict__.update(collected)
+    return record
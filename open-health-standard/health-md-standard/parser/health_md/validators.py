@@ -0,0 +1,452 @@
+"""
+Health.md Validators - The SPEC.md validation rules, checked during the parse pass
+"""
+
+import bisect
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import accumulate
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .dates import _ISO_RE
+from .frontmatter import _FRONTMATTER_RE
+from .parser import _BLOCK_FIELDS, _DATED_TITLE_RE, _EVENT_TITLE_RE, _digest
+from .privacy import _ID_NUMBER
+
+if TYPE_CHECKING:
+    from .parser import HealthRecord
+    from .sections import Section
+
+
+ERROR = 'error'
+WARNING = 'warning'
+
+REQUIRED_FRONTMATTER = ('health_md_version', 'record_id', 'generated', 'privacy_level',
+                        'last_updated', 'data_sources')
+PRIVACY_LEVELS = ('anonymous', 'pseudonymized', 'identified')
+SUPPORTED_VERSIONS = ('1.0',)
+REQUIRED_SECTIONS = ('demographics', 'current_medications')
+
+_ICD_CODE_RE = re.compile(r'ICD-10:\*{0,2}[ \t]*([^\s,;)*]+)')
+_VALID_ICD_RE = re.compile(r'[A-TV-Z]\d{2}(?:\.[0-9A-Z]{1,4})?')
+_STARTED_RE = re.compile(r'^[ \t]*[*\-][ \t]+\*{0,2}Started:\*{0,2}[ \t]*(.+?)[ \t]*$', re.MULTILINE | re.IGNORECASE)
+_MARKER_RE = re.compile(r'<!--\s*(END\s+)?SENSITIVE\b', re.IGNORECASE)
+_SENSITIVE_TOPIC_RE = re.compile(r'mental|psychiatr|substance|alcohol|genom|genetic|sexual|hiv|reproductive')
+# Labels that name the patient; only allowed in identified records
+_NAMING_LABEL_RE = re.compile(
+    r'\n[ \t]*[*\-][ \t]+\*{0,2}(name|full name|date of birth|dob|address|email|phone)\*{0,2}:',
+    re.IGNORECASE
+)
+# Values that identify a person in any record that is not identified:
+# US SSNs and Swedish personal identity numbers, and email addresses
+_ID_NUMBER_RE = re.compile(_ID_NUMBER)
+# Written with a separator they end in a dash or plus and four digits,
+# otherwise they are a run of ten or twelve digits; finding those first
+# is far cheaper than trying the full pattern at every offset
+_ID_SUFFIX_RE = re.compile(r'[-+]\d{4}\b|(?<![\w-])\d{10}(?:\d{2})?\b')
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+_WHITESPACE_RE = re.compile(r'\s*')
+
+
+@dataclass
+class ValidationIssue:
+    """One broken rule, located by 1-based line and column in the file when known."""
+    rule: str
+    message: str
+    severity: str = ERROR
+    line: Optional[int] = None
+    column: Optional[int] = None
+
+    def __str__(self) -> str:
+        location = f"{self.line}:{self.column}: " if self.line is not None else ''
+        return f"{location}{self.severity}: {self.message} [{self.rule}]"
+
+
+class HealthMdValidationError(ValueError):
+    """A Health.md document breaks one or more validation rules."""
+
+    def __init__(self, issues: List[ValidationIssue]):
+        self.issues = issues
+        errors = [issue for issue in issues if issue.severity == ERROR] or issues
+        message = str(errors[0])
+        if len(errors) > 1:
+            message += f" (and {len(errors) - 1} more)"
+        super().__init__(message)
+
+
+@dataclass
+class ValidationReport:
+    """Issues found in a record, plus what the caller usually prints alongside."""
+    issues: List[ValidationIssue] = field(default_factory=list)
+    version: str = 'unknown'
+    privacy_level: str = 'unknown'
+    sections: List[str] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.severity == ERROR]
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.severity == WARNING]
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def raise_for_errors(self):
+        """Raise HealthMdValidationError if any rule was broken."""
+        if self.errors:
+            raise HealthMdValidationError(self.issues)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'valid': self.valid,
+            'version': self.version,
+            'privacy_level': self.privacy_level,
+            'errors': [str(issue) for issue in self.errors],
+            'warnings': [str(issue) for issue in self.warnings],
+            'sections': self.sections,
+        }
+
+
+class _Validator:
+    """
+    Checks one record stage by stage as it is extracted.
+
+    Each stage is extracted through the record (so the result is memoized
+    for later use) and checked right away against the header tree, block
+    hashes and entities that extraction produced. Nothing is read or
+    parsed a second time, and with ``fail_fast`` extraction stops at the
+    first error.
+    """
+
+    def __init__(self, record: 'HealthRecord', fail_fast: bool, strict: bool):
+        self.record = record
+        self.fail_fast = fail_fast
+        self.strict = strict
+        self.report = ValidationReport()
+        self.raw = record.raw_content
+        self._line_starts: Optional[List[int]] = None
+        self._body_offset: Optional[int] = None
+        self._reference: Optional[datetime] = None
+
+    # Positions
+
+    def _position(self, offset: int):
+        if self._line_starts is None:
+            self._line_starts = [0, *accumulate(len(line) + 1 for line in self.raw.split('\n'))]
+        line = bisect.bisect_right(self._line_starts, offset)
+        return line, offset - self._line_starts[line - 1] + 1
+
+    def body_offset(self, offset: int) -> int:
+        """File offset of an offset into the markdown body."""
+        if self._body_offset is None:
+            match = _FRONTMATTER_RE.match(self.raw)
+            start = match.end() if match else 0
+            self._body_offset = _WHITESPACE_RE.match(self.raw, start).end()
+        return self._body_offset + offset
+
+    def issue(self, rule: str, message: str, severity: str = ERROR, offset: Optional[int] = None):
+        """Record an issue at a file offset; raises at the first error when failing fast."""
+        if self.strict:
+            severity = ERROR
+        line = column = None
+        if offset is not None:
+            line, column = self._position(offset)
+        issue = ValidationIssue(rule, message, severity, line, column)
+        self.report.issues.append(issue)
+        if self.fail_fast and severity == ERROR:
+            raise HealthMdValidationError(self.report.issues)
+
+    def in_block(self, block: 'Section', text: str) -> int:
+        """File offset of ``text`` within a block, or of the block's header."""
+        found = block.source.find(text, block.body_start, block.end) if text else -1
+        return self.body_offset(found if found != -1 else block.start)
+
+    def after_record(self, when: Optional[datetime]) -> bool:
+        """Whether a date lies after the record was generated."""
+        if when is None or self._reference is None:
+            return False
+        if when.tzinfo is not None:
+            when = when.replace(tzinfo=None)
+        return when > self._reference
+
+    # Stages
+
+    def run(self) -> ValidationReport:
+        if not self.raw and self.record.__dict__.get('medications') is not None:
+            raise ValueError("Cannot validate a compacted record: its source text was released")
+        try:
+            self.check_frontmatter()
+            self.check_structure()
+            self.check_blocks()
+            self.check_privacy()
+        except HealthMdValidationError:
+            pass
+        # Located issues in file order, then whole-document ones
+        self.report.issues.sort(key=lambda issue: (issue.line is None, issue.line or 0, issue.column or 0))
+        return self.report
+
+    def _key_offset(self, key: str) -> Optional[int]:
+        match = re.search(rf'^{re.escape(key)}[ \t]*:', self.raw, re.MULTILINE)
+        return match.start() if match else None
+
+    def _timestamp(self, key: str, value: Any) -> Optional[datetime]:
+        if isinstance(value, datetime):
+            return value.replace(tzinfo=None)
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        text = str(value).strip()
+        # ISO-shaped but impossible dates (2024-02-30) parse to None
+        parsed = self.record.date_parser.parse(text) if _ISO_RE.fullmatch(text) else None
+        if parsed is None:
+            self.issue('structure.date_format', f"{key} must be an ISO 8601 date, got {value!r}",
+                       offset=self._key_offset(key))
+            return None
+        return parsed.replace(tzinfo=None)
+
+    def check_frontmatter(self):
+        match = _FRONTMATTER_RE.match(self.raw)
+        if match is None:
+            self.issue('structure.frontmatter', "Missing YAML frontmatter between '---' lines", offset=0)
+            return
+
+        try:
+            frontmatter = self.record.frontmatter
+        except Exception as e:
+            mark = getattr(e, 'problem_mark', None)
+            offset = match.start(1)
+            if mark is not None:
+                line, _ = self._position(match.start(1))
+                offset = self._line_starts[min(line - 1 + mark.line, len(self._line_starts) - 1)] + mark.column
+            problem = getattr(e, 'problem', None) or str(e).split('\n')[0]
+            self.issue('structure.frontmatter', f"Invalid YAML frontmatter: {problem}", offset=offset)
+            return
+
+        if not isinstance(frontmatter, dict):
+            self.issue('structure.frontmatter', "Frontmatter must be a mapping of fields", offset=match.start(1))
+            return
+
+        for key in REQUIRED_FRONTMATTER:
+            if frontmatter.get(key) in (None, ''):
+                self.issue('structure.frontmatter_field', f"Missing required frontmatter field {key!r}",
+                           offset=match.start(1))
+
+        version = frontmatter.get('health_md_version')
+        if version is not None:
+            self.report.version = str(version)
+            if str(version) not in SUPPORTED_VERSIONS:
+                self.issue('structure.version', f"Unsupported health_md_version {version!r}", WARNING,
+                           self._key_offset('health_md_version'))
+
+        privacy_level = frontmatter.get('privacy_level')
+        if privacy_level is not None:
+            self.report.privacy_level = str(privacy_level)
+            if privacy_level not in PRIVACY_LEVELS:
+                self.issue('privacy.level', f"privacy_level must be one of {', '.join(PRIVACY_LEVELS)}, "
+                           f"got {privacy_level!r}", offset=self._key_offset('privacy_level'))
+
+        generated = last_updated = None
+        if frontmatter.get('generated'):
+            generated = self._timestamp('generated', frontmatter['generated'])
+        if frontmatter.get('last_updated'):
+            last_updated = self._timestamp('last_updated', frontmatter['last_updated'])
+        if generated and last_updated and last_updated < generated:
+            self.issue('clinical.date_consistency', "last_updated is earlier than generated", WARNING,
+                       self._key_offset('last_updated'))
+        self._reference = max(filter(None, (generated, last_updated)), default=None)
+
+        sources = frontmatter.get('data_sources')
+        if sources is not None and not isinstance(sources, list):
+            self.issue('structure.frontmatter_field', "data_sources must be a list", WARNING,
+                       self._key_offset('data_sources'))
+
+    def check_structure(self):
+        sections = self.record.sections
+        self.report.sections = [
+            section.title for root in sections.roots
+            for section in (root.children if root.level == 1 else [root])
+        ]
+
+        for root in sections.roots:
+            if root.level > 2:
+                self.issue('structure.heading_level',
+                           f"Section '{root.title}' should be a level 2 heading (##)",
+                           WARNING, self.body_offset(root.start))
+        for section in sections.walk():
+            for child in section.children:
+                if child.level > section.level + 1:
+                    self.issue('structure.heading_level',
+                               f"Heading '{child.title}' skips from level {section.level} to {child.level}",
+                               WARNING, self.body_offset(child.start))
+
+        for path in REQUIRED_SECTIONS:
+            if path not in sections:
+                title = path.replace('_', ' ').title()
+                self.issue('structure.required_section', f"Missing required section '## {title}'")
+
+    def check_blocks(self):
+        record = self.record
+        for field_name, (parent, method) in _BLOCK_FIELDS.items():
+            getattr(record, field_name)
+            extracted = record._block_entities.get(field_name, {})
+            parse_block = getattr(record, method)
+            check = getattr(self, f'_check_{field_name}')
+            for block in record.sections.children(parent):
+                entities = extracted.get(_digest(block.source[block.start:block.end]))
+                if entities is None:
+                    # Extracted before this record kept per-block entities
+                    found = parse_block(block.title, block.body)
+                    entities = found if isinstance(found, list) else [found] if found is not None else []
+                check(block, entities)
+
+        body = record.markdown_content
+        for match in _ICD_CODE_RE.finditer(body):
+            code = match.group(1)
+            if not _VALID_ICD_RE.fullmatch(code):
+                self.issue('clinical.icd_code', f"Invalid ICD-10 code {code!r}",
+                           offset=self.body_offset(match.start(1)))
+
+    def _check_medications(self, block: 'Section', entities: List[Any]):
+        for med in entities:
+            started = _STARTED_RE.search(block.source, block.body_start, block.end)
+            if started and med.started is None:
+                self.issue('structure.date_format',
+                           f"Unrecognized start date {started.group(1)!r} for {med.name}",
+                           WARNING, self.body_offset(started.start(1)))
+            elif self.after_record(med.started):
+                self.issue('clinical.date_consistency', f"{med.name} starts after the record was generated",
+                           WARNING, self.in_block(block, 'Started'))
+
+    def _check_lab_results(self, block: 'Section', entities: List[Any]):
+        offset = self.body_offset(block.start)
+        numeric = [lab for lab in entities if lab.value and any(c.isdigit() for c in lab.value)]
+        without_units = [lab for lab in numeric if not lab.units]
+        if without_units:
+            self.issue('clinical.lab_units',
+                       f"{block.title}: {len(without_units)} value(s) without units", WARNING, offset)
+        without_range = [lab for lab in numeric if not lab.reference_range]
+        if without_range:
+            self.issue('clinical.lab_reference_range',
+                       f"{block.title}: {len(without_range)} value(s) without a reference range", WARNING, offset)
+        for lab in entities:
+            if self.after_record(lab.date):
+                self.issue('clinical.date_consistency',
+                           f"{lab.name} result dated after the record was generated", WARNING,
+                           self.in_block(block, lab.value))
+
+    def _check_vital_signs(self, block: 'Section', entities: List[Any]):
+        title = _DATED_TITLE_RE.match(block.title)
+        if title and entities and entities[0].date is None:
+            self.issue('structure.date_format', f"Unrecognized date {title.group(2)!r} in '{block.title}'",
+                       offset=self.body_offset(block.start))
+        for vital in entities:
+            if self.after_record(vital.date):
+                self.issue('clinical.date_consistency',
+                           f"{vital.name} reading dated after the record was generated", WARNING,
+                           self.in_block(block, vital.value))
+
+    def _check_clinical_timeline(self, block: 'Section', entities: List[Any]):
+        offset = self.body_offset(block.start)
+        title = _EVENT_TITLE_RE.match(block.title)
+        if title is None:
+            self.issue('structure.timeline_heading',
+                       f"Timeline entry '{block.title}' should be headed 'date: title'", WARNING, offset)
+        elif entities and entities[0].date is None:
+            self.issue('structure.date_format', f"Unrecognized date {title.group(1)!r} in '{block.title}'",
+                       offset=offset)
+        elif entities and self.after_record(entities[0].date):
+            self.issue('clinical.date_consistency',
+                       f"Timeline entry '{block.title}' is dated after the record was generated", WARNING, offset)
+
+    def _check_medical_history(self, block: 'Section', entities: List[Any]):
+        offset = self.body_offset(block.start)
+        title = _DATED_TITLE_RE.match(block.title)
+        if title is None:
+            self.issue('structure.condition_heading',
+                       f"Condition '{block.title}' should be headed 'name (onset date)'", WARNING, offset)
+        elif entities and entities[0].onset is None:
+            self.issue('structure.date_format', f"Unrecognized onset date {title.group(2)!r} in '{block.title}'",
+                       offset=offset)
+        elif entities and self.after_record(entities[0].onset):
+            self.issue('clinical.date_consistency',
+                       f"Onset of {entities[0].condition} is after the record was generated", WARNING, offset)
+
+    def check_privacy(self):
+        body = self.record.markdown_content
+
+        depth = 0
+        for match in _MARKER_RE.finditer(body):
+            if match.group(1):
+                depth -= 1
+                if depth < 0:
+                    self.issue('privacy.sensitive_marker', "END SENSITIVE without an opening SENSITIVE marker",
+                               offset=self.body_offset(match.start()))
+                    depth = 0
+            else:
+                depth += 1
+        if depth:
+            self.issue('privacy.sensitive_marker', "SENSITIVE marker is never closed with END SENSITIVE",
+                       offset=len(self.raw))
+
+        for section in self.record.sections.walk():
+            if section.level <= 2 and _SENSITIVE_TOPIC_RE.search(section.key):
+                if not _MARKER_RE.search(section.source, section.start, section.end):
+                    self.issue('privacy.sensitive_marker',
+                               f"Section '{section.title}' should be wrapped in <!-- SENSITIVE --> markers",
+                               WARNING, self.body_offset(section.start))
+
+        level = self.report.privacy_level
+        if level == 'identified' or level not in PRIVACY_LEVELS:
+            return
+        if level == 'anonymous':
+            for match in _NAMING_LABEL_RE.finditer(body):
+                self.issue('privacy.level', f"Anonymous record contains a '{match.group(1)}' field",
+                           offset=self.body_offset(match.start(1)))
+            if self.record.demographics.get('age'):
+                section = self.record.sections.get('demographics')
+                self.issue('privacy.level', "Anonymous record gives an exact age; use Age Range", WARNING,
+                           self.in_block(section, 'Age') if section else None)
+        found = []
+        for suffix in _ID_SUFFIX_RE.finditer(body):
+            if suffix.group(0)[0] in '-+':
+                match = _ID_NUMBER_RE.search(body, max(0, suffix.start() - 8), suffix.end())
+            else:
+                match = _ID_NUMBER_RE.match(body, suffix.start(), suffix.end())
+            if match and match.end() == suffix.end():
+                found.append(match.start())
+        # The email pattern is slow to fail, so only run it when it can match
+        if '@' in body:
+            found.extend(match.start() for match in _EMAIL_RE.finditer(body))
+        for start in sorted(found):
+            self.issue('privacy.level', f"{level.title()} record contains a direct identifier",
+                       offset=self.body_offset(start))
+
+
+def validate_record(record: 'HealthRecord', fail_fast: bool = False, strict: bool = False) -> ValidationReport:
+    """
+    Check a record against the SPEC.md validation rules while extracting it.
+
+    Args:
+        record: Record to validate; its fields are extracted (and memoized)
+            as a side effect, so parsing it afterwards costs nothing more
+        fail_fast: Stop validating, and extracting, at the first error
+        strict: Report every warning as an error
+    """
+    return _Validator(record, fail_fast, strict).run()
+
+
+def validate_health_md(content: str, fail_fast: bool = False, strict: bool = False) -> Dict[str, Any]:
+    """
+    Validate Health.md text.
+
+    Returns the report as a dict (version, privacy_level, errors,
+    warnings, sections) and raises HealthMdValidationError when any rule
+    is broken.
+    """
+    from .parser import HealthRecord
+    report = validate_record(HealthRecord(content), fail_fast, strict)
+    report.raise_for_errors()
+    return report.as_dict()
@@ -0,0 +1,86 @@
+"""
+Health.md Values - Parsing of measurement values and reference ranges
+"""
+
+import re
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+
+# Leading number with optional comparator and units: "7.2%", ">60 mL/min", "118 mg/dL"
+_VALUE_RE = re.compile(
+    r'^\s*(?:[<>≤≥]=?\s*)?(-?\d+(?:[.,]\d+)?)\s*([%A-Za-zµμ°][^\s(),;]*)?'
+)
+# "70-100", "0.6 - 1.2"
+_RANGE_RE = re.compile(r'(-?\d+(?:\.\d+)?)\s*[-–]\s*(-?\d+(?:\.\d+)?)')
+# "<7.0", "> 50", "≤ 5.7"
+_BOUND_RE = re.compile(r'([<>≤≥])=?\s*(-?\d+(?:\.\d+)?)')
+
+# Relative change across a series below which it counts as stable
+STABLE_THRESHOLD = 0.02
+
+TREND_UP = '↑'
+TREND_DOWN = '↓'
+TREND_STABLE = '→'
+
+
+def parse_value(text: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Parse the leading numeric value and units of a measurement.
+
+    ``"7.2% ↓ (Ref: <7.0%)"`` gives ``(7.2, '%')``; text that does not start
+    with a number gives ``(None, None)``.
+    """
+    if not text:
+        return None, None
+    match = _VALUE_RE.match(text)
+    if not match:
+        return None, None
+    return float(match.group(1).replace(',', '.')), match.group(2)
+
+
+def parse_reference_range(text: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Parse a reference range into ``(low, high)`` bounds.
+
+    ``"70-100"`` gives ``(70.0, 100.0)``, ``"<7.0%"`` gives ``(None, 7.0)``
+    and ``">50 for women"`` gives ``(50.0, None)``. The first range or
+    bound found wins.
+    """
+    if not text:
+        return None, None
+
+    range_match = _RANGE_RE.search(text)
+    bound_match = _BOUND_RE.search(text)
+    if range_match and (not bound_match or range_match.start() < bound_match.start()):
+        return float(range_match.group(1)), float(range_match.group(2))
+    if bound_match:
+        bound = float(bound_match.group(2))
+        if bound_match.group(1) in '<≤':
+            return None, bound
+        return bound, None
+    return None, None
+
+
+def fitted_trend(points: Iterable[Tuple[date, float]], threshold: float = STABLE_THRESHOLD) -> Optional[str]:
+    """
+    Direction of the least-squares line through ``(date, value)`` points:
+    ``↑``, ``↓`` or ``→`` when the fitted change across them is under
+    ``threshold`` of their mean value, and None without two distinct dates.
+
+    The same fit as :meth:`health_md.labs.LabSeries.trend`, in plain Python
+    for the few results of one test, so callers need not load NumPy.
+    """
+    points = sorted((day.toordinal(), value) for day, value in points)
+    if len(points) < 2:
+        return None
+    mean_day = sum(day for day, _ in points) / len(points)
+    mean_value = sum(value for _, value in points) / len(points)
+    spread = sum((day - mean_day) ** 2 for day, _ in points)
+    if spread == 0:
+        return None
+    slope = sum((day - mean_day) * (value - mean_value) for day, value in points) / spread
+    change = slope * (points[-1][0] - points[0][0]) / (abs(mean_value) or 1.0)
+    if abs(change) < threshold:
+        return TREND_STABLE
+    return TREND_UP if change > 0 else TREND_DOWN
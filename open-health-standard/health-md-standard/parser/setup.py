@@ -41,8 +41,6 @@ setup(
     python_requires=">=3.8",
     install_requires=[
         "pyyaml>=6.0",
-        "markdown>=3.4.0",
-        "beautifulsoup4>=4.9.0",
         "python-dateutil>=2.8.0",
     ],
     extras_require={
@@ -56,6 +54,12 @@ setup(
         "fhir": [
             "fhir.resources>=7.0.0",
         ],
+        "arrow": [
+            "pyarrow>=10.0",
+        ],
+        "analytics": [
+            "numpy>=1.20",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Fuzzy search latency: FassSnapshot.search vs a brute-force trigram scan.
+
+The baseline loads medications.json and scores every product name with the
+same trigram similarity, which is what a search without the term and trigram
+indexes has to do. Snapshot build and open times are reported as well.
+
+Usage:
+    python3 bench_search.py
+    python3 bench_search.py --repeat 50
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fass_lookup import (  # noqa: E402
+    DATA_DIR, FassSnapshot, _terms_and_numbers, build_snapshot, trigrams,
+    write_snapshot,
+)
+
+QUERIES = [
+    'alvedon', 'ipren 400', 'sertralin', 'sertalin', 'omeprazole',
+    'omeprasol', 'kavepenin', 'zofran munloslig', 'treo', 'metformin',
+]
+
+
+def brute_force_search(products: List[dict], query: str, limit: int = 10) -> List[dict]:
+    """Score every product name against the query, without any index."""
+    words, _ = _terms_and_numbers(query)
+    wanted = trigrams(words)
+    scored = []
+    for product in products:
+        grams = trigrams(_terms_and_numbers(product.get('name') or '')[0])
+        if not grams:
+            continue
+        shared = len(wanted & grams)
+        if shared:
+            scored.append((shared / len(wanted | grams), product.get('name') or ''))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:limit]
+
+
+def timed(fn: Callable, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: List[float]):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"  {label:<28} mean {statistics.mean(samples):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    options = parser.parse_args()
+
+    print("Snapshot")
+    report('build_snapshot', timed(lambda: build_snapshot(DATA_DIR), 3))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_snapshot(DATA_DIR, Path(tmp) / 'fass.snap')
+        print(f"  {'size':<28} {path.stat().st_size / 1e6:8.2f} MB")
+
+        def open_and_close():
+            FassSnapshot.open(DATA_DIR, path).close()
+
+        report('FassSnapshot.open', timed(open_and_close, options.repeat))
+
+        snapshot = FassSnapshot.open(DATA_DIR, path)
+        with open(DATA_DIR / 'medications.json', encoding='utf-8') as f:
+            products = json.load(f)
+
+        print(f"\nPer query ({len(products)} products, {options.repeat} runs each)")
+        indexed: List[float] = []
+        scanned: List[float] = []
+        for query in QUERIES:
+            index_samples = timed(lambda: snapshot.search(query), options.repeat)
+            scan_samples = timed(lambda: brute_force_search(products, query), max(1, options.repeat // 5))
+            indexed += index_samples
+            scanned += scan_samples
+            report(f"{query!r} search", index_samples)
+            report(f"{query!r} scan", scan_samples)
+
+        print("\nAll queries")
+        report('FassSnapshot.search', indexed)
+        report('brute-force scan', scanned)
+        snapshot.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
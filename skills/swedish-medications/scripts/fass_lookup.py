@@ -3,23 +3,392 @@
 FASS Medication Lookup Script
 Searches Swedish pharmaceutical database for medication information.
 
+Lookups go through a binary snapshot of data/medications.json and
+data/substances.json, opened with mmap: exact name, brand, NPL id and
+substance lookups binary-search its sorted indexes and decode only the
+products they return. The snapshot is built on first use, and rebuilt
+whenever the JSON files change. Queries with no exact match fall back to
+a typo-tolerant trigram search with å/ä/ö folding ("omeprazole",
+"ipren 400").
+
 Usage:
     python3 fass_lookup.py <medication_name>
     python3 fass_lookup.py paracetamol
     python3 fass_lookup.py "alvedon 500mg"
+    python3 fass_lookup.py --substance metformin
+    python3 fass_lookup.py --npl 20230522000088
+    python3 fass_lookup.py --search "sertralin"
+    python3 fass_lookup.py --build-snapshot
 """
 
-import sys
+import heapq
 import json
-import urllib.request
-import urllib.parse
+import mmap
+import os
 import re
+import struct
+import sys
+import unicodedata
+import urllib.parse
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+SNAPSHOT_NAME = 'fass.snap'
+SOURCE_NAMES = ('medications.json', 'substances.json')
+
+# Snapshot layout, all integers little-endian:
+#   header:    magic, then (size, mtime_ns) of each source file
+#   sections:  (offset, count) of the product offsets and of each index
+#   products:  count + 1 uint32 offsets, then one compact JSON object each
+#   index:     count entries of (key offset, key length, postings offset,
+#              postings count), sorted by key bytes; keys and postings
+#              (uint32 product numbers) follow
+# The 'term' index files products under folded names, brands and
+# substances, each posting being product * 4 + the position of the match
+# kind in TERM_KINDS; the 'trigram' index has the same layout, with term
+# numbers (entry positions in 'term') as its postings.
+MAGIC = b'FASSNAP2'
+_HEADER = struct.Struct('<8s4Q')
+_SECTION = struct.Struct('<2Q')
+_ENTRY = struct.Struct('<4I')
+_OFFSET = struct.Struct('<I')
+INDEXES = ('name', 'brand', 'npl', 'substance', 'term', 'trigram')
+
+# Products listed per lookup before "... and N more"
+MAX_LISTED = 15
+
+# Fuzzy search: least trigram similarity for a term to match, as in
+# PostgreSQL's pg_trgm, and the most terms expanded into products
+SIMILARITY_THRESHOLD = 0.3
+MAX_TERMS = 25
+# Added to the score of products whose strength has a number in the query
+STRENGTH_BONUS = 0.1
+# What a fuzzy match was on, and its weight: a product named "Sertralin
+# Accord" ranks above "Oralin" for "sertralin", and "Treo" above "Treo citrus"
+TERM_KINDS = ('name', 'brand', 'substance')
+KIND_WEIGHTS = (1.0, 0.95, 0.9)
+
+_WORD_RE = re.compile(r'[^\W\d_]\w*|\d+(?:[.,]\d+)?')
+
+
+def normalize(text: str) -> str:
+    """Lookup key: lower-cased with whitespace collapsed, as in ``nameNormalized``."""
+    return ' '.join(text.lower().split())
+
+
+def fold(text: str) -> str:
+    """Lower-case without diacritics, so ``Levaxin``, ``läkemedel`` and ``lakemedel`` compare equal."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _terms_and_numbers(text: str) -> Tuple[List[str], List[str]]:
+    """Folded words of a query or term, split into words and numbers."""
+    words, numbers = [], []
+    for word in _WORD_RE.findall(fold(text)):
+        (numbers if word[0].isdigit() else words).append(word)
+    return words, numbers
+
+
+def trigrams(words: Iterable[str]) -> set:
+    """Trigrams of each word, padded with two spaces in front and one behind."""
+    grams = set()
+    for word in words:
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _source_stamps(data_dir: Path) -> Tuple[int, ...]:
+    stamps: List[int] = []
+    for name in SOURCE_NAMES:
+        stat = os.stat(data_dir / name)
+        stamps += (stat.st_size, stat.st_mtime_ns)
+    return tuple(stamps)
+
+
+def build_snapshot(data_dir: Path = DATA_DIR) -> bytes:
+    """Serialize the FASS JSON files into the snapshot layout."""
+    stamps = _source_stamps(data_dir)
+    with open(data_dir / 'medications.json', encoding='utf-8') as f:
+        products = json.load(f)
+    with open(data_dir / 'substances.json', encoding='utf-8') as f:
+        substances = json.load(f)
+
+    keys: Dict[str, Dict[bytes, set]] = {index: {} for index in INDEXES}
+    by_npl: Dict[str, int] = {}
+
+    def add(index: str, key: str, number: int):
+        if key:
+            keys[index].setdefault(key.encode('utf-8'), set()).add(number)
+
+    blobs = []
+    for number, product in enumerate(products):
+        blobs.append(json.dumps(product, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        name = normalize(product.get('nameNormalized') or product.get('name') or '')
+        add('name', name, number)
+        add('brand', name.split(' ', 1)[0], number)
+        add('npl', str(product.get('nplId', '')), number)
+        by_npl[str(product.get('nplId', ''))] = number
+        for substance in product.get('activeSubstances') or ():
+            add('substance', normalize(substance), number)
+    # substances.json may list products under more names than activeSubstances
+    for substance, npl_ids in substances.items():
+        for npl_id in npl_ids:
+            if npl_id in by_npl:
+                add('substance', normalize(substance), by_npl[npl_id])
+
+    # Fuzzy search terms: folded words of every name, brand and substance
+    for kind, index in enumerate(TERM_KINDS):
+        for key, numbers in keys[index].items():
+            words, _ = _terms_and_numbers(key.decode('utf-8'))
+            if words:
+                keys['term'].setdefault(' '.join(words).encode('utf-8'), set()).update(
+                    number * 4 + kind for number in numbers)
+    for term_number, term in enumerate(sorted(keys['term'])):
+        for gram in trigrams(term.decode('utf-8').split()):
+            add('trigram', gram, term_number)
+
+    out = bytearray(_HEADER.pack(MAGIC, *stamps))
+    sections_at = len(out)
+    out += bytes(_SECTION.size * (1 + len(INDEXES)))
+    sections = []
+
+    # Products
+    sections.append((len(out), len(blobs)))
+    position = len(out) + _OFFSET.size * (len(blobs) + 1)
+    for blob in blobs:
+        out += _OFFSET.pack(position)
+        position += len(blob)
+    out += _OFFSET.pack(position)
+    for blob in blobs:
+        out += blob
+
+    # Indexes: entries first, so a lookup touches only the pages it needs
+    for index in INDEXES:
+        entries = [(key, sorted(postings)) for key, postings in sorted(keys[index].items())]
+        start = len(out)
+        sections.append((start, len(entries)))
+        position = start + _ENTRY.size * len(entries)
+        packed = []
+        for key, postings in entries:
+            packed.append((position, len(key), position + len(key), len(postings)))
+            position += len(key) + _OFFSET.size * len(postings)
+        for entry in packed:
+            out += _ENTRY.pack(*entry)
+        for key, postings in entries:
+            out += key
+            out += struct.pack(f'<{len(postings)}I', *postings)
+
+    for number, section in enumerate(sections):
+        _SECTION.pack_into(out, sections_at + number * _SECTION.size, *section)
+    return bytes(out)
+
+
+def write_snapshot(data_dir: Path = DATA_DIR, path: Optional[Path] = None) -> Path:
+    """Build the snapshot and write it atomically next to the data (by default)."""
+    path = path or data_dir / SNAPSHOT_NAME
+    temporary = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        temporary.write_bytes(build_snapshot(data_dir))
+        os.replace(temporary, path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
+    return path
+
+
+class FassSnapshot:
+    """
+    Read-only view of a snapshot in memory or in a memory-mapped file.
+
+    Lookups are exact on normalized keys and return product dicts as in
+    medications.json; only the products returned are decoded.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        magic, *self.stamps = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a FASS snapshot')
+        self._sections = [_SECTION.unpack_from(buffer, _HEADER.size + number * _SECTION.size)
+                          for number in range(1 + len(INDEXES))]
+
+    @classmethod
+    def open(cls, data_dir: Path = DATA_DIR, path: Optional[Path] = None) -> 'FassSnapshot':
+        """
+        Map the snapshot for ``data_dir``, (re)building it first when it is
+        missing or older than the JSON files. If the data directory is not
+        writable, the snapshot is built in memory instead.
+        """
+        path = path or data_dir / SNAPSHOT_NAME
+        stamps = _source_stamps(data_dir)
+        try:
+            snapshot = cls._map(path)
+            if tuple(snapshot.stamps) == stamps:
+                return snapshot
+            snapshot.close()
+        except (OSError, ValueError, struct.error):
+            pass
+
+        try:
+            return cls._map(write_snapshot(data_dir, path))
+        except OSError:
+            return cls(build_snapshot(data_dir))
+
+    @classmethod
+    def _map(cls, path: Path) -> 'FassSnapshot':
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __len__(self) -> int:
+        return self._sections[0][1]
+
+    def product(self, number: int) -> dict:
+        start = self._sections[0][0] + number * _OFFSET.size
+        begin, end = struct.unpack_from('<2I', self.buffer, start)
+        return json.loads(self.buffer[begin:end])
+
+    def _entry(self, index: str, number: int) -> Tuple[bytes, Tuple[int, ...]]:
+        """Key and postings of the ``number``-th entry of an index."""
+        base = self._sections[1 + INDEXES.index(index)][0]
+        key_at, key_length, postings_at, postings = _ENTRY.unpack_from(self.buffer, base + number * _ENTRY.size)
+        return (self.buffer[key_at:key_at + key_length],
+                struct.unpack_from(f'<{postings}I', self.buffer, postings_at))
+
+    def _postings(self, index: str, key: str) -> Tuple[int, ...]:
+        """Postings filed under ``key``, by binary search over the sorted entries."""
+        base, count = self._sections[1 + INDEXES.index(index)]
+        buffer = self.buffer
+        target = key.encode('utf-8')
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            key_at, key_length, _, _ = _ENTRY.unpack_from(buffer, base + middle * _ENTRY.size)
+            if buffer[key_at:key_at + key_length] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low == count:
+            return ()
+        key_at, key_length, postings_at, postings = _ENTRY.unpack_from(buffer, base + low * _ENTRY.size)
+        if buffer[key_at:key_at + key_length] != target:
+            return ()
+        return struct.unpack_from(f'<{postings}I', buffer, postings_at)
+
+    def lookup(self, index: str, key: str) -> List[dict]:
+        return [self.product(number) for number in self._postings(index, normalize(key))]
+
+    def by_name(self, name: str) -> List[dict]:
+        """Products with exactly this name, e.g. every strength and form of ``Alvedon``."""
+        return self.lookup('name', name)
+
+    def by_brand(self, brand: str) -> List[dict]:
+        """Products whose name starts with this word, e.g. ``Alvedon forte`` for ``alvedon``."""
+        return self.lookup('brand', brand)
+
+    def by_npl_id(self, npl_id: str) -> List[dict]:
+        return self.lookup('npl', npl_id.strip())
+
+    def by_substance(self, substance: str) -> List[dict]:
+        """Products containing the active substance (Swedish INN, e.g. ``metformin``)."""
+        return self.lookup('substance', substance)
+
+    def find(self, query: str) -> List[dict]:
+        """
+        Products for a free-form query: an NPL id, an exact name, a brand
+        narrowed by the rest of the query (``alvedon 500mg``), or a substance.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        if query.isdigit():
+            return self.by_npl_id(query)
+        found = self.by_name(query)
+        if found:
+            return found
+        brand, _, rest = query.partition(' ')
+        found = self.by_brand(brand)
+        if found and rest:
+            wanted = rest.replace(' ', '')
+            narrowed = [product for product in found
+                        if wanted in normalize(' '.join(filter(None, (
+                            product.get('name'), product.get('strength'), product.get('form'))))).replace(' ', '')]
+            found = narrowed or found
+        return found or self.by_substance(query)
+
+    def similar_terms(self, words: List[str], limit: int = MAX_TERMS) -> List[Tuple[float, int]]:
+        """
+        ``(similarity, term number)`` of the terms most similar to ``words``,
+        best first. Similarity is the Jaccard index of the trigram sets.
+        """
+        grams = trigrams(words)
+        if not grams:
+            return []
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for term in self._postings('trigram', gram):
+                shared[term] = shared.get(term, 0) + 1
+
+        # Jaccard is at most shared / len(grams), so most terms are
+        # rejected before their own trigrams are counted
+        least = SIMILARITY_THRESHOLD * len(grams)
+        scored = []
+        for term, count in shared.items():
+            if count < least:
+                continue
+            key, _ = self._entry('term', term)
+            term_grams = len(trigrams(key.decode('utf-8').split()))
+            similarity = count / (len(grams) + term_grams - count)
+            if similarity >= SIMILARITY_THRESHOLD:
+                scored.append((similarity, term))
+        return heapq.nlargest(limit, scored)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[float, dict]]:
+        """
+        Typo-tolerant search over names, brands and substances.
+
+        Words of the query are folded (``å``/``ä`` to ``a``, ``ö`` to ``o``) and
+        matched by trigram similarity, so ``omeprazole``, ``sertalin`` and
+        ``lakemedel`` still find their products. Numbers in the query
+        (``ipren 400``) rank products with that strength first. Returns up
+        to ``limit`` ``(score, product)`` pairs, best first.
+        """
+        words, numbers = _terms_and_numbers(query)
+        best: Dict[int, float] = {}
+        for similarity, term in self.similar_terms(words):
+            for posting in self._entry('term', term)[1]:
+                number, kind = divmod(posting, 4)
+                score = similarity * KIND_WEIGHTS[kind]
+                if score > best.get(number, 0.0):
+                    best[number] = score
+        if not best:
+            return []
+
+        # "400" matches "400 mg" but not "4000 mg" or "2.400 mg"
+        wanted = [re.compile(rf'(?<![\d.,]){re.escape(number)}(?!\d|[.,]\d)') for number in numbers]
+        results = []
+        for number, similarity in best.items():
+            product = self.product(number)
+            score = similarity
+            if wanted:
+                strength = fold(f"{product.get('name', '')} {product.get('strength') or ''}")
+                score += STRENGTH_BONUS * sum(1 for pattern in wanted if pattern.search(strength)) / len(wanted)
+            results.append((score, product))
+        results.sort(key=lambda item: (-item[0], item[1].get('name', ''), item[1].get('strength') or ''))
+        return results[:limit]
+
 
 def search_fass_web(query: str) -> dict:
     """Search FASS website and extract results."""
     encoded_query = urllib.parse.quote(query)
     url = f"https://fass.se/search?query={encoded_query}"
-    
+
     return {
         'query': query,
         'search_url': url,
@@ -87,14 +456,48 @@ def get_common_medications() -> dict:
         }
     }
 
-def lookup_medication(query: str) -> str:
+def format_products(products: Iterable[dict], limit: int = MAX_LISTED,
+                    scores: Optional[List[float]] = None) -> List[str]:
+    """One markdown line per product: name, strength, form, Rx status, ATC and substances."""
+    products = list(products)
+    lines = []
+    for position, product in enumerate(products[:limit]):
+        details = ', '.join(filter(None, (product.get('strength'), product.get('form'))))
+        line = f"- **{product.get('name')}**" + (f" {details}" if details else '')
+        if scores is not None:
+            line = f"- ({scores[position]:.2f}) " + line[2:]
+        line += ' 🔴 Rx' if product.get('prescriptionRequired') else ' 🟢 OTC'
+        if product.get('atcCode'):
+            line += f" [{product['atcCode']}]"
+        if product.get('activeSubstances'):
+            line += f" — {', '.join(product['activeSubstances'])}"
+        line += f" (NPL {product.get('nplId')})"
+        lines.append(line)
+    if len(products) > limit:
+        lines.append(f"- ... and {len(products) - limit} more")
+    return lines
+
+def lookup_medication(query: str, snapshot: Optional[FassSnapshot] = None,
+                      products: Optional[List[dict]] = None) -> str:
     """Look up medication information."""
     query_lower = query.lower().strip()
     common_meds = get_common_medications()
-    
+
+    # Products in the full FASS database; without an exact match, the
+    # closest ones by fuzzy search
+    matches: List[Tuple[float, dict]] = []
+    if products is None:
+        try:
+            snapshot = snapshot or FassSnapshot.open()
+            products = snapshot.find(query)
+            if not products:
+                matches = snapshot.search(query)
+        except OSError:
+            products = []  # Database files not available; curated list only
+
     output = []
     output.append(f"## Swedish Medication Lookup: {query}\n")
-    
+
     # Check common medications database
     found = None
     for med_name, info in common_meds.items():
@@ -104,7 +507,13 @@ def lookup_medication(query: str) -> str:
         if query_lower in med_name:
             found = (med_name, info)
             break
-    
+    if found is None and matches:
+        # A misspelled name: the best match's substance may be curated
+        for substance in matches[0][1].get('activeSubstances') or ():
+            if substance.lower() in common_meds:
+                found = (substance.lower(), common_meds[substance.lower()])
+                break
+
     if found:
         med_name, info = found
         output.append(f"### {med_name.title()} ({', '.join(info['brands'])})\n")
@@ -113,7 +522,19 @@ def lookup_medication(query: str) -> str:
         output.append(f"**OTC:** {'Yes (receptfritt)' if info['otc'] == True else 'No (receptbelagt)' if info['otc'] == False else info['otc']}")
         output.append(f"**Warnings:** {info['warnings']}")
         output.append("")
-    
+
+    if products:
+        output.append(f"### Products in FASS ({len(products)})")
+        output.extend(format_products(products))
+        output.append("")
+    elif matches:
+        output.append("### Closest matches in FASS")
+        output.extend(format_products([product for _, product in matches]))
+        output.append("")
+    elif not found:
+        output.append(f"No quick info available for \"{query}\" in database.")
+        output.append("")
+
     # Always provide FASS link
     web_info = search_fass_web(query)
     output.append(f"### Full Information on FASS")
@@ -122,15 +543,48 @@ def lookup_medication(query: str) -> str:
     output.append("---")
     output.append("*This is informational only. Always consult healthcare professionals for medical advice.*")
     output.append("*Sources: FASS.se, Läkemedelsverket*")
-    
+
     return "\n".join(output)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
+def main(args: List[str]) -> int:
+    if not args or args[0] in ('-h', '--help'):
         print("Usage: fass_lookup.py <medication_name>")
+        print("       fass_lookup.py --substance <substance>")
+        print("       fass_lookup.py --npl <npl_id>")
+        print("       fass_lookup.py --search <query>")
+        print("       fass_lookup.py --build-snapshot")
         print("Example: fass_lookup.py paracetamol")
         print("Example: fass_lookup.py alvedon")
-        sys.exit(1)
-    
-    query = " ".join(sys.argv[1:])
-    print(lookup_medication(query))
+        return 0 if args else 1
+
+    if args[0] == '--build-snapshot':
+        path = write_snapshot()
+        print(f"Wrote {path} ({len(FassSnapshot.open())} products)")
+        return 0
+
+    if args[0] == '--search':
+        query = " ".join(args[1:])
+        results = FassSnapshot.open().search(query, limit=MAX_LISTED)
+        if not results:
+            print(f"No medications found for \"{query}\".")
+            return 0
+        print(f"## Closest matches for \"{query}\"\n")
+        print("\n".join(format_products([product for _, product in results],
+                                         scores=[score for score, _ in results])))
+        return 0
+
+    if args[0] in ('--substance', '--npl'):
+        query = " ".join(args[1:])
+        if not query:
+            print(f"Usage: fass_lookup.py {args[0]} <value>")
+            return 1
+        snapshot = FassSnapshot.open()
+        products = snapshot.by_substance(query) if args[0] == '--substance' else snapshot.by_npl_id(query)
+        print(lookup_medication(query, products=products))
+        return 0
+
+    print(lookup_medication(" ".join(args)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))